@@ -0,0 +1,121 @@
+import asyncio
+import contextvars
+import functools
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.handlers.asgi import ASGIHandler
+from django.db import close_old_connections, connections
+from django.urls import URLPattern
+from rest_framework.routers import SimpleRouter
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+# Эндпоинты чтения, которые в режиме asgi обслуживаются асинхронно.
+ASYNC_READ_ROUTES = (
+    'titles-list', 'titles-detail', 'reviews-list', 'comments-list')
+
+# Под ASGI Django выполняет синхронные вьюхи по одной в общем потоке
+# процесса; чтения идут в собственном пуле из ASYNC_READ_THREADS потоков,
+# у каждого - своё соединение с базой.
+read_executor = ThreadPoolExecutor(
+    max_workers=settings.ASYNC_READ_THREADS,
+    thread_name_prefix='async-read')
+
+
+def run_view(view, request, *args, **kwargs):
+    """Выполняет вьюху в потоке пула и отрисовывает ответ там же.
+
+    Сигналы request_started/request_finished в этих потоках не приходят,
+    поэтому устаревшие соединения закрываются здесь.
+    """
+    close_old_connections()
+    try:
+        response = view(request, *args, **kwargs)
+        if hasattr(response, 'render'):
+            response.render()
+        return response
+    finally:
+        close_old_connections()
+
+
+def async_read(view):
+    """Асинхронная обёртка вьюхи DRF.
+
+    Безопасные запросы выполняются в read_executor и не ждут друг друга,
+    остальные и профилируемые - как обычные синхронные вьюхи под ASGI.
+    """
+    @functools.wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        if (request.method not in SAFE_METHODS
+                or getattr(request, 'profiling', False)):
+            return await sync_to_async(run_view)(
+                view, request, *args, **kwargs)
+        context = contextvars.copy_context()
+        return await asyncio.get_running_loop().run_in_executor(
+            read_executor, functools.partial(
+                context.run, run_view, view, request, *args, **kwargs))
+    return wrapper
+
+
+class AsyncReadRouter(SimpleRouter):
+    """В режиме SERVER_MODE=asgi подменяет ASYNC_READ_ROUTES обёртками
+    async_read()."""
+
+    def get_urls(self):
+        urls = super().get_urls()
+        if settings.SERVER_MODE != 'asgi':
+            return urls
+        return [
+            URLPattern(url.pattern, async_read(url.callback),
+                       url.default_args, url.name)
+            if url.name in ASYNC_READ_ROUTES else url
+            for url in urls
+        ]
+
+
+def close_connections():
+    for connection in connections.all():
+        connection.close()
+
+
+class StreamingASGIHandler(ASGIHandler):
+    """ASGIHandler, который читает потоковые ответы вне цикла событий.
+
+    Django 3.2 перебирает StreamingHttpResponse прямо в цикле событий:
+    генератор с запросами к базе падает с SynchronousOnlyOperation, а
+    медленный генератор останавливает остальные запросы воркера. Здесь
+    каждый ответ перебирается в собственном потоке, чтобы серверный курсор
+    оставался на одном соединении; по окончании соединение закрывается.
+    """
+
+    async def send_response(self, response, send):
+        if not response.streaming:
+            return await super().send_response(response, send)
+        headers = [
+            (header.encode('ascii'), value.encode('latin1'))
+            for header, value in response.items()]
+        headers.extend(
+            (b'Set-Cookie', cookie.output(header='').encode('ascii').strip())
+            for cookie in response.cookies.values())
+        await send({'type': 'http.response.start',
+                    'status': response.status_code, 'headers': headers})
+        loop = asyncio.get_running_loop()
+        executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix='streaming')
+        try:
+            parts = iter(response)
+            while True:
+                part = await loop.run_in_executor(
+                    executor, next, parts, None)
+                if part is None:
+                    break
+                for chunk, _ in self.chunk_bytes(part):
+                    await send({'type': 'http.response.body',
+                                'body': chunk, 'more_body': True})
+            await send({'type': 'http.response.body'})
+        finally:
+            await loop.run_in_executor(executor, response.close)
+            await loop.run_in_executor(executor, close_connections)
+            executor.shutdown(wait=False)
@@ -0,0 +1,101 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import (AuthenticationFailed,
+                                                 InvalidToken)
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+from api_yamdb.db.routers import use_primary
+
+User = get_user_model()
+
+# Поля пользователя, которые access-токен несёт в claims.
+CLAIM_FIELDS = ('username', 'role', 'is_superuser')
+# Изменение этих полей (и удаление пользователя) отзывает выданные токены.
+REVOKING_FIELDS = ('role', 'is_superuser', 'is_active')
+
+
+class ClaimsAccessToken(AccessToken):
+    """Access-токен с именем, ролью и флагом суперпользователя в claims."""
+
+    @classmethod
+    def for_user(cls, user):
+        token = super().for_user(user)
+        for field in CLAIM_FIELDS:
+            token[field] = getattr(user, field)
+        return token
+
+
+def auth_state_key(user_id):
+    return f'auth:user:{user_id}'
+
+
+def get_auth_state(user_id):
+    """Текущие роль и статус пользователя из кэша или базы.
+
+    Пустой словарь - пользователя нет. Хранится AUTH_STATE_CACHE_TIMEOUT
+    секунд, при изменении пользователя сбрасывается сигналом, так что
+    отзыв токенов срабатывает сразу, а при потере сигнала - не позже TTL.
+    """
+    key = auth_state_key(user_id)
+    state = cache.get(key)
+    if state is None:
+        # С отстающей реплики в кэш попали бы права до отзыва.
+        with use_primary():
+            state = User.objects.filter(pk=user_id).values(
+                *CLAIM_FIELDS, 'is_active').first() or {}
+        cache.set(key, state, settings.AUTH_STATE_CACHE_TIMEOUT)
+    return state
+
+
+def forget_auth_state(user_id):
+    cache.delete(auth_state_key(user_id))
+
+
+def token_user(user_id, values):
+    """Пользователь без запроса к базе.
+
+    Поля, которых нет в values, отложены (как после only()): при обращении
+    они читаются из базы, а save() записывает только загруженные поля.
+    """
+    values = dict(values, id=user_id)
+    names = [field.attname for field in User._meta.concrete_fields
+             if field.attname in values]
+    return User.from_db(
+        DEFAULT_DB_ALIAS, names, [values[name] for name in names])
+
+
+class ClaimsJWTAuthentication(JWTAuthentication):
+    """JWT-аутентификация без загрузки пользователя на каждый запрос.
+
+    Пользователь собирается из claims токена. Токен отклоняется, если
+    роль, флаг суперпользователя или активность с момента выдачи
+    изменились или пользователь удалён; проверка идёт по get_auth_state().
+    Токены без claims (выданные до их появления) обслуживаются по тому же
+    кэшу состояния.
+    """
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(
+                'Токен не содержит идентификатора пользователя')
+        state = get_auth_state(user_id)
+        if not state:
+            raise AuthenticationFailed(
+                'Пользователь не найден', code='user_not_found')
+        if not state['is_active']:
+            raise AuthenticationFailed(
+                'Пользователь заблокирован', code='user_inactive')
+        if not all(field in validated_token for field in CLAIM_FIELDS):
+            return token_user(user_id, state)
+        claims = dict(validated_token.payload, is_active=True)
+        if any(claims[field] != state[field] for field in REVOKING_FIELDS):
+            raise AuthenticationFailed(
+                'Токен отозван: права пользователя изменились',
+                code='token_revoked')
+        return token_user(user_id, claims)
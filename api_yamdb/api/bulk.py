@@ -0,0 +1,324 @@
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import connections, router, transaction
+from django.utils import timezone
+from django.utils.encoding import smart_str
+from rest_framework import serializers, status
+from rest_framework.decorators import action
+from rest_framework.exceptions import MethodNotAllowed
+from rest_framework.relations import ManyRelatedField, SlugRelatedField
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.validators import UniqueValidator
+
+from .cache import invalidate
+
+NON_FIELD_ERRORS = api_settings.NON_FIELD_ERRORS_KEY
+# <ресурс>/bulk/ - путь пакетных запросов, а не объект с таким slug.
+BULK_PATH = 'bulk'
+
+
+def is_lookup_value(value):
+    return isinstance(value, (str, int)) and not isinstance(value, bool)
+
+
+def batch_items(data):
+    """Проверяет, что тело запроса - список не длиннее
+    API_BULK_MAX_ITEMS."""
+    if not isinstance(data, list):
+        raise serializers.ValidationError(
+            {NON_FIELD_ERRORS: ['Ожидался список объектов']})
+    if len(data) > settings.API_BULK_MAX_ITEMS:
+        raise serializers.ValidationError({NON_FIELD_ERRORS: [
+            f'Не больше {settings.API_BULK_MAX_ITEMS} объектов за запрос']})
+    return data
+
+
+def to_pk(model, value):
+    """id элемента пакета, приведённый к типу первичного ключа модели,
+    или None, если он не приводится."""
+    if not is_lookup_value(value):
+        return None
+    try:
+        return model._meta.pk.to_python(value)
+    except ValidationError:
+        return None
+
+
+def requested_ids(data, model):
+    """id объектов пакета на обновление, по которым их загрузить."""
+    ids = {to_pk(model, item.get('id')) for item in batch_items(data)
+           if isinstance(item, dict)}
+    ids.discard(None)
+    return ids
+
+
+def insert_objects(model, objs):
+    """Вставляет объекты пакетно и заполняет их id."""
+    manager = model._default_manager
+    connection = connections[router.db_for_write(model)]
+    if connection.features.can_return_rows_from_bulk_insert:
+        manager.bulk_create(objs)
+        return
+    # SQLite в Django 3.2 не возвращает id из пакетной вставки.
+    for obj in objs:
+        obj.save(force_insert=True)
+
+
+class BatchSlugRelatedField(SlugRelatedField):
+    """SlugRelatedField, который в пакете BulkListSerializer берёт
+    объекты из resolved (slug -> объект) вместо запроса на каждый slug."""
+    resolved = None
+
+    def to_internal_value(self, data):
+        if self.resolved is None:
+            return super().to_internal_value(data)
+        try:
+            return self.resolved[data]
+        except KeyError:
+            self.fail('does_not_exist', slug_name=self.slug_field,
+                      value=smart_str(data))
+        except TypeError:
+            self.fail('invalid')
+
+
+class BulkListSerializer(serializers.ListSerializer):
+    """Пакет объектов ModelSerializer, проверяемый целиком.
+
+    Slug связей (BatchSlugRelatedField) разрешаются одним запросом на
+    поле, уникальность полей - одним запросом на поле и внутри пакета.
+    Ошибки отдаются списком по элементам: {} у верных. Запись - пакетными
+    запросами, сигналы моделей не срабатывают. Для обновления instance -
+    словарь id -> объект, у каждого элемента обязателен id.
+    """
+
+    def slug_relations(self):
+        for name, field in self.child.fields.items():
+            if field.read_only:
+                continue
+            if isinstance(field, ManyRelatedField):
+                if isinstance(field.child_relation, BatchSlugRelatedField):
+                    yield name, field.child_relation, True
+            elif isinstance(field, BatchSlugRelatedField):
+                yield name, field, False
+
+    def resolve_slugs(self, data):
+        for name, field, many in self.slug_relations():
+            slugs = set()
+            for item in data:
+                value = item.get(name) if isinstance(item, dict) else None
+                values = value if many and isinstance(value, list) else [
+                    value]
+                slugs.update(value for value in values
+                             if isinstance(value, str))
+            field.resolved = {
+                getattr(obj, field.slug_field): obj
+                for obj in field.get_queryset().filter(
+                    **{f'{field.slug_field}__in': slugs})}
+
+    def take_unique_validators(self):
+        """Убирает UniqueValidator из полей элемента: уникальность
+        проверяет check_unique для всего пакета."""
+        unique = []
+        for name, field in self.child.fields.items():
+            validators = [validator for validator in field.validators
+                          if isinstance(validator, UniqueValidator)]
+            if validators:
+                field.validators = [validator
+                                    for validator in field.validators
+                                    if validator not in validators]
+                unique.append((name, field.source, validators[0]))
+        return unique
+
+    def check_unique(self, validated, errors, unique):
+        for name, source, validator in unique:
+            queryset = validator.queryset.filter(**{f'{source}__in': [
+                attrs[source] for attrs in validated
+                if attrs and source in attrs]})
+            if self.instance is not None:
+                queryset = queryset.exclude(pk__in=list(self.instance))
+            taken = set(queryset.values_list(source, flat=True))
+            for attrs, item_errors in zip(validated, errors):
+                if not attrs or source not in attrs:
+                    continue
+                if attrs[source] in taken:
+                    item_errors.setdefault(name, []).append(
+                        validator.message)
+                taken.add(attrs[source])
+
+    def item_pk(self, item, seen):
+        """id элемента и ошибка в нём (None, если id верный)."""
+        value = item.get('id') if isinstance(item, dict) else None
+        if value is None:
+            return None, 'Обязательное поле.'
+        pk = to_pk(self.child.Meta.model, value)
+        if pk is None:
+            return None, f'Некорректный id: {value}'
+        if pk not in self.instance:
+            return None, f'Объект с id {pk} не найден'
+        if pk in seen:
+            return None, f'id {pk} повторяется в пакете'
+        seen.add(pk)
+        return pk, None
+
+    def validate_item(self, item, seen):
+        try:
+            attrs, item_errors = self.child.run_validation(item), {}
+        except serializers.ValidationError as exc:
+            # Для элемента не-объекта (null, строка) detail - список.
+            detail = exc.detail
+            attrs, item_errors = None, (
+                dict(detail) if isinstance(detail, dict)
+                else {NON_FIELD_ERRORS: detail})
+        if self.instance is not None:
+            pk, error = self.item_pk(item, seen)
+            if error:
+                item_errors.setdefault('id', []).append(error)
+            elif attrs is not None:
+                attrs['id'] = pk
+        return attrs, item_errors
+
+    def to_internal_value(self, data):
+        data = batch_items(data)
+        self.resolve_slugs(data)
+        unique = self.take_unique_validators()
+        validated, errors, seen = [], [], set()
+        for item in data:
+            attrs, item_errors = self.validate_item(item, seen)
+            validated.append(attrs)
+            errors.append(item_errors)
+        self.check_unique(validated, errors, unique)
+        if any(errors):
+            raise serializers.ValidationError(errors)
+        return validated
+
+    def many_fields(self):
+        return {field.source for field in self.child.fields.values()
+                if isinstance(field, ManyRelatedField)
+                and not field.read_only}
+
+    def set_many(self, objs, validated_data, replace):
+        """Записывает связи многие-ко-многим одним запросом на поле."""
+        model = self.child.Meta.model
+        for name in self.many_fields():
+            field = model._meta.get_field(name)
+            through = field.remote_field.through
+            source = field.m2m_field_name()
+            target = field.m2m_reverse_field_name()
+            changed = [(obj, attrs[name])
+                       for obj, attrs in zip(objs, validated_data)
+                       if name in attrs]
+            if replace and changed:
+                through._default_manager.filter(**{
+                    f'{source}__in': [obj for obj, _ in changed]}).delete()
+            through._default_manager.bulk_create([
+                through(**{source: obj, target: value})
+                for obj, values in changed for value in dict.fromkeys(values)
+            ])
+
+    def create(self, validated_data):
+        model = self.child.Meta.model
+        many = self.many_fields()
+        objs = [model(**{name: value for name, value in attrs.items()
+                         if name not in many})
+                for attrs in validated_data]
+        insert_objects(model, objs)
+        self.set_many(objs, validated_data, replace=False)
+        return objs
+
+    def update(self, instance, validated_data):
+        model = self.child.Meta.model
+        skip = self.many_fields() | {'id'}
+        # bulk_update не обновляет поля auto_now сам.
+        touched = {field.name for field in model._meta.concrete_fields
+                   if getattr(field, 'auto_now', False)}
+        now, fields, objs = timezone.now(), set(touched), []
+        for attrs in validated_data:
+            obj = instance[attrs['id']]
+            for name, value in attrs.items():
+                if name not in skip:
+                    setattr(obj, name, value)
+                    fields.add(name)
+            for name in touched:
+                setattr(obj, name, now)
+            objs.append(obj)
+        if objs and fields:
+            model._default_manager.bulk_update(objs, sorted(fields))
+        self.set_many(objs, validated_data, replace=True)
+        return objs
+
+
+class BulkMixin:
+    """POST, PATCH и DELETE списком объектов на <ресурс>/bulk/.
+
+    Пакет проверяется целиком и записывается в одной транзакции; при
+    любой ошибке ничего не записывается, а ответ 400 содержит ошибки
+    по элементам. bulk_actions - разрешённые действия вьюсета.
+    """
+    bulk_actions = ('create', 'update', 'destroy')
+
+    def check_bulk_action(self, name):
+        if name not in self.bulk_actions:
+            raise MethodNotAllowed(self.request.method)
+
+    def get_bulk_serializer(self, *args, partial=False, **kwargs):
+        context = self.get_serializer_context()
+        child = self.get_serializer_class()(partial=partial, context=context)
+        return BulkListSerializer(
+            *args, child=child, partial=partial, context=context, **kwargs)
+
+    def bulk_response(self, objs, status_code):
+        # Заново с select_related и prefetch_related вьюсета: ответ
+        # собирается без запроса на каждый объект.
+        fetched = self.get_queryset().in_bulk([obj.pk for obj in objs])
+        serializer = self.get_serializer(
+            [fetched[obj.pk] for obj in objs], many=True)
+        return Response(serializer.data, status=status_code)
+
+    def bulk_save(self, serializer):
+        serializer.is_valid(raise_exception=True)
+        with transaction.atomic():
+            objs = serializer.save()
+        invalidate(*self.get_cache_namespaces())
+        return objs
+
+    @action(detail=False, methods=['post'], url_path=BULK_PATH)
+    def bulk_create(self, request, *args, **kwargs):
+        self.check_bulk_action('create')
+        objs = self.bulk_save(self.get_bulk_serializer(data=request.data))
+        return self.bulk_response(objs, status.HTTP_201_CREATED)
+
+    @bulk_create.mapping.patch
+    def bulk_update(self, request, *args, **kwargs):
+        self.check_bulk_action('update')
+        model = self.get_queryset().model
+        instances = model._default_manager.in_bulk(
+            requested_ids(request.data, model))
+        objs = self.bulk_save(self.get_bulk_serializer(
+            instances, data=request.data, partial=True))
+        return self.bulk_response(objs, status.HTTP_200_OK)
+
+    @bulk_create.mapping.delete
+    def bulk_destroy(self, request, *args, **kwargs):
+        self.check_bulk_action('destroy')
+        lookups = batch_items(request.data)
+        field = self.lookup_field
+        key = 'id' if field == 'pk' else field
+        model = self.get_queryset().model
+        if field == 'pk':
+            values = [to_pk(model, value) for value in lookups]
+        else:
+            values = [value if isinstance(value, str) else None
+                      for value in lookups]
+        queryset = self.get_queryset().filter(**{f'{field}__in': [
+            value for value in values if value is not None]})
+        found = set(queryset.values_list(field, flat=True))
+        errors = [{} if value is not None and value in found
+                  else {key: [f'Объект {lookup} не найден']}
+                  for lookup, value in zip(lookups, values)]
+        if any(errors):
+            raise serializers.ValidationError(errors)
+        with transaction.atomic():
+            queryset.delete()
+        invalidate(*self.get_cache_namespaces())
+        return Response(status=status.HTTP_204_NO_CONTENT)
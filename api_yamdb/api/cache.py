@@ -0,0 +1,186 @@
+import hashlib
+import time
+from calendar import timegm
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+from rest_framework.response import Response
+
+from api_yamdb.db.routers import use_primary
+
+# Общее пространство имён: его сброс инвалидирует все ответы
+# (после массовых операций в обход сигналов).
+ALL = 'all'
+
+
+def version_key(namespace):
+    return f'api:version:{namespace}'
+
+
+def initial_version():
+    # Начальная версия из времени: если ключ версии вытеснен из кэша,
+    # новая версия не совпадёт ни с одной из прежних.
+    return int(time.time() * 1000)
+
+
+def get_versions(namespaces):
+    keys = [version_key(namespace) for namespace in namespaces]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            cache.add(key, initial_version(), timeout=None)
+            versions[key] = cache.get(key)
+    return [versions[key] for key in keys]
+
+
+def written_key(namespace):
+    return f'api:written:{namespace}'
+
+
+def invalidate(*namespaces):
+    """Сбрасывает закэшированные ответы пространств имён.
+
+    На DATABASE_REPLICA_PIN_SECONDS пространство отмечается как недавно
+    изменённое: новые ответы для кэша в это время читаются из основной
+    базы, а не с отстающей реплики.
+    """
+    cache.set_many(
+        {written_key(namespace): True for namespace in namespaces},
+        settings.DATABASE_REPLICA_PIN_SECONDS)
+    for namespace in namespaces:
+        try:
+            cache.incr(version_key(namespace))
+        except ValueError:
+            cache.add(version_key(namespace), initial_version(),
+                      timeout=None)
+
+
+def invalidate_on_commit(*namespaces):
+    """invalidate() сейчас и ещё раз после коммита транзакции.
+
+    Между записью и коммитом параллельный запрос ещё читает прежние
+    данные и может закэшировать их под новой версией; повторный сброс
+    после коммита убирает такие ответы.
+    """
+    invalidate(*namespaces)
+    transaction.on_commit(lambda: invalidate(*namespaces))
+
+
+def recently_written(namespaces):
+    return bool(cache.get_many(
+        [written_key(namespace) for namespace in namespaces]))
+
+
+def sorted_query(request):
+    return '&'.join(sorted(request.GET.urlencode().split('&')))
+
+
+def modified_state(queryset):
+    """Состояние ответа об одной строке по её отметке modified."""
+    modified = queryset.values_list('modified', flat=True).first()
+    return None if modified is None else (None, modified)
+
+
+def request_role(request):
+    user = request.user
+    if not user.is_authenticated:
+        return 'anonymous'
+    if user.is_superuser:
+        return 'superuser'
+    return user.role
+
+
+class CachedReadMixin:
+    """Кэширует ответы list и retrieve вьюсета и отвечает на условные GET.
+
+    Ключ строится из пути, query string, роли пользователя и версий
+    пространств имён get_cache_namespaces(); сигналы моделей
+    (api/signals.py) увеличивают версии при записи, и старые ответы
+    больше не читаются.
+
+    Если вьюсет определяет get_modification_state(), ответы получают
+    ETag и Last-Modified, а If-None-Match и If-Modified-Since
+    проверяются до сериализации. Валидаторы хранятся в кэше вместе
+    с ответом.
+    """
+
+    def get_cache_namespaces(self):
+        return (self.basename,)
+
+    def get_modification_state(self):
+        """Маркер и время последнего изменения ответа или None.
+
+        Должны считаться дешевле самого ответа: по отметкам modified,
+        а не по содержимому.
+        """
+        return None
+
+    def get_cache_key(self, request, namespaces):
+        versions = ':'.join(str(v) for v in get_versions(namespaces))
+        raw = (f'{versions}|{request_role(request)}|'
+               f'{request.path}?{sorted_query(request)}')
+        return 'api:response:' + hashlib.md5(raw.encode()).hexdigest()
+
+    def get_validators(self, request):
+        state = self.get_modification_state()
+        if state is None:
+            return None, None
+        marker, modified = state
+        raw = (f'{marker}|{modified and modified.isoformat()}|'
+               f'{request.accepted_renderer.format}|'
+               f'{request.path}?{sorted_query(request)}')
+        etag = quote_etag(hashlib.md5(raw.encode()).hexdigest())
+        return etag, modified and timegm(modified.utctimetuple())
+
+    def cached_response(self, handler, request, *args, **kwargs):
+        if getattr(request, 'profiling', False):
+            # Профиль ответа из кэша ничего не покажет.
+            return handler(request, *args, **kwargs)
+        namespaces = (ALL,) + tuple(self.get_cache_namespaces())
+        key = self.get_cache_key(request, namespaces)
+        entry = cache.get(key)
+        if entry is None:
+            if not recently_written(namespaces):
+                return self.fill_cache(key, handler, request, *args, **kwargs)
+            with use_primary():
+                return self.fill_cache(key, handler, request, *args, **kwargs)
+        data, etag, last_modified = entry
+        response = get_conditional_response(
+            request, etag=etag, last_modified=last_modified)
+        if response is not None:
+            return response
+        response = Response(data)
+        response['X-Cache'] = 'HIT'
+        return self.set_validators(response, etag, last_modified)
+
+    def fill_cache(self, key, handler, request, *args, **kwargs):
+        etag, last_modified = self.get_validators(request)
+        response = get_conditional_response(
+            request, etag=etag, last_modified=last_modified)
+        if response is not None:
+            return response
+        response = handler(request, *args, **kwargs)
+        if response.status_code != 200:
+            return response
+        cache.set(key, (response.data, etag, last_modified),
+                  settings.API_CACHE_TIMEOUT)
+        response['X-Cache'] = 'MISS'
+        return self.set_validators(response, etag, last_modified)
+
+    @staticmethod
+    def set_validators(response, etag, last_modified):
+        if etag:
+            response['ETag'] = etag
+        if last_modified:
+            response['Last-Modified'] = http_date(last_modified)
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(
+            super().retrieve, request, *args, **kwargs)
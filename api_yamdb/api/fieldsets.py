@@ -0,0 +1,108 @@
+from collections import namedtuple
+
+from django.utils.functional import cached_property
+from rest_framework import serializers
+
+from .rows import get_row_serializer
+
+FIELDS_PARAM = 'fields'
+EXPAND_PARAM = 'expand'
+
+# fields - поля ответа в порядке сериализатора, expand - связи,
+# которые отдаются вложенными объектами.
+Fieldset = namedtuple('Fieldset', ('fields', 'expand'))
+
+
+def split_param(request, name):
+    """Значения параметра через запятую; пустой параметр - как
+    отсутствующий."""
+    value = request.query_params.get(name, '')
+    items = {item.strip() for item in value.split(',') if item.strip()}
+    return items or None
+
+
+class SparseFieldsetSerializer(serializers.ModelSerializer):
+    """ModelSerializer с набором полей из ?fields= и ?expand=.
+
+    expandable_fields: связь -> (компактное, развёрнутое) представление,
+    фабрики полей; None - поле, объявленное в сериализаторе. Без
+    параметров ответ прежний. С ?fields= или ?expand= отдаются только
+    поля из fields (все, если его нет) и связи из expand, причём связи
+    из expand - развёрнутыми, остальные - компактными.
+    """
+    expandable_fields = {}
+
+    @classmethod
+    def parse_fieldset(cls, request):
+        """Fieldset запроса или None, если параметров нет.
+
+        Неизвестные поля - ошибка валидации (400).
+        """
+        fields = split_param(request, FIELDS_PARAM)
+        expand = split_param(request, EXPAND_PARAM)
+        if fields is None and expand is None:
+            return None
+        known = tuple(cls().get_fields())
+        errors = {}
+        if fields is not None and fields - set(known):
+            errors[FIELDS_PARAM] = ['Неизвестные поля: {}'.format(
+                ', '.join(sorted(fields - set(known))))]
+        if expand and expand - set(cls.expandable_fields):
+            errors[EXPAND_PARAM] = ['Связи нельзя развернуть: {}'.format(
+                ', '.join(sorted(expand - set(cls.expandable_fields))))]
+        if errors:
+            raise serializers.ValidationError(errors)
+        expand = expand or set()
+        selected = set(known) if fields is None else fields | expand
+        return Fieldset(
+            tuple(name for name in known if name in selected),
+            tuple(name for name in known if name in expand))
+
+    def get_fields(self):
+        fields = super().get_fields()
+        fieldset = self.context.get('fieldset')
+        if fieldset is None:
+            return fields
+        selected = {}
+        for name in fieldset.fields:
+            field = fields[name]
+            if name in self.expandable_fields:
+                compact, expanded = self.expandable_fields[name]
+                factory = expanded if name in fieldset.expand else compact
+                if factory is not None:
+                    field = factory()
+            selected[name] = field
+        return selected
+
+
+class SparseFieldsetMixin:
+    """?fields= и ?expand= для list и retrieve вьюсета.
+
+    Сериализатор - SparseFieldsetSerializer. Неотданные столбцы
+    не читаются из базы (only()), связи читаются, только если попали
+    в ответ.
+    """
+    fieldset_actions = ('list', 'retrieve')
+
+    @cached_property
+    def fieldset(self):
+        serializer_class = self.get_serializer_class()
+        if (self.action not in self.fieldset_actions
+                or not issubclass(serializer_class,
+                                  SparseFieldsetSerializer)):
+            return None
+        return serializer_class.parse_fieldset(self.request)
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['fieldset'] = self.fieldset
+        return context
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        if self.fieldset is None:
+            return queryset
+        rows = get_row_serializer(self.get_serializer_class(), self.fieldset)
+        extra = [order.lstrip('-')
+                 for order in getattr(self, 'cursor_ordering', ())]
+        return rows.only(queryset, extra)
@@ -1,15 +1,59 @@
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db import connections
+from django.db.models import Case, F, IntegerField, Q, Value, When
 from django_filters import rest_framework
-from django_filters.filters import CharFilter
+from django_filters.filters import BaseInFilter, CharFilter, NumberFilter
 
-from reviews.models import Title
+from reviews.models import GenreTitle, Title
+
+SEARCH_CONFIG = 'russian'
+
+
+class CharInFilter(BaseInFilter, CharFilter):
+    """Фильтр по списку значений через запятую: ?genre=drama,comedy."""
 
 
 class Filter(rest_framework.FilterSet):
-    year = CharFilter(field_name='year',)
-    category = CharFilter(field_name='category__slug', lookup_expr='contains')
-    genre = CharFilter(field_name='genre__slug', lookup_expr='contains')
+    year = NumberFilter(field_name='year')
+    year_min = NumberFilter(field_name='year', lookup_expr='gte')
+    year_max = NumberFilter(field_name='year', lookup_expr='lte')
+    category = CharInFilter(field_name='category__slug', lookup_expr='in')
+    genre = CharInFilter(method='filter_genre')
     name = CharFilter(field_name='name', lookup_expr='contains')
+    search = CharFilter(method='filter_search')
 
     class Meta:
         model = Title
-        fields = '__all__'
+        fields = ('name', 'year', 'description', 'category', 'genre')
+
+    def filter_genre(self, queryset, name, value):
+        """Произведения хотя бы одного из жанров.
+
+        Подзапрос по индексу GenreTitle(genre, title) вместо JOIN
+        не размножает строки произведений с несколькими жанрами.
+        """
+        return queryset.filter(id__in=GenreTitle.objects.filter(
+            genre__slug__in=value).values('title_id'))
+
+    def filter_search(self, queryset, name, value):
+        """Полнотекстовый поиск по названию и описанию.
+
+        На PostgreSQL - по индексированному search_vector с учётом
+        словоформ и сортировкой по релевантности, на других базах -
+        по вхождению всех слов запроса (SQLite не различает регистр
+        только для латиницы).
+        """
+        if connections[queryset.db].vendor == 'postgresql':
+            query = SearchQuery(value, config=SEARCH_CONFIG)
+            return queryset.filter(search_vector=query).annotate(
+                search_rank=SearchRank(F('search_vector'), query),
+            ).order_by('-search_rank', 'id')
+        for word in value.split():
+            queryset = queryset.filter(
+                Q(name__icontains=word) | Q(description__icontains=word))
+        return queryset.annotate(
+            search_rank=Case(
+                When(name__icontains=value, then=Value(1)),
+                default=Value(0),
+                output_field=IntegerField()),
+        ).order_by('-search_rank', 'id')
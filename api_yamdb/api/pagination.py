@@ -0,0 +1,262 @@
+import binascii
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.paginator import EmptyPage, Page, Paginator
+from django.db import connections
+from django.db.models import Q
+from django.utils.functional import cached_property
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+def estimate_count(queryset):
+    """Оценка числа строк выборки по статистике планировщика.
+
+    Работает только для querysets на PostgreSQL, иначе возвращает None.
+    """
+    if not hasattr(queryset, 'query'):
+        return None
+    connection = connections[queryset.db]
+    if connection.vendor != 'postgresql':
+        return None
+    # Как COUNT(*): без сортировки и JOIN для select_related.
+    sql, params = queryset.order_by().values('pk').query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+class ApproximatePage(Page):
+    def __init__(self, object_list, number, paginator, has_more):
+        super().__init__(object_list, number, paginator)
+        self.has_more = has_more
+
+    def has_next(self):
+        return self.has_more
+
+
+class ApproximateCountPaginator(Paginator):
+    """Paginator, который считает COUNT(*) только для небольших выборок.
+
+    Если оценка планировщика не меньше PAGINATION_EXACT_COUNT_THRESHOLD,
+    count берётся из оценки, а наличие следующей страницы определяется
+    выборкой одной лишней строки. count_queryset - выборка для COUNT(*)
+    и оценки вместо object_list.
+    """
+
+    def __init__(self, object_list, per_page, *args, count_queryset=None,
+                 **kwargs):
+        super().__init__(object_list, per_page, *args, **kwargs)
+        self.count_queryset = (object_list if count_queryset is None
+                               else count_queryset)
+
+    @cached_property
+    def count(self):
+        estimate = estimate_count(self.count_queryset)
+        threshold = settings.PAGINATION_EXACT_COUNT_THRESHOLD
+        self.count_is_exact = estimate is None or estimate < threshold
+        if not self.count_is_exact:
+            return estimate
+        if self.count_queryset is self.object_list:
+            return super().count
+        return self.count_queryset.count()
+
+    def validate_number(self, number):
+        try:
+            return super().validate_number(number)
+        except EmptyPage:
+            # Оценка может быть меньше реального числа строк,
+            # поэтому страницы за её пределами не отбрасываются.
+            if int(number) < 1 or self.count_is_exact:
+                raise
+            return int(number)
+
+    def page(self, number):
+        number = self.validate_number(number)
+        if self.count_is_exact:
+            return super().page(number)
+        bottom = (number - 1) * self.per_page
+        rows = list(self.object_list[bottom:bottom + self.per_page + 1])
+        return ApproximatePage(rows[:self.per_page], number, self,
+                               has_more=len(rows) > self.per_page)
+
+
+class ApproximateCountPagination(PageNumberPagination):
+    """Постраничная пагинация с приблизительным count для больших списков.
+
+    Поле count_exact в ответе сообщает, точное ли значение count.
+    count_queryset в paginate_queryset - выборка, по которой считается
+    count, если она проще отдаваемой (например, без JOIN для столбцов).
+    """
+
+    def paginate_queryset(self, queryset, request, view=None,
+                          count_queryset=None):
+        self.count_queryset = count_queryset
+        return super().paginate_queryset(queryset, request, view)
+
+    def django_paginator_class(self, queryset, page_size):
+        # PageNumberPagination создаёт Paginator этим вызовом.
+        return ApproximateCountPaginator(
+            queryset, page_size, count_queryset=self.count_queryset)
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('count', self.page.paginator.count),
+            ('count_exact', self.page.paginator.count_is_exact),
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data)
+        ]))
+
+    def get_paginated_response_schema(self, schema):
+        response_schema = super().get_paginated_response_schema(schema)
+        response_schema['properties']['count_exact'] = {'type': 'boolean'}
+        return response_schema
+
+
+def keyset_filter(ordering, position, reverse):
+    """Q для строк после position в порядке ordering (до - при reverse).
+
+    Для ('year', 'id') - year > y OR (year = y AND id > i): ключ
+    составной, поэтому равные year не требуют OFFSET.
+    """
+    condition = Q()
+    for index, order in enumerate(ordering):
+        name = order.lstrip('-')
+        after = order.startswith('-') == reverse
+        equal = {field.lstrip('-'): value for field, value
+                 in zip(ordering[:index], position[:index])}
+        condition |= Q(**equal, **{
+            f'{name}__{"gt" if after else "lt"}': position[index]})
+    return condition
+
+
+def reversed_ordering(ordering):
+    return [order[1:] if order.startswith('-') else f'-{order}'
+            for order in ordering]
+
+
+class KeysetPagination:
+    """Пагинация по составному ключу ordering (последнее поле -
+    уникальное, обычно id).
+
+    Курсор хранит значения ключа крайней строки страницы и направление;
+    следующая страница выбирается условием keyset_filter по индексу
+    без OFFSET, сколько бы строк ни делили первое поле ключа.
+    """
+
+    def __init__(self, ordering, page_size, cursor_query_param):
+        self.ordering = list(ordering)
+        self.page_size = page_size
+        self.cursor_query_param = cursor_query_param
+
+    def decode_cursor(self, request, model):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None, False
+        try:
+            cursor = json.loads(urlsafe_b64decode(encoded.encode()))
+            position = [
+                model._meta.get_field(order.lstrip('-')).to_python(value)
+                for order, value in zip(self.ordering, cursor['p'])]
+            if len(position) != len(self.ordering):
+                raise ValueError
+            return position, bool(cursor.get('r'))
+        except (TypeError, ValueError, KeyError, ValidationError,
+                binascii.Error):
+            raise NotFound('Неверный курсор')
+
+    def encode_cursor(self, row, reverse):
+        position = []
+        for order in self.ordering:
+            name = order.lstrip('-')
+            value = row[name] if isinstance(row, dict) else getattr(
+                row, name)
+            position.append(value.isoformat() if hasattr(
+                value, 'isoformat') else value)
+        cursor = json.dumps({'p': position, 'r': int(reverse)})
+        return replace_query_param(
+            self.base_url, self.cursor_query_param,
+            urlsafe_b64encode(cursor.encode()).decode())
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.base_url = request.build_absolute_uri()
+        position, reverse = self.decode_cursor(request, queryset.model)
+        ordering = (reversed_ordering(self.ordering) if reverse
+                    else self.ordering)
+        queryset = queryset.order_by(*ordering)
+        if position is not None:
+            queryset = queryset.filter(
+                keyset_filter(self.ordering, position, reverse))
+        rows = list(queryset[:self.page_size + 1])
+        has_more = len(rows) > self.page_size
+        page = rows[:self.page_size]
+        if reverse:
+            page.reverse()
+        # Курсор пришёл со страницы в другую сторону - там строки есть.
+        has_next = has_more if not reverse else True
+        has_previous = has_more if reverse else position is not None
+        self.next_link = (self.encode_cursor(page[-1], False)
+                          if page and has_next else None)
+        self.previous_link = (self.encode_cursor(page[0], True)
+                              if page and has_previous else None)
+        return page
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('next', self.next_link),
+            ('previous', self.previous_link),
+            ('results', data),
+        ]))
+
+
+class CursorOrPageNumberPagination(ApproximateCountPagination):
+    """Постраничная пагинация с режимом курсора по запросу.
+
+    Параметр ?cursor= (первая страница - с пустым значением) переключает
+    выдачу на KeysetPagination по составному ключу cursor_ordering
+    вьюсета: вместо COUNT(*) и OFFSET выполняется выборка по индексу
+    от последней позиции, поэтому любая страница стоит столько же,
+    сколько первая.
+
+    Параметры из ordered_query_params вьюсета (например, ?search= с
+    сортировкой по релевантности) задают свой порядок выдачи: с ними
+    ?cursor= не действует, и список разбивается на страницы по номеру.
+    """
+    cursor_query_param = 'cursor'
+
+    def get_cursor_ordering(self, request, view):
+        """Ключ курсора или None, если выдача постраничная."""
+        if self.cursor_query_param not in request.query_params:
+            return None
+        if any(request.query_params.get(param) for param in getattr(
+                view, 'ordered_query_params', ())):
+            return None
+        return getattr(view, 'cursor_ordering', None)
+
+    def paginate_queryset(self, queryset, request, view=None,
+                          count_queryset=None):
+        self.cursor_paginator = None
+        ordering = self.get_cursor_ordering(request, view)
+        if ordering:
+            self.cursor_paginator = KeysetPagination(
+                ordering, self.get_page_size(request),
+                self.cursor_query_param)
+            return self.cursor_paginator.paginate_queryset(
+                queryset, request, view)
+        return super().paginate_queryset(queryset, request, view,
+                                         count_queryset)
+
+    def get_paginated_response(self, data):
+        if self.cursor_paginator is not None:
+            return self.cursor_paginator.get_paginated_response(data)
+        return super().get_paginated_response(data)
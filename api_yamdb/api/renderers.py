@@ -0,0 +1,41 @@
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Типы, которые orjson пишет иначе, чем JSONEncoder DRF, передаются
+# в JSONEncoder.default.
+ORJSON_OPTIONS = (orjson.OPT_PASSTHROUGH_DATACLASS
+                  | orjson.OPT_PASSTHROUGH_DATETIME) if orjson else 0
+
+
+class FastJSONRenderer(JSONRenderer):
+    """JSONRenderer на orjson, если он установлен.
+
+    Вывод побайтно совпадает с JSONRenderer при настройках по умолчанию
+    (UNICODE_JSON, COMPACT_JSON, STRICT_JSON). Ответы с отступами
+    (?indent= в Accept) и данные, которые orjson не пишет (ключи не строки,
+    слишком большие числа), отрисовывает JSONRenderer. Дробные числа
+    orjson пишет в своём формате (1e16 вместо 1e+16), в ответах API их нет.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None or data is None or self.get_indent(
+                accepted_media_type, renderer_context or {}):
+            return super().render(
+                data, accepted_media_type, renderer_context)
+        try:
+            ret = orjson.dumps(
+                data, default=JSONEncoder().default, option=ORJSON_OPTIONS)
+        except orjson.JSONEncodeError:
+            return super().render(
+                data, accepted_media_type, renderer_context)
+        # Как и JSONRenderer, экранируем разделители строк U+2028
+        # и U+2029: в JavaScript они завершают строковый литерал.
+        if b'\xe2\x80\xa8' in ret or b'\xe2\x80\xa9' in ret:
+            ret = ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(
+                b'\xe2\x80\xa9', b'\\u2029')
+        return ret
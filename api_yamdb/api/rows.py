@@ -0,0 +1,247 @@
+from collections import defaultdict, namedtuple
+from functools import lru_cache
+from operator import itemgetter
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db.models import Prefetch
+from rest_framework import ISO_8601, serializers
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+
+# Значения этих полей модели уже имеют тип, который вернул бы
+# to_representation поля сериализатора.
+PASSTHROUGH = {
+    serializers.CharField: (
+        'CharField', 'EmailField', 'SlugField', 'TextField'),
+    serializers.IntegerField: (
+        'AutoField', 'BigAutoField', 'BigIntegerField', 'IntegerField',
+        'PositiveIntegerField', 'PositiveSmallIntegerField',
+        'SmallIntegerField'),
+}
+
+
+def datetime_mapper(field):
+    """to_representation DateTimeField для ISO 8601 без поиска формата
+    и часового пояса на каждое значение: пояс берётся при разборе
+    сериализатора (приложение не переключает его по запросам)."""
+    output_format = getattr(field, 'format', api_settings.DATETIME_FORMAT)
+    field_timezone = getattr(field, 'timezone', field.default_timezone())
+    if (output_format is None
+            or output_format.lower() != ISO_8601
+            or field_timezone is None):
+        return field.to_representation
+
+    def represent(value):
+        value = value.astimezone(field_timezone).isoformat()
+        if value.endswith('+00:00'):
+            value = value[:-6] + 'Z'
+        return value
+    return represent
+
+
+def value_mapper(field, model_field):
+    """Функция значения столбца -> значение поля в ответе или None,
+    если значение из базы выводится как есть."""
+    internal_type = model_field.get_internal_type()
+    for field_class, internal_types in PASSTHROUGH.items():
+        if type(field) is field_class and internal_type in internal_types:
+            return None
+    if type(field) is serializers.DateTimeField:
+        return datetime_mapper(field)
+    return field.to_representation
+
+
+# Поле many=True по ManyToManyField: столбцы промежуточной модели
+# (через её внешний ключ на связанную модель) и представление строки.
+ManyField = namedtuple(
+    'ManyField', ('name', 'model_field', 'columns', 'represent'))
+
+
+def column_getter(column, mapper):
+    if mapper is None:
+        return itemgetter(column)
+
+    def get(row):
+        value = row[column]
+        return None if value is None else mapper(value)
+    return get
+
+
+class RowSerializer:
+    """Представление сериализатора для строк values().
+
+    Разбирает поля ModelSerializer один раз: столбцы модели,
+    SlugRelatedField и вложенные сериализаторы по внешнему ключу читаются
+    одним запросом values() с JOIN, вложенные сериализаторы many=True по
+    ManyToManyField - одним запросом на страницу. Ответ совпадает с
+    serializer.data (ключи в том же порядке, значения того же типа).
+    context передаётся сериализатору: от него может зависеть набор полей
+    (api/fieldsets.py).
+    """
+
+    def __init__(self, serializer_class, prefix='', context=None):
+        serializer = serializer_class(context=context or {})
+        self.model = serializer.Meta.model
+        self.pk = self.model._meta.pk.attname
+        self.columns = []
+        self.fields = []
+        self.many = []
+        for name, field in serializer.fields.items():
+            if field.write_only:
+                continue
+            self.add_field(name, field, prefix)
+
+    def add_field(self, name, field, prefix):
+        source = field.source
+        if '.' in source or source == '*':
+            raise ImproperlyConfigured(
+                f'{self.model.__name__}.{name}: source {source!r} '
+                'не поддерживается')
+        model_field = self.model._meta.get_field(source)
+        column = prefix + source
+        if isinstance(field, (serializers.ListSerializer,
+                              serializers.ManyRelatedField)):
+            if not model_field.many_to_many or prefix:
+                raise ImproperlyConfigured(
+                    f'{self.model.__name__}.{name}: many=True '
+                    'поддерживается только для ManyToManyField модели '
+                    'списка')
+            self.many.append(self.many_field(name, field, model_field))
+            self.fields.append((name, None))
+        elif isinstance(field, serializers.SlugRelatedField):
+            column = f'{column}__{field.slug_field}'
+            self.columns.append(column)
+            self.fields.append((name, itemgetter(column)))
+        elif isinstance(field, serializers.ModelSerializer):
+            nested = RowSerializer(type(field), prefix=column + '__')
+            self.columns.append(column)
+            self.columns.extend(nested.columns)
+            self.fields.append((name, self.nested_getter(column, nested)))
+        elif isinstance(field, serializers.RelatedField):
+            raise ImproperlyConfigured(
+                f'{self.model.__name__}.{name}: {type(field).__name__} '
+                'не поддерживается')
+        else:
+            self.columns.append(column)
+            self.fields.append((name, column_getter(
+                column, value_mapper(field, model_field))))
+
+    @staticmethod
+    def many_field(name, field, model_field):
+        target = model_field.m2m_reverse_field_name()
+        if isinstance(field, serializers.ListSerializer):
+            nested = RowSerializer(type(field.child), prefix=target + '__')
+            return ManyField(
+                name, model_field, nested.columns, nested.represent)
+        child = field.child_relation
+        if not isinstance(child, serializers.SlugRelatedField):
+            raise ImproperlyConfigured(
+                f'{name}: {type(child).__name__} не поддерживается')
+        column = f'{target}__{child.slug_field}'
+        return ManyField(name, model_field, [column], itemgetter(column))
+
+    @staticmethod
+    def nested_getter(column, nested):
+        def get(row):
+            if row[column] is None:
+                return None
+            return nested.represent(row)
+        return get
+
+    def represent(self, row, many=None):
+        return {name: many[name] if get is None else get(row)
+                for name, get in self.fields}
+
+    def related(self, rows):
+        """Строки вложенных many=True по id строк страницы."""
+        ids = [row[self.pk] for row in rows]
+        related = {}
+        for name, model_field, columns, represent in self.many:
+            through = model_field.remote_field.through
+            source = model_field.m2m_field_name()
+            target = model_field.m2m_reverse_field_name()
+            ordering = [
+                ('-' if order.startswith('-') else '') + target + '__'
+                + order.lstrip('-')
+                for order in model_field.related_model._meta.ordering]
+            grouped = defaultdict(list)
+            for link in through.objects.filter(
+                    **{f'{source}__in': ids, f'{target}__isnull': False}
+            ).order_by(*ordering).values(f'{source}_id', *columns):
+                grouped[link[f'{source}_id']].append(represent(link))
+            related[name] = grouped
+        return related
+
+    def get_columns(self, extra=()):
+        columns = [self.pk]
+        for column in (*self.columns, *extra):
+            if column not in columns:
+                columns.append(column)
+        return columns
+
+    def values(self, queryset, extra=()):
+        return queryset.prefetch_related(None).values(
+            *self.get_columns(extra))
+
+    def only(self, queryset, extra=()):
+        """Выборка экземпляров только со столбцами этого представления:
+        связи по внешнему ключу - через select_related, many=True -
+        prefetch с нужными столбцами связанной модели."""
+        columns = self.get_columns(extra)
+        related = {column.rsplit('__', 1)[0]
+                   for column in columns if '__' in column}
+        queryset = queryset.select_related(None).prefetch_related(None)
+        if related:
+            queryset = queryset.select_related(*related)
+        for name, model_field, many_columns, _ in self.many:
+            model = model_field.related_model
+            queryset = queryset.prefetch_related(Prefetch(
+                model_field.name, queryset=model._default_manager.only(
+                    *(column.split('__', 1)[1] for column in many_columns))))
+        return queryset.only(*columns)
+
+    def data(self, rows):
+        rows = list(rows)
+        related = self.related(rows) if self.many and rows else {}
+        if not related:
+            return [self.represent(row) for row in rows]
+        return [self.represent(row, {
+            name: grouped.get(row[self.pk], [])
+            for name, grouped in related.items()}) for row in rows]
+
+
+@lru_cache(maxsize=256)
+def get_row_serializer(serializer_class, fieldset=None):
+    return RowSerializer(serializer_class, context={'fieldset': fieldset})
+
+
+class ValuesListMixin:
+    """list вьюсета по строкам values() без экземпляров моделей
+    и сериализатора.
+
+    Сериализатор списка разбирается в RowSerializer один раз на класс
+    и набор полей (api/fieldsets.py). Отключается настройкой API_VALUES_LISTS.
+    """
+
+    def list(self, request, *args, **kwargs):
+        if not settings.API_VALUES_LISTS:
+            return super().list(request, *args, **kwargs)
+        rows = get_row_serializer(
+            self.get_serializer_class(), getattr(self, 'fieldset', None))
+        extra = [order.lstrip('-')
+                 for order in getattr(self, 'cursor_ordering', ())]
+        queryset = self.filter_queryset(self.get_queryset())
+        values = rows.values(queryset, extra)
+        page = self.paginate_values(values, queryset)
+        if page is not None:
+            return self.get_paginated_response(rows.data(page))
+        return Response(rows.data(values))
+
+    def paginate_values(self, values, queryset):
+        """Страница строк values; COUNT(*) пагинация считает по queryset
+        - без JOIN, нужных только столбцам ответа."""
+        if self.paginator is None:
+            return None
+        return self.paginator.paginate_queryset(
+            values, self.request, view=self, count_queryset=queryset)
@@ -6,6 +6,9 @@ from rest_framework.validators import UniqueValidator
 
 from reviews.models import Category, Comment, Genre, Review, Title
 
+from .bulk import BULK_PATH, BatchSlugRelatedField
+from .fieldsets import SparseFieldsetSerializer
+
 User = get_user_model()
 
 
@@ -45,23 +48,47 @@ class ProfileSerializer(serializers.ModelSerializer):
         read_only_fields = ('role',)
 
 
-class CategorySerializer(serializers.ModelSerializer):
+class CatalogSlugMixin:
+    """slug категорий и жанров не может совпадать с путём пакетных
+    запросов: /genres/bulk/ не дойдёт до жанра bulk."""
+
+    def validate_slug(self, value):
+        if value == BULK_PATH:
+            raise serializers.ValidationError(
+                'Вы не можете использовать этот slug')
+        return value
+
+
+class CategorySerializer(CatalogSlugMixin, serializers.ModelSerializer):
     class Meta:
         model = Category
         fields = ('name', 'slug',)
 
 
-class GenreSerializer(serializers.ModelSerializer):
+class GenreSerializer(CatalogSlugMixin, serializers.ModelSerializer):
     class Meta:
         model = Genre
         fields = ('name', 'slug',)
 
 
-class TitleListSerializer(serializers.ModelSerializer):
+class AuthorSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = User
+        fields = ('username', 'first_name', 'last_name')
+
+
+class TitleListSerializer(SparseFieldsetSerializer):
     genre = GenreSerializer(many=True)
     category = CategorySerializer(required=True)
     rating = serializers.IntegerField()
 
+    expandable_fields = {
+        'genre': (lambda: SlugRelatedField(
+            slug_field='slug', many=True, read_only=True), None),
+        'category': (lambda: SlugRelatedField(
+            slug_field='slug', read_only=True), None),
+    }
+
     class Meta:
         model = Title
         fields = ('id', 'genre', 'category',
@@ -69,23 +96,27 @@ class TitleListSerializer(serializers.ModelSerializer):
 
 
 class TitleCreateSerializer(serializers.ModelSerializer):
-    genre = SlugRelatedField(slug_field='slug',
-                             many=True,
-                             queryset=Genre.objects.all())
-    category = SlugRelatedField(slug_field='slug',
-                                queryset=Category.objects.all())
+    genre = BatchSlugRelatedField(slug_field='slug',
+                                  many=True,
+                                  queryset=Genre.objects.all())
+    category = BatchSlugRelatedField(slug_field='slug',
+                                     queryset=Category.objects.all())
 
     class Meta:
         model = Title
         fields = ('id', 'genre', 'category', 'name', 'description', 'year')
 
 
-class ReviewSerializer(serializers.ModelSerializer):
+class ReviewSerializer(SparseFieldsetSerializer):
     author = serializers.SlugRelatedField(
         slug_field='username',
         read_only=True
     )
 
+    expandable_fields = {
+        'author': (None, lambda: AuthorSerializer(read_only=True)),
+    }
+
     class Meta:
         fields = ('id', 'text', 'author', 'score', 'pub_date')
         model = Review
@@ -102,12 +133,16 @@ class ReviewSerializer(serializers.ModelSerializer):
         return data
 
 
-class CommentSerializer(serializers.ModelSerializer):
+class CommentSerializer(SparseFieldsetSerializer):
     author = serializers.SlugRelatedField(
         slug_field='username',
         read_only=True
     )
 
+    expandable_fields = {
+        'author': (None, lambda: AuthorSerializer(read_only=True)),
+    }
+
     class Meta:
         fields = ('id', 'text', 'author', 'pub_date')
         model = Comment
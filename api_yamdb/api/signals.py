@@ -0,0 +1,71 @@
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.signals import (m2m_changed, post_delete, post_save,
+                                      pre_save)
+from django.dispatch import receiver
+
+from reviews.models import Category, Comment, Genre, Review, Title
+from reviews.signals import catalog_changed
+
+from .authentication import forget_auth_state
+from .cache import ALL, invalidate_on_commit
+
+User = get_user_model()
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def category_changed(sender, **kwargs):
+    # Категория встроена в ответы произведений.
+    invalidate_on_commit('categories', 'titles')
+
+
+@receiver(post_save, sender=Genre)
+@receiver(post_delete, sender=Genre)
+def genre_changed(sender, **kwargs):
+    invalidate_on_commit('genres', 'titles')
+
+
+@receiver(post_save, sender=Title)
+@receiver(post_delete, sender=Title)
+@receiver(m2m_changed, sender=Title.genre.through)
+def title_changed(sender, instance, **kwargs):
+    invalidate_on_commit('titles')
+    if isinstance(instance, Title) and kwargs.get('signal') is post_delete:
+        invalidate_on_commit(f'reviews:{instance.pk}')
+
+
+@receiver(pre_save, sender=Review)
+def review_moving(sender, instance, **kwargs):
+    previous = getattr(instance, '_rating_state', None)
+    if previous is not None and previous[0] != instance.title_id:
+        invalidate_on_commit(f'reviews:{previous[0]}')
+
+
+@receiver(post_save, sender=Review)
+@receiver(post_delete, sender=Review)
+def review_changed(sender, instance, **kwargs):
+    # Отзыв меняет рейтинг произведения.
+    invalidate_on_commit('titles', f'reviews:{instance.title_id}',
+                         f'comments:{instance.pk}')
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def comment_changed(sender, instance, **kwargs):
+    invalidate_on_commit(f'comments:{instance.review_id}')
+
+
+@receiver(catalog_changed)
+def catalog_bulk_changed(sender, **kwargs):
+    """Массовые изменения в обход сигналов моделей сбрасывают весь кэш."""
+    invalidate_on_commit(ALL)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def user_changed(sender, instance, **kwargs):
+    # Сброс и после коммита: иначе параллельный запрос может успеть
+    # закэшировать состояние из ещё не изменённой строки.
+    forget_auth_state(instance.pk)
+    transaction.on_commit(lambda: forget_auth_state(instance.pk))
@@ -0,0 +1,43 @@
+import hashlib
+
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.throttling import SimpleRateThrottle
+
+
+class AuthIPThrottle(SimpleRateThrottle):
+    """Запросы регистрации и получения токена с одного IP."""
+    scope = 'auth_ip'
+
+    def get_cache_key(self, request, view):
+        return self.cache_format % {
+            'scope': self.scope, 'ident': self.get_ident(request)}
+
+
+class AuthUsernameThrottle(SimpleRateThrottle):
+    """Запросы регистрации и получения токена для одного username.
+
+    Ограничивает перебор кода подтверждения с разных адресов.
+    """
+    scope = 'auth_username'
+
+    def get_cache_key(self, request, view):
+        username = request.data.get('username')
+        if not isinstance(username, str) or not username:
+            return None
+        # username может содержать символы, недопустимые в ключах memcached.
+        ident = hashlib.md5(username.lower().encode()).hexdigest()
+        return self.cache_format % {'scope': self.scope, 'ident': ident}
+
+
+class ContentWriteThrottle(SimpleRateThrottle):
+    """Создание и изменение отзывов и комментариев одним пользователем."""
+    scope = 'content_write'
+
+    def get_cache_key(self, request, view):
+        if request.method in SAFE_METHODS:
+            return None
+        if request.user.is_authenticated:
+            ident = request.user.pk
+        else:
+            ident = self.get_ident(request)
+        return self.cache_format % {'scope': self.scope, 'ident': ident}
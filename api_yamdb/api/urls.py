@@ -1,12 +1,12 @@
-from django.urls import include, path
-from rest_framework.routers import SimpleRouter
+from django.urls import include, path, re_path
 
+from api.asynchronous import AsyncReadRouter
 from api.views import (TitleViewSet, GenreViewSet, CategoryViewSet,
-                       UserViewSet, ReviewViewSet, CommentViewSet, get_token,
-                       send_auth_code, profile)
+                       UserViewSet, ReviewViewSet, CommentViewSet, ExportView,
+                       get_token, send_auth_code, profile)
 
 
-router = SimpleRouter()
+router = AsyncReadRouter()
 router.register('genres', GenreViewSet, basename='genres')
 router.register('titles', TitleViewSet, basename='titles')
 router.register('categories', CategoryViewSet, basename='categories')
@@ -20,6 +20,8 @@ router.register(
 
 urlpatterns = [
     path('v1/users/me/', profile, name='profile'),
+    re_path(r'^v1/export/(?P<dataset>\w+)\.(?P<file_format>csv|ndjson)$',
+            ExportView.as_view(), name='export'),
     path('v1/', include(router.urls)),
     path('v1/auth/signup/', send_auth_code, name='send_auth_code'),
     path('v1/auth/token/', get_token, name='get_access_token')
@@ -1,29 +1,44 @@
 from django.shortcuts import get_object_or_404
-from django.core.mail import send_mail
-from django.db.models import Avg
 from django.contrib.auth import get_user_model
 from django_filters.rest_framework import DjangoFilterBackend
-from django.contrib.auth.tokens import PasswordResetTokenGenerator
+from django.db import IntegrityError, router, transaction
+from django.db.models import Max, Q
+from django.http import StreamingHttpResponse
 
 
 from rest_framework import mixins, viewsets, filters, status, permissions
+from rest_framework.exceptions import NotFound
 from rest_framework.response import Response
-from rest_framework.pagination import PageNumberPagination
-from rest_framework_simplejwt.tokens import AccessToken
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.views import APIView
+from rest_framework.decorators import (api_view, permission_classes,
+                                       throttle_classes)
 
 
-from reviews.models import Category, Genre, Review, Title
+from reviews.models import Category, Comment, Genre, Review, Title
 from api_yamdb.settings import AUTH_FROM_EMAIL
+from users.outbox import enqueue_email
+from users.utils import issue_auth_code, redeem_auth_code
 
+from .authentication import ClaimsAccessToken, token_user
+from .bulk import BulkMixin
+from .cache import CachedReadMixin, get_versions, modified_state
+from .export import (EXPORT_SPECS, FORMATS, IgnoreAcceptNegotiation,
+                     export_chunks)
+from .fieldsets import SparseFieldsetMixin
 from .filters import Filter
+from .pagination import (ApproximateCountPagination,
+                         CursorOrPageNumberPagination)
 from .permissions import (AdminOnlyPermission, AdminOrReadOnlyPermission,
                           AdminOrModeratorOrAuthorPermission)
+from .renderers import FastJSONRenderer
+from .rows import ValuesListMixin
 from .serializers import (CategorySerializer, CommentSerializer,
                           GenreSerializer, ReviewSerializer,
                           TitleListSerializer, TitleCreateSerializer,
                           UserSerializer, AuthCodeSerializer,
                           SendAuthCodeSerializer, ProfileSerializer)
+from .throttling import (AuthIPThrottle, AuthUsernameThrottle,
+                         ContentWriteThrottle)
 
 User = get_user_model()
 
@@ -35,7 +50,7 @@ class ListCreateDeleteViewSet(mixins.ListModelMixin,
     pass
 
 
-class CategoryViewSet(ListCreateDeleteViewSet):
+class CategoryViewSet(CachedReadMixin, BulkMixin, ListCreateDeleteViewSet):
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
     permission_classes = (
@@ -43,10 +58,11 @@ class CategoryViewSet(ListCreateDeleteViewSet):
     filter_backends = (filters.SearchFilter,)
     search_fields = ('name',)
     lookup_field = 'slug'
-    pagination_class = PageNumberPagination
+    pagination_class = ApproximateCountPagination
+    bulk_actions = ('create', 'destroy')
 
 
-class GenreViewSet(ListCreateDeleteViewSet):
+class GenreViewSet(CachedReadMixin, BulkMixin, ListCreateDeleteViewSet):
     queryset = Genre.objects.all()
     serializer_class = GenreSerializer
     permission_classes = (
@@ -54,52 +70,122 @@ class GenreViewSet(ListCreateDeleteViewSet):
     filter_backends = (filters.SearchFilter,)
     search_fields = ('name',)
     lookup_field = 'slug'
-    pagination_class = PageNumberPagination
+    pagination_class = ApproximateCountPagination
+    bulk_actions = ('create', 'destroy')
 
 
-class TitleViewSet(viewsets.ModelViewSet):
-    queryset = Title.objects.all().annotate(
-        rating=Avg('reviews__score'))
-    pagination_class = PageNumberPagination
+class TitleViewSet(CachedReadMixin, ValuesListMixin, SparseFieldsetMixin,
+                   BulkMixin, viewsets.ModelViewSet):
+    queryset = (Title.objects.select_related('category')
+                .prefetch_related('genre').defer('search_vector'))
+    pagination_class = CursorOrPageNumberPagination
+    cursor_ordering = ('year', 'id')
+    # ?search= сортирует по релевантности, курсор по году её бы потерял.
+    ordered_query_params = ('search',)
     permission_classes = (
         permissions.IsAuthenticatedOrReadOnly, AdminOrReadOnlyPermission)
     filter_backends = (DjangoFilterBackend,)
     filterset_class = Filter
 
+    def get_modification_state(self):
+        if self.action == 'retrieve':
+            return modified_state(Title.objects.filter(pk=self.kwargs['pk']))
+        # max(modified) по всем произведениям читается из индекса;
+        # удаления учитывает версия пространства имён кэша.
+        modified = Title.objects.aggregate(
+            modified=Max('modified'))['modified']
+        return get_versions(('titles',))[0], modified
+
     def get_serializer_class(self):
         if self.action in ('list', 'retrieve'):
             return TitleListSerializer
         return TitleCreateSerializer
 
 
-class ReviewViewSet(viewsets.ModelViewSet):
+class ReviewViewSet(CachedReadMixin, ValuesListMixin, SparseFieldsetMixin,
+                    viewsets.ModelViewSet):
     serializer_class = ReviewSerializer
-    pagination_class = PageNumberPagination
+    pagination_class = CursorOrPageNumberPagination
+    cursor_ordering = ('pub_date', 'id')
     permission_classes = (AdminOrModeratorOrAuthorPermission, )
+    throttle_classes = (ContentWriteThrottle,)
+
+    def get_cache_namespaces(self):
+        return (f'reviews:{self.kwargs.get("title_id")}',)
+
+    def get_modification_state(self):
+        # Любое изменение отзывов обновляет modified произведения.
+        if self.action == 'retrieve':
+            return modified_state(Review.objects.filter(
+                pk=self.kwargs['pk'], title_id=self.kwargs['title_id']))
+        return modified_state(
+            Title.objects.filter(pk=self.kwargs['title_id']))
 
     def get_queryset(self):
         title_id = get_object_or_404(Title, id=self.kwargs.get('title_id'))
-        return title_id.reviews.all()
+        return title_id.reviews.select_related('author')
 
     def perform_create(self, serializer):
         title_id = get_object_or_404(Title, id=self.kwargs.get('title_id'))
         serializer.save(author=self.request.user, title=title_id)
 
 
-class CommentViewSet(viewsets.ModelViewSet):
+class CommentViewSet(CachedReadMixin, ValuesListMixin, SparseFieldsetMixin,
+                     viewsets.ModelViewSet):
     serializer_class = CommentSerializer
-    pagination_class = PageNumberPagination
+    pagination_class = CursorOrPageNumberPagination
+    cursor_ordering = ('pub_date', 'id')
     permission_classes = (AdminOrModeratorOrAuthorPermission,)
+    throttle_classes = (ContentWriteThrottle,)
+
+    def get_cache_namespaces(self):
+        return (f'comments:{self.kwargs.get("review_id")}',)
+
+    def get_modification_state(self):
+        # Любое изменение комментариев обновляет modified отзыва.
+        if self.action == 'retrieve':
+            return modified_state(Comment.objects.filter(
+                pk=self.kwargs['pk'], review_id=self.kwargs['review_id']))
+        return modified_state(Review.objects.filter(
+            pk=self.kwargs['review_id'], title_id=self.kwargs['title_id']))
 
     def get_queryset(self):
         review_id = get_object_or_404(Review, id=self.kwargs.get('review_id'))
-        return review_id.comments.all()
+        return review_id.comments.select_related('author')
 
     def perform_create(self, serializer):
         review_id = get_object_or_404(Review, id=self.kwargs.get('review_id'))
         serializer.save(author=self.request.user, review=review_id)
 
 
+class ExportView(APIView):
+    """Потоковая выгрузка таблицы целиком в csv или NDJSON.
+
+    Только для администраторов. Строки читаются серверным курсором
+    и отдаются пакетами, колонки и имя файла - как у команды import.
+    """
+    permission_classes = (AdminOnlyPermission,)
+    renderer_classes = (FastJSONRenderer,)
+    content_negotiation_class = IgnoreAcceptNegotiation
+
+    def get(self, request, dataset, file_format):
+        spec = EXPORT_SPECS.get(dataset)
+        if spec is None:
+            raise NotFound(f'Нет выгрузки {dataset}')
+        # База выбирается сейчас: курсор откроется при отдаче ответа,
+        # уже после middleware выбора реплики.
+        using = router.db_for_read(spec.model)
+        response = StreamingHttpResponse(
+            export_chunks(spec, file_format, using),
+            content_type=FORMATS[file_format])
+        filename = spec.filename.replace('.csv', f'.{file_format}')
+        response['Content-Disposition'] = (
+            f'attachment; filename="{filename}"')
+        # nginx отдаёт пакеты сразу, не собирая ответ во временный файл.
+        response['X-Accel-Buffering'] = 'no'
+        return response
+
+
 class UserViewSet(viewsets.ModelViewSet):
     serializer_class = UserSerializer
     queryset = User.objects.all()
@@ -109,53 +195,56 @@ class UserViewSet(viewsets.ModelViewSet):
 
 @api_view(['POST'])
 @permission_classes([permissions.AllowAny])
+@throttle_classes([AuthIPThrottle, AuthUsernameThrottle])
 def send_auth_code(request):
     serializer = SendAuthCodeSerializer(data=request.data)
     serializer.is_valid(raise_exception=True)
     username = request.data['username']
     email = request.data['email']
-    username_exists = User.objects.filter(username=username).exists()
-    email_exists = User.objects.filter(email=email).exists()
-    if not username_exists and not email_exists:
-        User.objects.create_user(email=email, username=username)
-    if not username_exists and email_exists:
+    # Один запрос находит и пользователя, и занятые username или email.
+    users = list(
+        User.objects.filter(Q(username=username) | Q(email=email))[:2])
+    user = next((user for user in users
+                 if user.username == username and user.email == email), None)
+    if user is None and not users:
+        try:
+            with transaction.atomic():
+                user = User.objects.create_user(
+                    email=email, username=username)
+        except IntegrityError:
+            # Тот же username успел зарегистрировать параллельный запрос.
+            users = [User(username=username)]
+    if user is None:
+        if any(user.username == username for user in users):
+            message = 'Вы не можете создать пользователя с этим username'
+        else:
+            message = 'Вы не можете создать пользователя с этим email'
         return Response(
-            {'message': 'Вы не можете создать пользователя с этим email'},
-            status=status.HTTP_400_BAD_REQUEST)
-    if username_exists and not email_exists:
-        return Response(
-            {'message': 'Вы не можете создать пользователя с этим username'},
-            status=status.HTTP_400_BAD_REQUEST)
-    user = User.objects.get(username=username)
-    generator = PasswordResetTokenGenerator()
-    auth_code = generator.make_token(user)
-    User.objects.filter(username=username).update(
-        auth_code=auth_code
-    )
+            {'message': message}, status=status.HTTP_400_BAD_REQUEST)
+    auth_code = issue_auth_code(user)
     email_subject = 'Ваш код подтверждения'
-    email_message = (f'Используйте код подтверждения {auth_code},'
+    email_message = (f'Используйте код подтверждения {auth_code}, '
                      'чтобы авторизоваться')
-    send_mail(subject=email_subject, message=email_message,
-              recipient_list=[user.email], from_email=AUTH_FROM_EMAIL)
+    enqueue_email(email_subject, email_message, user.email, AUTH_FROM_EMAIL)
     return Response(
         {
             'email': f'{email}',
             'username': f'{username}'
         },
         status=status.HTTP_200_OK)
-    return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
 @api_view(['POST'])
 @permission_classes([permissions.AllowAny])
+@throttle_classes([AuthIPThrottle, AuthUsernameThrottle])
 def get_token(request):
     serializer = AuthCodeSerializer(data=request.data)
     serializer.is_valid(raise_exception=True)
     username = request.data['username']
-    user = get_object_or_404(User, username=username)
-    generator = PasswordResetTokenGenerator()
-    if generator.check_token(user, request.data['confirmation_code']):
-        access_token = AccessToken.for_user(user)
+    entry = redeem_auth_code(username, request.data['confirmation_code'])
+    if entry is not None:
+        access_token = ClaimsAccessToken.for_user(
+            token_user(entry['id'], entry))
         return Response(
             {
                 'error': None,
@@ -163,6 +252,7 @@ def get_token(request):
             },
             status=status.HTTP_200_OK
         )
+    get_object_or_404(User, username=username)
     return Response(
         {
             'error': 'Неверный код подтверждения',
@@ -177,10 +267,12 @@ def get_token(request):
 def profile(request):
     if not request.user.is_authenticated:
         return Response('Not authorized', status=status.HTTP_401_UNAUTHORIZED)
+    # request.user собран из токена без профиля, профиль читается из базы.
+    user = get_object_or_404(User, pk=request.user.pk)
     if request.method == 'GET':
-        serializer = ProfileSerializer(request.user)
+        serializer = ProfileSerializer(user)
         return Response(serializer.data, status=status.HTTP_200_OK)
-    serializer = ProfileSerializer(request.user, data=request.data)
+    serializer = ProfileSerializer(user, data=request.data)
     serializer.is_valid(raise_exception=True)
     serializer.save()
     return Response(serializer.data, status=status.HTTP_200_OK)
@@ -0,0 +1,91 @@
+"""PostgreSQL с пулом соединений процесса и проверкой живости соединений.
+
+Подключается через ENGINE = 'api_yamdb.db.backends.postgresql'.
+Настройки в DATABASES['default']:
+
+    'POOL': {'MAX_SIZE': 10, 'TIMEOUT': 30, 'HEALTH_CHECK_INTERVAL': 30}
+        без POOL соединения открываются и закрываются как обычно;
+    'HEALTH_CHECK_INTERVAL': 30
+        постоянное соединение (CONN_MAX_AGE > 0), не проверявшееся столько
+        секунд, в начале и конце запроса проверяется SELECT 1 и при обрыве
+        закрывается, чтобы запрос не получил мёртвое соединение.
+"""
+import time
+
+from django.db.backends.postgresql import base
+from psycopg2 import extensions
+
+from api_yamdb.db.pool import get_pool
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.checked_at = None
+
+    @property
+    def pool(self):
+        options = self.settings_dict.get('POOL')
+        return get_pool(self.alias, options) if options else None
+
+    def get_new_connection(self, conn_params):
+        pool = self.pool
+        self.checked_at = time.monotonic()
+        if pool is None:
+            return super().get_new_connection(conn_params)
+        # Уровень изоляции выставляет родительский метод, поэтому
+        # переиспользованное соединение проходит через него же.
+        connection = pool.acquire(
+            lambda: super(DatabaseWrapper, self).get_new_connection(
+                conn_params),
+            is_usable)
+        options = self.settings_dict['OPTIONS']
+        self.isolation_level = options.get(
+            'isolation_level', connection.isolation_level)
+        return connection
+
+    def _close(self):
+        pool = self.pool
+        if pool is None or self.connection is None:
+            return super()._close()
+        # Внутри atomic Django закрывает соединение, но держит ссылку на
+        # него до отката: такое соединение в пул не возвращается.
+        reusable = not self.in_atomic_block and reset(self.connection)
+        with self.wrap_database_errors:
+            pool.release(self.connection, reusable)
+
+    def close_if_unusable_or_obsolete(self):
+        super().close_if_unusable_or_obsolete()
+        interval = self.settings_dict.get('HEALTH_CHECK_INTERVAL')
+        if (self.connection is None or interval is None
+                or self.in_atomic_block
+                or time.monotonic() - self.checked_at < interval):
+            return
+        self.checked_at = time.monotonic()
+        if not self.is_usable():
+            self.close()
+
+
+def is_usable(connection):
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT 1')
+    except Exception:
+        return False
+    return True
+
+
+def reset(connection):
+    """Готовит соединение к возврату в пул; False - соединение сломано."""
+    if connection.closed:
+        return False
+    status = connection.get_transaction_status()
+    if status == extensions.TRANSACTION_STATUS_UNKNOWN:
+        return False
+    if status != extensions.TRANSACTION_STATUS_IDLE:
+        try:
+            connection.rollback()
+        except Exception:
+            return False
+    return True
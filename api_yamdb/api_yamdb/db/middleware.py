@@ -0,0 +1,60 @@
+import asyncio
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.decorators import sync_and_async_middleware
+from rest_framework.throttling import BaseThrottle
+
+from .routers import routing
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+
+def pin_key(request):
+    """Клиент - по токену из Authorization, без него - по IP.
+
+    IP берётся как у лимитов DRF: за nginx REMOTE_ADDR у всех
+    клиентов один, адрес клиента - в X-Forwarded-For (NUM_PROXIES).
+    """
+    ident = (request.META.get('HTTP_AUTHORIZATION')
+             or BaseThrottle().get_ident(request))
+    return 'db:pinned:' + hashlib.md5(ident.encode()).hexdigest()
+
+
+def reads_from_replica(request):
+    return request.method in SAFE_METHODS and not cache.get(pin_key(request))
+
+
+def pin_if_wrote(request, state):
+    if state.wrote:
+        cache.set(pin_key(request), True,
+                  settings.DATABASE_REPLICA_PIN_SECONDS)
+
+
+@sync_and_async_middleware
+def replica_routing_middleware(get_response):
+    """Направляет чтения безопасных запросов на реплики.
+
+    После запроса с записью клиент на DATABASE_REPLICA_PIN_SECONDS
+    закрепляется за основной базой и читает свои изменения, даже если
+    реплика отстаёт. Работает и под WSGI, и под ASGI без переключения
+    асинхронных вьюх в синхронный режим.
+    """
+    if asyncio.iscoroutinefunction(get_response):
+        async def middleware(request):
+            if not settings.DATABASE_REPLICAS:
+                return await get_response(request)
+            with routing(reads_from_replica(request)) as state:
+                response = await get_response(request)
+            pin_if_wrote(request, state)
+            return response
+    else:
+        def middleware(request):
+            if not settings.DATABASE_REPLICAS:
+                return get_response(request)
+            with routing(reads_from_replica(request)) as state:
+                response = get_response(request)
+            pin_if_wrote(request, state)
+            return response
+    return middleware
@@ -0,0 +1,162 @@
+import logging
+import threading
+import time
+from bisect import bisect_left
+
+from prometheus_client import Counter, Gauge, Histogram
+
+logger = logging.getLogger(__name__)
+
+# Границы корзин гистограммы ожидания соединения, секунд.
+WAIT_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5)
+
+# Метрики пулов для /metrics; с PROMETHEUS_MULTIPROC_DIR размеры пулов
+# воркеров суммируются.
+POOL_IN_USE = Gauge(
+    'yamdb_db_pool_connections_in_use', 'Выданные соединения пула.',
+    ('alias',), multiprocess_mode='livesum')
+POOL_IDLE = Gauge(
+    'yamdb_db_pool_connections_idle', 'Свободные соединения пула.',
+    ('alias',), multiprocess_mode='livesum')
+POOL_WAIT_SECONDS = Histogram(
+    'yamdb_db_pool_wait_seconds', 'Ожидание соединения из пула.',
+    ('alias',), buckets=WAIT_BUCKETS)
+POOL_EVENTS = Counter(
+    'yamdb_db_pool_events',
+    'Созданные и закрытые соединения пула, тайм-ауты ожидания.',
+    ('alias', 'event'))
+
+
+class PoolTimeout(Exception):
+    """Свободное соединение не появилось за время ожидания пула."""
+
+
+class PoolStats:
+    """Счётчики пула: выдачи, созданные соединения и время ожидания.
+
+    Те же значения пишутся в метрики Prometheus с меткой alias.
+    """
+
+    def __init__(self, alias='default'):
+        self.alias = alias
+        self.lock = threading.Lock()
+        self.acquired = 0
+        self.created = 0
+        self.discarded = 0
+        self.timeouts = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+        # Число ожиданий не дольше соответствующей границы WAIT_BUCKETS,
+        # последний элемент - ожидания дольше всех границ.
+        self.wait_buckets = [0] * (len(WAIT_BUCKETS) + 1)
+
+    def record_wait(self, seconds):
+        with self.lock:
+            self.acquired += 1
+            self.wait_seconds_total += seconds
+            self.wait_seconds_max = max(self.wait_seconds_max, seconds)
+            self.wait_buckets[bisect_left(WAIT_BUCKETS, seconds)] += 1
+        POOL_WAIT_SECONDS.labels(self.alias).observe(seconds)
+
+    def increment(self, name):
+        with self.lock:
+            setattr(self, name, getattr(self, name) + 1)
+        POOL_EVENTS.labels(self.alias, name).inc()
+
+    def report_sizes(self, in_use, idle):
+        POOL_IN_USE.labels(self.alias).set(in_use)
+        POOL_IDLE.labels(self.alias).set(idle)
+
+
+class ConnectionPool:
+    """Ограниченный пул соединений процесса.
+
+    Не больше max_size соединений выдано одновременно; поток, которому
+    не хватило соединения, ждёт до timeout секунд. Вернувшиеся
+    соединения переиспользуются в порядке LIFO, бездействовавшие дольше
+    health_check_interval секунд перед выдачей проверяются is_usable().
+    """
+
+    def __init__(self, max_size, timeout, health_check_interval=None,
+                 alias='default'):
+        self.max_size = max_size
+        self.timeout = timeout
+        self.health_check_interval = health_check_interval
+        self.slots = threading.BoundedSemaphore(max_size)
+        self.lock = threading.Lock()
+        self.idle = []
+        self.in_use = 0
+        self.stats = PoolStats(alias)
+
+    def acquire(self, connect, is_usable):
+        started = time.monotonic()
+        if not self.slots.acquire(timeout=self.timeout):
+            self.stats.increment('timeouts')
+            raise PoolTimeout(
+                f'Нет свободного соединения за {self.timeout} с '
+                f'(в пуле {self.max_size})')
+        self.stats.record_wait(time.monotonic() - started)
+        try:
+            connection = self.take_idle(is_usable) or self.create(connect)
+        except BaseException:
+            self.slots.release()
+            raise
+        with self.lock:
+            self.in_use += 1
+            self.stats.report_sizes(self.in_use, len(self.idle))
+        return connection
+
+    def take_idle(self, is_usable):
+        while True:
+            with self.lock:
+                if not self.idle:
+                    return None
+                connection, released_at = self.idle.pop()
+            if (self.health_check_interval is None
+                    or time.monotonic() - released_at
+                    < self.health_check_interval
+                    or is_usable(connection)):
+                return connection
+            self.discard(connection)
+
+    def create(self, connect):
+        connection = connect()
+        self.stats.increment('created')
+        return connection
+
+    def release(self, connection, reusable=True):
+        """Возвращает выданное соединение; reusable=False закрывает его."""
+        try:
+            if reusable:
+                with self.lock:
+                    self.idle.append((connection, time.monotonic()))
+            else:
+                self.discard(connection)
+        finally:
+            with self.lock:
+                self.in_use -= 1
+                self.stats.report_sizes(self.in_use, len(self.idle))
+            self.slots.release()
+
+    def discard(self, connection):
+        self.stats.increment('discarded')
+        try:
+            connection.close()
+        except Exception:
+            logger.warning('Не удалось закрыть соединение', exc_info=True)
+
+
+pools = {}
+pools_lock = threading.Lock()
+
+
+def get_pool(alias, options):
+    """Пул соединений процесса для базы alias (создаётся при первом вызове)."""
+    with pools_lock:
+        if alias not in pools:
+            pools[alias] = ConnectionPool(
+                max_size=options.get('MAX_SIZE', 10),
+                timeout=options.get('TIMEOUT', 30),
+                health_check_interval=options.get('HEALTH_CHECK_INTERVAL'),
+                alias=alias)
+        return pools[alias]
@@ -0,0 +1,73 @@
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+class RoutingState:
+    """Куда направлять чтения в рамках одного HTTP-запроса."""
+
+    def __init__(self, use_replica):
+        self.use_replica = use_replica
+        self.wrote = False
+
+
+# Вне HTTP-запроса (команды, shell, фоновые задачи) состояния нет,
+# и все запросы идут в основную базу.
+routing_state = ContextVar('routing_state', default=None)
+
+
+@contextmanager
+def routing(use_replica):
+    token = routing_state.set(RoutingState(use_replica))
+    try:
+        yield routing_state.get()
+    finally:
+        routing_state.reset(token)
+
+
+@contextmanager
+def use_primary():
+    """Читать из основной базы внутри блока."""
+    state = routing_state.get()
+    if state is None or not state.use_replica:
+        yield
+        return
+    state.use_replica = False
+    try:
+        yield
+    finally:
+        state.use_replica = not state.wrote
+
+
+class ReplicaRouter:
+    """Чтения в безопасных HTTP-запросах - с реплик DATABASE_REPLICAS.
+
+    Запись, чтения внутри транзакции и все чтения после записи в том же
+    запросе идут в основную базу; закрепление клиента за основной базой
+    после записи - в replica_routing_middleware.
+    """
+
+    def db_for_read(self, model, **hints):
+        state = routing_state.get()
+        if (state is None or not state.use_replica
+                or not settings.DATABASE_REPLICAS
+                or connections[DEFAULT_DB_ALIAS].in_atomic_block):
+            return DEFAULT_DB_ALIAS
+        return random.choice(settings.DATABASE_REPLICAS)
+
+    def db_for_write(self, model, **hints):
+        state = routing_state.get()
+        if state is not None:
+            state.wrote = True
+            state.use_replica = False
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # На репликах те же данные, что и в основной базе.
+        return True
+
+    def allow_migrate(self, db, app_label, **hints):
+        return db not in settings.DATABASE_REPLICAS
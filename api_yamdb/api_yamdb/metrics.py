@@ -0,0 +1,161 @@
+import asyncio
+import json
+import logging
+import os
+import time
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+from django.http import HttpResponse
+from django.utils.decorators import sync_and_async_middleware
+from prometheus_client import (CONTENT_TYPE_LATEST, REGISTRY,
+                               CollectorRegistry, Counter, Histogram,
+                               generate_latest, multiprocess)
+
+logger = logging.getLogger(__name__)
+
+LABELS = ('route', 'method')
+
+REQUEST_SECONDS = Histogram(
+    'yamdb_request_duration_seconds', 'Время обработки запроса.', LABELS,
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10))
+REQUEST_QUERIES = Histogram(
+    'yamdb_request_queries', 'SQL-запросов за запрос.', LABELS,
+    buckets=(0, 1, 2, 3, 4, 5, 7, 10, 15, 20, 30, 50, 100))
+REQUEST_DB_SECONDS = Histogram(
+    'yamdb_request_db_seconds', 'Время SQL-запросов за запрос.', LABELS,
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 5))
+RESPONSE_BYTES = Histogram(
+    'yamdb_response_size_bytes', 'Размер тела ответа.', LABELS,
+    buckets=(256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304))
+RESPONSES = Counter(
+    'yamdb_responses', 'Ответы по статусам.', LABELS + ('status',))
+OVER_BUDGET = Counter(
+    'yamdb_requests_over_budget', 'Запросы сверх бюджета.',
+    LABELS + ('budget',))
+
+
+class RequestStats:
+    """SQL-запросы одного HTTP-запроса: число и суммарное время."""
+
+    def __init__(self):
+        self.queries = 0
+        self.db_seconds = 0.0
+
+
+# Вне HTTP-запроса статистика не собирается. Переменная контекста
+# доходит и до потоков, в которых выполняются асинхронные вьюхи.
+current_stats = ContextVar('current_stats', default=None)
+
+
+def record_query(execute, sql, params, many, context):
+    stats = current_stats.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats.queries += 1
+        stats.db_seconds += time.perf_counter() - started
+
+
+def instrument(connection):
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+@receiver(connection_created)
+def instrument_new_connection(sender, connection, **kwargs):
+    instrument(connection)
+
+
+def get_budgets(route):
+    budgets = settings.REQUEST_BUDGETS.get(route, {})
+    return (budgets.get('queries', settings.REQUEST_QUERY_BUDGET),
+            budgets.get('seconds', settings.REQUEST_SECONDS_BUDGET))
+
+
+def observe(request, response, stats, seconds):
+    match = request.resolver_match
+    route = match.url_name if match and match.url_name else 'unmatched'
+    labels = (route, request.method)
+    REQUEST_SECONDS.labels(*labels).observe(seconds)
+    REQUEST_QUERIES.labels(*labels).observe(stats.queries)
+    REQUEST_DB_SECONDS.labels(*labels).observe(stats.db_seconds)
+    if not response.streaming:
+        RESPONSE_BYTES.labels(*labels).observe(len(response.content))
+    RESPONSES.labels(*labels, response.status_code).inc()
+    query_budget, seconds_budget = get_budgets(route)
+    exceeded = [
+        name for name, value, budget in (
+            ('queries', stats.queries, query_budget),
+            ('seconds', seconds, seconds_budget))
+        if budget is not None and value > budget]
+    for name in exceeded:
+        OVER_BUDGET.labels(*labels, name).inc()
+    if exceeded:
+        logger.warning('request over budget %s', json.dumps({
+            'route': route,
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            'exceeded': exceeded,
+            'queries': stats.queries,
+            'query_budget': query_budget,
+            'seconds': round(seconds, 4),
+            'seconds_budget': seconds_budget,
+            'db_seconds': round(stats.db_seconds, 4),
+        }))
+
+
+@sync_and_async_middleware
+def metrics_middleware(get_response):
+    """Время, SQL-запросы и размер ответа по маршрутам DRF.
+
+    Маршрут - имя URL (titles-list, reviews-detail); запросы сверх
+    REQUEST_QUERY_BUDGET или REQUEST_SECONDS_BUDGET (и бюджетов
+    маршрута из REQUEST_BUDGETS) логируются предупреждением в JSON.
+    """
+    if asyncio.iscoroutinefunction(get_response):
+        async def middleware(request):
+            for connection in connections.all():
+                instrument(connection)
+            stats, started = RequestStats(), time.perf_counter()
+            token = current_stats.set(stats)
+            try:
+                response = await get_response(request)
+            finally:
+                current_stats.reset(token)
+            observe(request, response, stats, time.perf_counter() - started)
+            return response
+    else:
+        def middleware(request):
+            for connection in connections.all():
+                instrument(connection)
+            stats, started = RequestStats(), time.perf_counter()
+            token = current_stats.set(stats)
+            try:
+                response = get_response(request)
+            finally:
+                current_stats.reset(token)
+            observe(request, response, stats, time.perf_counter() - started)
+            return response
+    return middleware
+
+
+def metrics_view(request):
+    """Метрики в текстовом формате Prometheus.
+
+    С PROMETHEUS_MULTIPROC_DIR (несколько воркеров gunicorn) отдаются
+    метрики всех воркеров, иначе - текущего процесса.
+    """
+    registry = REGISTRY
+    if os.getenv('PROMETHEUS_MULTIPROC_DIR'):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    return HttpResponse(
+        generate_latest(registry), content_type=CONTENT_TYPE_LATEST)
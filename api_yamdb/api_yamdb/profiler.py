@@ -0,0 +1,160 @@
+import asyncio
+import cProfile
+import io
+import os
+import pstats
+import time
+import uuid
+from contextlib import ExitStack
+from types import SimpleNamespace
+
+from asgiref.sync import async_to_sync, sync_to_async
+from django.conf import settings
+from django.db import DatabaseError, connections
+from django.utils.decorators import sync_and_async_middleware
+from rest_framework.exceptions import APIException
+
+from api.authentication import ClaimsJWTAuthentication
+from api.permissions import AdminOnlyPermission
+
+PROFILE_HEADER = 'HTTP_X_PROFILE'
+
+
+def profiling_requested(request):
+    return (settings.PROFILER_ENABLED
+            and request.META.get(PROFILE_HEADER) == '1')
+
+
+def profiling_allowed(request):
+    """Access-токен запроса принадлежит администратору или суперпользователю.
+
+    Проверяется так же, как во вьюхах, - ClaimsJWTAuthentication
+    и AdminOnlyPermission.
+    """
+    try:
+        authenticated = ClaimsJWTAuthentication().authenticate(request)
+    except APIException:
+        return False
+    return authenticated is not None and AdminOnlyPermission(
+    ).has_permission(SimpleNamespace(user=authenticated[0]), None)
+
+
+class RequestProfile:
+    """cProfile и SQL-запросы одного запроса."""
+
+    def __init__(self):
+        self.profile = cProfile.Profile()
+        self.queries = []
+
+    def record_query(self, alias):
+        def wrapper(execute, sql, params, many, context):
+            started = time.perf_counter()
+            try:
+                return execute(sql, params, many, context)
+            finally:
+                self.queries.append((
+                    alias, sql, params, many,
+                    time.perf_counter() - started))
+        return wrapper
+
+    def run(self, call, request):
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(
+                    self.record_query(connection.alias)))
+            self.profile.enable()
+            try:
+                return call(request)
+            finally:
+                self.profile.disable()
+
+    def explain(self, alias, sql, params):
+        connection = connections[alias]
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f'{connection.ops.explain_query_prefix()} {sql}', params)
+                rows = cursor.fetchall()
+        except DatabaseError as error:
+            return f'EXPLAIN не выполнен: {error}'
+        return '\n'.join(' '.join(str(value) for value in row)
+                         for row in rows)
+
+    def sql_report(self):
+        lines, explained = [], set()
+        total = sum(query[-1] for query in self.queries)
+        lines.append(f'{len(self.queries)} запросов, {total * 1000:.1f} мс')
+        for number, (alias, sql, params, many, seconds) in enumerate(
+                self.queries, start=1):
+            lines.append('')
+            lines.append(f'#{number} [{alias}] {seconds * 1000:.2f} мс')
+            lines.append(sql)
+            lines.append(f'params: {params!r}')
+            key = (alias, sql, repr(params))
+            if (many or key in explained
+                    or not sql.lstrip().upper().startswith('SELECT')):
+                continue
+            explained.add(key)
+            lines.append(self.explain(alias, sql, params))
+        return '\n'.join(lines) + '\n'
+
+    def profile_report(self):
+        stream = io.StringIO()
+        stats = pstats.Stats(self.profile, stream=stream)
+        stats.sort_stats('cumulative').print_stats(
+            settings.PROFILER_TOP_FUNCTIONS)
+        stats.print_callees(settings.PROFILER_TOP_FUNCTIONS)
+        return stream.getvalue()
+
+    def save(self, request):
+        """Пишет в PROFILER_DIR <имя>.prof (для pstats и snakeviz),
+        <имя>.txt с деревом вызовов и <имя>.sql.txt с SQL и EXPLAIN."""
+        match = request.resolver_match
+        route = match.url_name if match and match.url_name else 'unmatched'
+        name = '{}-{}-{}'.format(
+            time.strftime('%Y%m%d-%H%M%S'), route, uuid.uuid4().hex[:8])
+        os.makedirs(settings.PROFILER_DIR, exist_ok=True)
+        path = os.path.join(settings.PROFILER_DIR, name)
+        self.profile.dump_stats(path + '.prof')
+        with open(path + '.txt', 'w', encoding='utf-8') as f:
+            f.write(f'{request.method} {request.get_full_path()}\n\n')
+            f.write(self.profile_report())
+        with open(path + '.sql.txt', 'w', encoding='utf-8') as f:
+            f.write(self.sql_report())
+        return name
+
+
+def profile_request(get_response, request):
+    if not profiling_allowed(request):
+        return get_response(request)
+    request.profiling = True
+    profile = RequestProfile()
+    response = profile.run(get_response, request)
+    if hasattr(response, 'render'):
+        response.render()
+    response['X-Profile-Report'] = profile.save(request)
+    return response
+
+
+@sync_and_async_middleware
+def profiler_middleware(get_response):
+    """Профилирует запросы администраторов с заголовком X-Profile: 1.
+
+    Под ASGI профилируемый запрос целиком выполняется в одном потоке:
+    асинхронные вьюхи чтения видят request.profiling и не уходят в свой
+    пул. Профилируемые запросы не читают кэш ответов.
+    """
+    if asyncio.iscoroutinefunction(get_response):
+        def profile_async(request):
+            return profile_request(async_to_sync(get_response), request)
+
+        async def middleware(request):
+            if not profiling_requested(request):
+                return await get_response(request)
+            return await sync_to_async(profile_async)(request)
+    else:
+        def middleware(request):
+            if not profiling_requested(request):
+                return get_response(request)
+            return profile_request(get_response, request)
+    return middleware
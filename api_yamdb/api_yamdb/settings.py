@@ -23,12 +23,15 @@ INSTALLED_APPS = [
     'rest_framework',
     'django_filters',
     'users',
-    'reviews',
-    'api',
+    'reviews.apps.ReviewsConfig',
+    'api.apps.ApiConfig',
 ]
 
 MIDDLEWARE = [
+    'api_yamdb.profiler.profiler_middleware',
+    'api_yamdb.metrics.metrics_middleware',
     'django.middleware.security.SecurityMiddleware',
+    'api_yamdb.db.middleware.replica_routing_middleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -58,6 +61,14 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'api_yamdb.wsgi.application'
 
+# Как запущено приложение: wsgi - синхронные воркеры gunicorn, asgi -
+# воркеры uvicorn (gunicorn.conf.py). В режиме asgi горячие эндпоинты
+# чтения асинхронные (api/asynchronous.py).
+SERVER_MODE = os.getenv('SERVER_MODE', default='wsgi')
+# Сколько чтений воркер ASGI выполняет одновременно; у каждого потока
+# своё соединение, поэтому не больше DB_POOL_MAX_SIZE.
+ASYNC_READ_THREADS = int(os.getenv('ASYNC_READ_THREADS', default=10))
+
 DATABASES = {
     'default': {
         'ENGINE': os.getenv('DB_ENGINE', default='django.db.backends.postgresql'),
@@ -66,9 +77,46 @@ DATABASES = {
         'PASSWORD': os.getenv('POSTGRES_PASSWORD', default='postgres'),
         'HOST': os.getenv('DB_HOST', default='db'),
         'PORT': os.getenv('DB_PORT', default='5432'),
+        # Сколько секунд соединение живёт между запросами (0 - закрывается
+        # после каждого запроса, с пулом - возвращается в пул).
+        'CONN_MAX_AGE': int(os.getenv('DB_CONN_MAX_AGE', default=60)),
+        # Параметры ниже действуют с ENGINE api_yamdb.db.backends.postgresql.
+        'HEALTH_CHECK_INTERVAL': int(
+            os.getenv('DB_HEALTH_CHECK_INTERVAL', default=30)),
+        'POOL': {
+            'MAX_SIZE': int(os.getenv('DB_POOL_MAX_SIZE', default=10)),
+            'TIMEOUT': int(os.getenv('DB_POOL_TIMEOUT', default=30)),
+            'HEALTH_CHECK_INTERVAL': int(
+                os.getenv('DB_HEALTH_CHECK_INTERVAL', default=30)),
+        } if os.getenv('DB_POOL', default='on') == 'on' else None,
     }
 }
 
+# Реплики для чтения: DB_REPLICA_HOSTS=host1,host2:5433 (для SQLite -
+# пути к файлам). Остальные параметры берутся из основной базы.
+DATABASE_REPLICAS = []
+for number, replica in enumerate(
+        filter(None, os.getenv('DB_REPLICA_HOSTS', default='').split(',')),
+        start=1):
+    alias = f'replica{number}'
+    DATABASES[alias] = dict(DATABASES['default'], TEST={'MIRROR': 'default'})
+    if DATABASES[alias]['ENGINE'].endswith('sqlite3'):
+        DATABASES[alias]['NAME'] = replica
+    else:
+        host, _, port = replica.strip().partition(':')
+        DATABASES[alias].update(
+            HOST=host, PORT=port or DATABASES['default']['PORT'])
+    DATABASE_REPLICAS.append(alias)
+
+DATABASE_ROUTERS = ['api_yamdb.db.routers.ReplicaRouter']
+
+# Сколько секунд после записи клиент читает из основной базы,
+# чтобы видеть свои изменения при отставании реплик.
+DATABASE_REPLICA_PIN_SECONDS = int(
+    os.getenv('DB_REPLICA_PIN_SECONDS', default=5))
+
+DEFAULT_AUTO_FIELD = 'django.db.models.AutoField'
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -103,22 +151,98 @@ MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 AUTH_USER_MODEL = 'users.User'
 
 AUTH_CODE_LENGTH = 5
+# Сколько секунд действителен код подтверждения.
+AUTH_CODE_TIMEOUT = int(os.getenv('AUTH_CODE_TIMEOUT', default=900))
 AUTH_FROM_EMAIL = 'info@yamdb.com'
 
 EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
 EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
 
 REST_FRAMEWORK = {
-    'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
+    'DEFAULT_PAGINATION_CLASS': 'api.pagination.ApproximateCountPagination',
     'PAGE_SIZE': 100,
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'api.authentication.ClaimsJWTAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticatedOrReadOnly',
-    ]
+    ],
+    'DEFAULT_RENDERER_CLASSES': [
+        'api.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    # Лимиты хранятся в кэше (CACHES) и общие для всех воркеров.
+    'DEFAULT_THROTTLE_RATES': {
+        'auth_ip': os.getenv('AUTH_IP_THROTTLE_RATE', default='20/min'),
+        'auth_username': os.getenv(
+            'AUTH_USERNAME_THROTTLE_RATE', default='5/min'),
+        'content_write': os.getenv(
+            'CONTENT_WRITE_THROTTLE_RATE', default='30/min'),
+    },
+    # Сколько прокси (nginx) стоит перед приложением: адрес клиента
+    # для лимитов по IP берётся из X-Forwarded-For.
+    'NUM_PROXIES': int(os.getenv('NUM_PROXIES', default=0)) or None,
+}
+
+# Списки произведений, отзывов и комментариев собираются из values()
+# без экземпляров моделей и сериализаторов (api/rows.py).
+API_VALUES_LISTS = os.getenv('API_VALUES_LISTS', default='on') == 'on'
+
+# Наибольшее число объектов в запросе к <ресурс>/bulk/ каталога.
+API_BULK_MAX_ITEMS = int(os.getenv('API_BULK_MAX_ITEMS', default=1000))
+
+# Строк в пакете потоковой выгрузки /api/v1/export/: столько читается
+# с серверного курсора и отдаётся клиенту за раз.
+EXPORT_CHUNK_SIZE = int(os.getenv('EXPORT_CHUNK_SIZE', default=2000))
+
+# Выше этого числа строк (по оценке планировщика PostgreSQL) count
+# в ответах со страницами приблизительный, ниже - точный COUNT(*).
+PAGINATION_EXACT_COUNT_THRESHOLD = int(
+    os.getenv('PAGINATION_EXACT_COUNT_THRESHOLD', default=10000))
+
+# Локальный кэш процесса подходит для разработки и тестов; в docker-compose
+# ответы хранятся в общем memcached (CACHE_BACKEND и CACHE_LOCATION в .env).
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv(
+            'CACHE_BACKEND',
+            default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.getenv('CACHE_LOCATION', default=''),
+    }
 }
 
+# Сколько секунд хранятся закэшированные ответы API на чтение.
+API_CACHE_TIMEOUT = int(os.getenv('API_CACHE_TIMEOUT', default=300))
+
+# Сколько секунд кэшируются роль и статус пользователя для проверки
+# access-токенов; столько же может жить токен после изменения прав,
+# если сигнал об изменении не сработал (например, при queryset.update).
+AUTH_STATE_CACHE_TIMEOUT = int(
+    os.getenv('AUTH_STATE_CACHE_TIMEOUT', default=60))
+
+
+def env_budget(name, default, convert):
+    """Бюджет из переменной окружения; пустое значение или off - None."""
+    value = os.getenv(name, default=str(default)).strip()
+    return None if value in ('', 'off') else convert(value)
+
+
+# Бюджеты запроса: при превышении в лог пишется предупреждение
+# (api_yamdb.metrics). Значение off (или пустое) в переменной окружения,
+# как и None в REQUEST_BUDGETS, отключает проверку. REQUEST_BUDGETS
+# задаёт бюджеты отдельных маршрутов: {'titles-list': {'queries': 4}}.
+REQUEST_QUERY_BUDGET = env_budget('REQUEST_QUERY_BUDGET', 20, int)
+REQUEST_SECONDS_BUDGET = env_budget('REQUEST_SECONDS_BUDGET', 1, float)
+REQUEST_BUDGETS = {}
+
+# Профилирование запросов администраторов с заголовком X-Profile: 1:
+# отчёты cProfile и SQL с EXPLAIN пишутся в PROFILER_DIR.
+PROFILER_ENABLED = os.getenv('PROFILER', default='on') == 'on'
+PROFILER_DIR = os.getenv(
+    'PROFILER_DIR', default=os.path.join(BASE_DIR, 'profiles'))
+PROFILER_TOP_FUNCTIONS = int(
+    os.getenv('PROFILER_TOP_FUNCTIONS', default=40))
+
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(hours=24)
 }
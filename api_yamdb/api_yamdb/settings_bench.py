@@ -0,0 +1,18 @@
+import os
+
+from .settings import *  # noqa: F401, F403
+from .settings import REST_FRAMEWORK
+
+# Нагрузочный тест (benchmarks/bench_api.py): кэш общий для сервера
+# и теста и не вытесняет коды подтверждения, лимиты частоты отключены.
+if not os.getenv('CACHE_BACKEND'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': os.getenv('BENCH_CACHE_LOCATION', '/tmp/yamdb-bench'),
+            'OPTIONS': {'MAX_ENTRIES': 1000000},
+        }
+    }
+
+REST_FRAMEWORK = dict(REST_FRAMEWORK, DEFAULT_THROTTLE_RATES={
+    scope: None for scope in REST_FRAMEWORK['DEFAULT_THROTTLE_RATES']})
@@ -0,0 +1,21 @@
+import os
+
+from .settings import *  # noqa: F401, F403
+
+# Тесты по умолчанию идут на SQLite в памяти,
+# TEST_DATABASE=settings запускает их на базе из основных настроек.
+if os.getenv('TEST_DATABASE', 'sqlite') == 'sqlite':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': ':memory:',
+        }
+    }
+    # Реплика - зеркало тестовой базы; тесты включают её через
+    # DATABASE_REPLICAS.
+    DATABASES['replica'] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': ':memory:',
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_REPLICAS = []
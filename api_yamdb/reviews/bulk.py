@@ -0,0 +1,154 @@
+import io
+from functools import partial
+from itertools import islice
+
+from django.core.management.color import no_style
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.utils import timezone
+
+
+# Значения полей этих типов, уже приведённые к python-типам, передаются
+# в базу как есть: get_db_prep_save для них ничего не меняет.
+PLAIN_FIELD_TYPES = frozenset((
+    'AutoField', 'BigAutoField', 'BigIntegerField', 'CharField',
+    'EmailField', 'FloatField', 'IntegerField', 'PositiveIntegerField',
+    'PositiveSmallIntegerField', 'SlugField', 'SmallIntegerField',
+    'TextField',
+))
+
+
+def value_preparer(field, connection):
+    """Функция подготовки значения поля для базы или None, если значение
+    подготовки не требует."""
+    target = field.target_field if field.is_relation else field
+    if target.get_internal_type() in PLAIN_FIELD_TYPES:
+        return None
+    return partial(field.get_db_prep_save, connection=connection)
+
+
+class BulkUpserter:
+    """Пакетная запись строк в таблицу модели с обновлением по id.
+
+    Строки - кортежи значений для columns (attname полей модели), уже
+    приведённые к python-типам. Остальные поля модели заполняются
+    значениями по умолчанию только при вставке новых строк, поля
+    auto_now и auto_now_add - текущим временем; поля auto_now обновляются
+    и в существующих строках. На PostgreSQL пакет загружается через COPY
+    во временную таблицу и переносится одним INSERT ... ON CONFLICT,
+    на остальных базах - executemany с тем же ON CONFLICT.
+    Сигналы моделей не срабатывают.
+    """
+
+    def __init__(self, model, columns, using=DEFAULT_DB_ALIAS, defaults=None):
+        self.model = model
+        self.connection = connections[using]
+        opts = model._meta
+        self.fields = [opts.get_field(column) for column in columns]
+        self.default_fields = [
+            field for field in opts.concrete_fields
+            if field.attname not in columns]
+        self.touched_fields = [
+            field for field in self.default_fields
+            if getattr(field, 'auto_now', False)]
+        self.defaults = defaults or {}
+        self.table = opts.db_table
+        self.pk_column = opts.pk.column
+
+    @property
+    def all_fields(self):
+        return self.fields + self.default_fields
+
+    def default_value(self, field):
+        if field.attname in self.defaults:
+            return self.defaults[field.attname]()
+        if getattr(field, 'auto_now', False) or getattr(
+                field, 'auto_now_add', False):
+            return timezone.now()
+        return field.get_default()
+
+    def default_values(self):
+        return tuple(
+            self.default_value(field) for field in self.default_fields)
+
+    def prepare(self, rows):
+        defaults = self.default_values()
+        preparers = [value_preparer(field, self.connection)
+                     for field in self.all_fields]
+        if not any(preparers):
+            return [row + defaults for row in rows]
+        return [
+            tuple(value if prepare is None else prepare(value)
+                  for prepare, value in zip(preparers, row + defaults))
+            for row in rows]
+
+    def upsert_sql(self, source):
+        quote = self.connection.ops.quote_name
+        columns = [quote(field.column) for field in self.all_fields]
+        # Существующие строки обновляются только по переданным колонкам:
+        # значения по умолчанию не затирают рейтинг, пароль и т.п.
+        updates = ', '.join(
+            f'{quote(field.column)} = EXCLUDED.{quote(field.column)}'
+            for field in self.fields + self.touched_fields
+            if field.column != self.pk_column)
+        return (
+            f'INSERT INTO {quote(self.table)} ({", ".join(columns)}) '
+            f'{source} ON CONFLICT ({quote(self.pk_column)}) '
+            f'DO UPDATE SET {updates}')
+
+    def write(self, rows):
+        """Записывает пакет строк; вызывать внутри transaction.atomic."""
+        if not rows:
+            return 0
+        prepared = self.prepare(rows)
+        if self.connection.vendor == 'postgresql':
+            self.copy(prepared)
+        else:
+            placeholders = ', '.join(['%s'] * len(self.all_fields))
+            with self.connection.cursor() as cursor:
+                cursor.executemany(
+                    self.upsert_sql(f'VALUES ({placeholders})'), prepared)
+        return len(prepared)
+
+    def copy(self, prepared):
+        quote = self.connection.ops.quote_name
+        columns = ', '.join(quote(field.column) for field in self.all_fields)
+        buffer = io.StringIO()
+        for row in prepared:
+            buffer.write('\t'.join(copy_text(value) for value in row))
+            buffer.write('\n')
+        buffer.seek(0)
+        staging = quote(f'{self.table}_import')
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                f'CREATE TEMP TABLE IF NOT EXISTS {staging} '
+                f'(LIKE {quote(self.table)} INCLUDING DEFAULTS)')
+            cursor.copy_expert(
+                f'COPY {staging} ({columns}) FROM STDIN', buffer)
+            cursor.execute(self.upsert_sql(
+                f'SELECT {columns} FROM {staging}'))
+            cursor.execute(f'TRUNCATE {staging}')
+
+
+def copy_text(value):
+    """Значение в текстовом формате COPY PostgreSQL."""
+    if value is None:
+        return '\\N'
+    return (str(value).replace('\\', '\\\\').replace('\t', '\\t')
+            .replace('\n', '\\n').replace('\r', '\\r'))
+
+
+def batches(iterable, size):
+    iterator = iter(iterable)
+    batch = list(islice(iterator, size))
+    while batch:
+        yield batch
+        batch = list(islice(iterator, size))
+
+
+def reset_sequences(models, using=DEFAULT_DB_ALIAS):
+    """Сдвигает автоинкременты после вставки строк с явными id."""
+    connection = connections[using]
+    statements = connection.ops.sequence_reset_sql(no_style(), models)
+    with connection.cursor() as cursor:
+        for sql in statements:
+            cursor.execute(sql)
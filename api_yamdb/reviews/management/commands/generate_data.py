@@ -0,0 +1,268 @@
+import random
+import time
+from array import array
+from bisect import bisect_left
+from datetime import datetime, timedelta, timezone as dt_timezone
+from itertools import accumulate
+from math import gcd
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Max
+
+from reviews.bulk import BulkUpserter, batches, reset_sequences
+from reviews.models import Category, Comment, Genre, GenreTitle, Review, Title
+from reviews.ratings import rebuild_title_ratings
+from reviews.signals import catalog_changed
+from users.models import User
+
+# Даты отзывов и комментариев отсчитываются назад от фиксированного
+# момента, а не от текущего: с тем же --seed данные совпадают полностью.
+BASE_DATE = datetime(2022, 1, 1, tzinfo=dt_timezone.utc)
+HISTORY_SECONDS = 5 * 365 * 24 * 3600
+# Тексты отзывов и комментариев выбираются из заранее собранного набора:
+# собирать каждый из слов заново - половина времени генерации.
+TEXT_VARIANTS = 5000
+
+ADJECTIVES = (
+    'Тёмная', 'Последняя', 'Тихая', 'Долгая', 'Красная', 'Белая', 'Новая',
+    'Старая', 'Холодная', 'Далёкая', 'Лунная', 'Золотая', 'Забытая',
+    'Северная', 'Морская', 'Летняя', 'Чужая', 'Вечная', 'Ночная', 'Первая',
+)
+NOUNS = (
+    'река', 'дорога', 'ночь', 'война', 'песня', 'история', 'зима', 'весна',
+    'звезда', 'гавань', 'тайна', 'охота', 'игра', 'земля', 'буря', 'память',
+    'станция', 'граница', 'комната', 'музыка',
+)
+WORDS = (
+    'фильм', 'книга', 'сюжет', 'герой', 'финал', 'автор', 'режиссёр',
+    'актёр', 'музыка', 'сцена', 'история', 'очень', 'совсем', 'немного',
+    'понравился', 'затянут', 'скучный', 'сильный', 'неожиданный',
+    'красивый', 'рекомендую', 'пересмотрю', 'второй', 'раз', 'глава',
+    'диалоги', 'атмосфера', 'персонажи', 'развязка', 'ожидал', 'большего',
+    'лучше', 'хуже', 'чем', 'и', 'но', 'а', 'в', 'на', 'с', 'это', 'не',
+)
+
+
+def zipf_weights(size, exponent):
+    return [1 / rank ** exponent for rank in range(1, size + 1)]
+
+
+class ZipfSampler:
+    """Номера 0..size-1 с вероятностью, обратной рангу в степени exponent.
+
+    Накопленные веса - в array: 8 байт на номер вместо объекта float
+    и ссылки в списке (на 10 млн отзывов - 80 МБ вместо ~320 МБ).
+    """
+
+    def __init__(self, size, exponent, rng):
+        self.rng = rng
+        self.cum_weights = array('d', accumulate(
+            1 / rank ** exponent for rank in range(1, size + 1)))
+        self.total = self.cum_weights[-1]
+
+    def sample(self):
+        return bisect_left(
+            self.cum_weights, self.rng.random() * self.total)
+
+
+class Permutation:
+    """Перестановка 0..size-1 без таблицы: rank -> (a * rank + b) % size,
+    a взаимно просто с size."""
+
+    def __init__(self, size, rng):
+        self.size = size
+        self.step = rng.randrange(1, size) if size > 1 else 1
+        while gcd(self.step, size) != 1:
+            self.step = rng.randrange(1, size)
+        self.offset = rng.randrange(size)
+
+    def __getitem__(self, rank):
+        return (self.step * rank + self.offset) % self.size
+
+
+def zipf_counts(total, size, exponent, limit, rng):
+    """Раскладывает total строк по size корзинам по закону Ципфа.
+
+    В корзине не больше limit строк (отзывов на произведение - не больше
+    пользователей), лишнее переходит в остальные корзины пропорционально
+    их весам. Порядок корзин перемешан.
+    """
+    weights = zipf_weights(size, exponent)
+    counts = [0] * size
+    left = min(total, size * limit)
+    open_bins = list(range(size))
+    while left:
+        share = left / sum(weights[index] for index in open_bins)
+        added = 0
+        for index in open_bins:
+            add = min(limit - counts[index], int(weights[index] * share),
+                      left - added)
+            counts[index] += add
+            added += add
+        if not added:
+            # Доли меньше строки: по одной в самые тяжёлые корзины.
+            for index in open_bins[:left]:
+                counts[index] += 1
+                added += 1
+        left -= added
+        open_bins = [index for index in open_bins if counts[index] < limit]
+    rng.shuffle(counts)
+    return counts
+
+
+class Command(BaseCommand):
+    help = ('Генерация синтетических данных: пользователи, каталог, отзывы '
+            'и комментарии с распределением Ципфа.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--categories', type=int, default=10)
+        parser.add_argument('--genres', type=int, default=30)
+        parser.add_argument('--titles', type=int, default=10000)
+        parser.add_argument('--reviews', type=int, default=100000)
+        parser.add_argument('--comments', type=int, default=100000)
+        parser.add_argument(
+            '--zipf', type=float, default=1.1,
+            help='Показатель распределения Ципфа: чем больше, тем сильнее '
+                 'отзывы и комментарии сосредоточены на популярных '
+                 'произведениях и отзывах.')
+        parser.add_argument('--seed', type=int, default=1)
+        parser.add_argument(
+            '--batch-size', type=int, default=10000,
+            help='Строк в одной транзакции.')
+
+    def handle(self, *args, **options):
+        if options['users'] < 1 or options['categories'] < 1 or (
+                options['genres'] < 1):
+            raise CommandError(
+                'Нужен хотя бы один пользователь, категория и жанр')
+        if options['reviews'] and not options['titles']:
+            raise CommandError('Отзывам нужны произведения')
+        self.rng = random.Random(options['seed'])
+        self.batch_size = options['batch_size']
+        self.zipf = options['zipf']
+        self.first_ids = {
+            model: (model.objects.aggregate(last=Max('pk'))['last'] or 0) + 1
+            for model in (User, Category, Genre, Title, GenreTitle,
+                          Review, Comment)}
+        self.users = range(
+            self.first_ids[User], self.first_ids[User] + options['users'])
+        self.generate_users()
+        self.generate_catalog(options['categories'], options['genres'],
+                              options['titles'])
+        reviews = self.generate_reviews(options['reviews'])
+        if reviews:
+            self.generate_comments(options['comments'], reviews)
+        reset_sequences(list(self.first_ids))
+        rebuild_title_ratings(Title.objects.filter(
+            pk__gte=self.first_ids[Title]))
+        catalog_changed.send(sender=self.__class__)
+
+    def write(self, model, columns, rows, defaults=None):
+        """Пишет строки пакетами, выводя скорость записи."""
+        writer = BulkUpserter(model, columns, defaults=defaults)
+        done, started = 0, time.monotonic()
+        for batch in batches(rows, self.batch_size):
+            with transaction.atomic():
+                done += writer.write(batch)
+        elapsed = time.monotonic() - started
+        speed = done / elapsed if elapsed else 0
+        self.stdout.write(
+            f'{model._meta.verbose_name_plural}: {done} строк, '
+            f'{speed:.0f} строк/с')
+        return done
+
+    def past_date(self):
+        return BASE_DATE - timedelta(
+            seconds=self.rng.randrange(HISTORY_SECONDS))
+
+    def texts(self, low, high):
+        return [
+            ' '.join(self.rng.choices(
+                WORDS, k=self.rng.randint(low, high))).capitalize() + '.'
+            for _ in range(TEXT_VARIANTS)]
+
+    def generate_users(self):
+        self.write(User, ('id', 'username', 'email'), (
+            (pk, f'user{pk}', f'user{pk}@yamdb.fake') for pk in self.users),
+            defaults={'password': lambda: make_password(None)})
+
+    def generate_catalog(self, categories, genres, titles):
+        rng = self.rng
+        category_ids = range(
+            self.first_ids[Category], self.first_ids[Category] + categories)
+        genre_ids = range(
+            self.first_ids[Genre], self.first_ids[Genre] + genres)
+        self.write(Category, ('id', 'name', 'slug'), (
+            (pk, f'Категория {pk}', f'category-{pk}')
+            for pk in category_ids))
+        self.write(Genre, ('id', 'name', 'slug'), (
+            (pk, f'Жанр {pk}', f'genre-{pk}') for pk in genre_ids))
+        self.title_ids = range(
+            self.first_ids[Title], self.first_ids[Title] + titles)
+        # Годы - чаще недавние, категории и жанры - по закону Ципфа.
+        category_sampler = ZipfSampler(categories, self.zipf, rng)
+        descriptions = self.texts(10, 40)
+        self.write(Title, ('id', 'name', 'year', 'category_id',
+                           'description'), (
+            (pk, f'{rng.choice(ADJECTIVES)} {rng.choice(NOUNS)}',
+             max(1900, BASE_DATE.year - int(rng.expovariate(1 / 15))),
+             category_ids[category_sampler.sample()], rng.choice(descriptions))
+            for pk in self.title_ids))
+        genre_sampler = ZipfSampler(genres, self.zipf, rng)
+        first_link = self.first_ids[GenreTitle]
+
+        def links():
+            for title_id in self.title_ids:
+                chosen = {genre_sampler.sample()
+                          for _ in range(rng.randint(1, 3))}
+                for index in sorted(chosen):
+                    yield title_id, genre_ids[index]
+
+        self.write(GenreTitle, ('id', 'title_id', 'genre_id'), (
+            (first_link + number, title_id, genre_id)
+            for number, (title_id, genre_id) in enumerate(links())))
+
+    def generate_reviews(self, total):
+        """Отзывы по закону Ципфа на произведения, не больше одного от
+        пользователя на произведение. Оценки зависят от «качества»
+        произведения. Возвращает число записанных отзывов."""
+        if not total:
+            return 0
+        rng = self.rng
+        counts = zipf_counts(
+            total, len(self.title_ids), self.zipf, len(self.users), rng)
+        first_review = self.first_ids[Review]
+        texts = self.texts(5, 60)
+
+        def rows():
+            pk = first_review
+            for title_id, count in zip(self.title_ids, counts):
+                quality = rng.gauss(7, 1.5)
+                for author_id in rng.sample(self.users, count):
+                    score = min(10, max(1, round(rng.gauss(quality, 1.8))))
+                    yield (pk, title_id, author_id, score, rng.choice(texts),
+                           self.past_date())
+                    pk += 1
+
+        return self.write(Review, ('id', 'title_id', 'author_id', 'score',
+                                   'text', 'pub_date'), rows())
+
+    def generate_comments(self, total, reviews):
+        """Комментарии по закону Ципфа на отзывы в случайном порядке
+        популярности."""
+        rng = self.rng
+        first_review = self.first_ids[Review]
+        # Популярность отзывов не зависит от их id.
+        ranking = Permutation(reviews, rng)
+        sampler = ZipfSampler(reviews, self.zipf, rng)
+        first_comment = self.first_ids[Comment]
+        texts = self.texts(3, 30)
+        self.write(Comment, ('id', 'review_id', 'author_id', 'text',
+                             'pub_date'), (
+            (pk, first_review + ranking[sampler.sample()],
+             rng.choice(self.users),
+             rng.choice(texts), self.past_date())
+            for pk in range(first_comment, first_comment + total)))
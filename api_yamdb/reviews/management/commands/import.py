@@ -1,60 +1,321 @@
-from __future__ import print_function
-
-import os
 import csv
+import hashlib
+import json
+import os
+import time
+from collections import namedtuple
+from itertools import islice
 
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
 
-from django.core.management.base import BaseCommand
-
-from reviews.models import Category, Genre, Comment, Review, Title
+from reviews.bulk import BulkUpserter, batches, reset_sequences
+from reviews.models import (Category, Comment, Genre, GenreTitle,
+                            ImportedFile, ImportedRow, Review, Title)
+from reviews.ratings import rebuild_title_ratings
+from reviews.signals import catalog_changed
 from users.models import User
 
-from glob import glob
+# Файл, модель и соответствие колонок csv полям модели.
+# Порядок важен: таблица загружается после всех, на которые ссылается.
+ImportSpec = namedtuple('ImportSpec', ('filename', 'model', 'columns'))
+
+IMPORT_SPECS = (
+    ImportSpec('category.csv', Category, {
+        'id': 'id', 'name': 'name', 'slug': 'slug'}),
+    ImportSpec('genre.csv', Genre, {
+        'id': 'id', 'name': 'name', 'slug': 'slug'}),
+    ImportSpec('users.csv', User, {
+        'id': 'id', 'username': 'username', 'email': 'email',
+        'role': 'role', 'bio': 'bio', 'first_name': 'first_name',
+        'last_name': 'last_name'}),
+    ImportSpec('titles.csv', Title, {
+        'id': 'id', 'name': 'name', 'year': 'year',
+        'category': 'category_id', 'description': 'description'}),
+    ImportSpec('genre_title.csv', GenreTitle, {
+        'id': 'id', 'title_id': 'title_id', 'genre_id': 'genre_id'}),
+    ImportSpec('review.csv', Review, {
+        'id': 'id', 'title_id': 'title_id', 'text': 'text',
+        'author': 'author_id', 'score': 'score', 'pub_date': 'pub_date'}),
+    ImportSpec('comments.csv', Comment, {
+        'id': 'id', 'review_id': 'review_id', 'text': 'text',
+        'author': 'author_id', 'pub_date': 'pub_date'}),
+)
+
+# Значения для обязательных полей, которых нет в csv.
+IMPORT_DEFAULTS = {
+    User: {'password': lambda: make_password(None)},
+}
+
+# Строки этих таблиц встроены в ответы API о связанных строках:
+# модель -> (модель связанных строк, путь от неё к изменённой строке).
+# У связанных строк обновляется отметка modified, от которой зависят
+# ETag и Last-Modified. Произведения отзывов отмечает пересчёт рейтинга.
+RELATED_TOUCHES = {
+    Category: (Title, 'category'),
+    Genre: (Title, 'genre'),
+    GenreTitle: (Title, 'genretitle'),
+    Comment: (Review, 'comments'),
+}
+
+CHECKPOINT_NAME = '.import_checkpoint.json'
+
+
+class Checkpoint:
+    """Сколько строк каждого файла уже записано в базу.
+
+    Сохраняется после каждого пакета и удаляется после успешного импорта,
+    поэтому повторный запуск после сбоя продолжает с места остановки.
+    Отметка сбрасывается, если файл изменился.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.state = {}
+        if os.path.exists(path):
+            with open(path, encoding='utf-8') as f:
+                self.state = json.load(f)
+
+    @staticmethod
+    def signature(csv_path):
+        stat = os.stat(csv_path)
+        return [stat.st_size, stat.st_mtime]
+
+    def rows_done(self, csv_path):
+        entry = self.state.get(os.path.basename(csv_path))
+        if entry and entry['signature'] == self.signature(csv_path):
+            return entry['rows']
+        return 0
+
+    def save(self, csv_path, rows):
+        self.state[os.path.basename(csv_path)] = {
+            'signature': self.signature(csv_path), 'rows': rows}
+        with open(self.path, 'w', encoding='utf-8') as f:
+            json.dump(self.state, f)
+
+    def clear(self):
+        self.state = {}
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+class IdSet:
+    """Множество целых id в виде битовой карты: миллионы строк - мегабайты."""
+
+    def __init__(self):
+        self.bits = bytearray()
+
+    def add(self, number):
+        index, bit = divmod(number, 8)
+        if index >= len(self.bits):
+            self.bits.extend(bytes(index - len(self.bits) + 1))
+        self.bits[index] |= 1 << bit
+
+    def __contains__(self, number):
+        index, bit = divmod(number, 8)
+        return index < len(self.bits) and bool(self.bits[index] & 1 << bit)
+
+
+def convert(field, value):
+    if value == '' and field.null:
+        return None
+    return field.to_python(value)
+
+
+def file_digest(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def row_digest(row):
+    return hashlib.blake2b(
+        '\x1f'.join(row).encode(), digest_size=16).hexdigest()
+
+
+def touch_related(model, ids):
+    if model in RELATED_TOUCHES:
+        related, lookup = RELATED_TOUCHES[model]
+        related.objects.filter(
+            **{f'{lookup}__in': ids}).update(modified=timezone.now())
 
 
 class Command(BaseCommand):
     help = 'Импорт данных из csv в db.'
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--path', default='./static/data',
+            help='Папка с csv-файлами.')
+        parser.add_argument(
+            '--batch-size', type=int, default=5000,
+            help='Строк в одной транзакции.')
+        parser.add_argument(
+            '--no-resume', action='store_true',
+            help='Начать заново, не продолжая прерванный импорт.')
+        parser.add_argument(
+            '--delta', action='store_true',
+            help='Записать только изменённые с прошлого --delta строки '
+                 'и удалить строки, которых больше нет в csv.')
+
     def handle(self, *args, **options):
-        for csv_file in glob('./static/data/*.csv'):
-            with open(csv_file, newline='', encoding='utf-8') as f:
-                reader = csv.DictReader(f)
-                for row in reader:
-                    if os.path.basename(csv_file) == os.path.basename(
-                            r'./static/data/category.csv'):
-                        category, created = Category.objects.update_or_create(
-                            id=int(row['id']), name=row['name'],
-                            slug=row['slug']
-                        )
-                    if os.path.basename(csv_file) == os.path.basename(
-                            r'./static/data/genre.csv'):
-                        genre, created = Genre.objects.update_or_create(
-                            id=int(row['id']), name=row['name'],
-                            slug=row['slug']
-                        )
-                    if os.path.basename(csv_file) == os.path.basename(
-                            r'./static/data/titles.csv'):
-                        title, created = Title.objects.update_or_create(
-                            id=int(row['id']), name=row['name'],
-                            year=row['year'], category_id=row['category']
-                        )
-                    if os.path.basename(csv_file) == os.path.basename(
-                            r'./static/data/users.csv'):
-                        users, created = User.objects.update_or_create(
-                            id=int(row['id']), username=row['username'],
-                            email=row['email'], role=row['role']
-                        )
-                    if os.path.basename(csv_file) == os.path.basename(
-                            r'./static/data/review.csv'):
-                        review, created = Review.objects.update_or_create(
-                            id=int(row['id']), title_id=row['title_id'],
-                            text=row['text'], author_id=row['author'],
-                            score=row['score'], pub_date=row['pub_date']
-                        )
-                    if os.path.basename(csv_file) == os.path.basename(
-                            r'./static/data/comments.csv'):
-                        comment, created = Comment.objects.update_or_create(
-                            id=int(row['id']), review_id=row['review_id'],
-                            text=row['text'], author_id=row['author'],
-                            pub_date=row['pub_date']
-                        )
+        path = options['path']
+        if not os.path.isdir(path):
+            raise CommandError(f'Папка {path} не найдена')
+        checkpoint = Checkpoint(os.path.join(path, CHECKPOINT_NAME))
+        if options['no_resume']:
+            checkpoint.clear()
+        imported, affected_titles = [], set()
+        for spec in IMPORT_SPECS:
+            csv_path = os.path.join(path, spec.filename)
+            if not os.path.exists(csv_path):
+                self.stdout.write(f'{spec.filename}: нет файла, пропущен')
+                continue
+            if options['delta']:
+                self.import_file_delta(spec, csv_path, options['batch_size'],
+                                       affected_titles)
+            else:
+                self.import_file(spec, csv_path, checkpoint,
+                                 options['batch_size'])
+            imported.append(spec.model)
+        if imported:
+            self.finish(imported, options['delta'], affected_titles)
+        checkpoint.clear()
+
+    def finish(self, imported, delta, affected_titles):
+        """Сдвигает последовательности id и пересчитывает рейтинги."""
+        reset_sequences(imported)
+        if delta:
+            if affected_titles:
+                rebuild_title_ratings(
+                    Title.objects.filter(pk__in=affected_titles))
+        elif Title in imported or Review in imported:
+            rebuild_title_ratings()
+        catalog_changed.send(sender=self.__class__)
+
+    def open_csv(self, spec, f):
+        """Возвращает BulkUpserter под колонки файла и итератор пар
+        (исходная строка csv, значения для BulkUpserter)."""
+        reader = csv.reader(f)
+        header = next(reader)
+        indexes = [(number, spec.columns[name])
+                   for number, name in enumerate(header)
+                   if name in spec.columns]
+        writer = BulkUpserter(
+            spec.model, [attname for _, attname in indexes],
+            defaults=IMPORT_DEFAULTS.get(spec.model))
+        converters = [
+            (number, field) for (number, _), field
+            in zip(indexes, writer.fields)]
+        rows = (
+            (row, tuple(convert(field, row[number])
+                        for number, field in converters))
+            for row in reader)
+        return writer, rows
+
+    def import_file(self, spec, csv_path, checkpoint, batch_size):
+        skip = checkpoint.rows_done(csv_path)
+        done, started = skip, time.monotonic()
+        with open(csv_path, newline='', encoding='utf-8') as f:
+            writer, rows = self.open_csv(spec, f)
+            pk_index = writer.fields.index(spec.model._meta.pk)
+            for batch in batches(islice(rows, skip, None), batch_size):
+                with transaction.atomic():
+                    done += self.write(spec, writer, [
+                        values for _, values in batch], pk_index)
+                checkpoint.save(csv_path, done)
+                self.report(spec.filename, done, done - skip, started)
+        if done == skip:
+            # Файл пуст или уже загружен до конца: строк прогресса не было.
+            self.report(spec.filename, done, 0, started)
+
+    def import_file_delta(self, spec, csv_path, batch_size, affected_titles):
+        digest = file_digest(csv_path)
+        if ImportedFile.objects.filter(
+                name=spec.filename, digest=digest).exists():
+            self.stdout.write(f'{spec.filename}: без изменений')
+            return
+        seen, done, changed = IdSet(), 0, 0
+        started = time.monotonic()
+        with open(csv_path, newline='', encoding='utf-8') as f:
+            writer, rows = self.open_csv(spec, f)
+            pk_index = writer.fields.index(spec.model._meta.pk)
+            for batch in batches(rows, batch_size):
+                changed += self.write_changed(
+                    spec, writer, batch, pk_index, seen, affected_titles)
+                done += len(batch)
+                self.report(spec.filename, done, done, started)
+        deleted = self.delete_missing(spec, seen, batch_size)
+        ImportedFile.objects.update_or_create(
+            name=spec.filename, defaults={'digest': digest})
+        self.stdout.write(
+            f'{spec.filename}: изменено {changed}, удалено {deleted}')
+
+    def write_changed(self, spec, writer, batch, pk_index, seen,
+                      affected_titles):
+        digests = {}
+        for row, values in batch:
+            seen.add(values[pk_index])
+            digests[values[pk_index]] = row_digest(row)
+        stored = dict(ImportedRow.objects.filter(
+            file=spec.filename, row_id__in=digests,
+        ).values_list('row_id', 'digest'))
+        changed = [values for _, values in batch
+                   if stored.get(values[pk_index]) != digests[
+                       values[pk_index]]]
+        if not changed:
+            return 0
+        changed_ids = [values[pk_index] for values in changed]
+        with transaction.atomic():
+            if spec.model is Review:
+                # Рейтинг пересчитывается и для прежнего произведения отзыва.
+                affected_titles.update(Review.objects.filter(
+                    pk__in=changed_ids).values_list('title_id', flat=True))
+                title_index = writer.fields.index(
+                    Review._meta.get_field('title'))
+                affected_titles.update(
+                    values[title_index] for values in changed)
+            self.write(spec, writer, changed, pk_index)
+            ImportedRow.objects.filter(
+                file=spec.filename, row_id__in=changed_ids).delete()
+            ImportedRow.objects.bulk_create(
+                ImportedRow(file=spec.filename, row_id=row_id,
+                            digest=digests[row_id])
+                for row_id in changed_ids)
+        return len(changed)
+
+    def write(self, spec, writer, rows, pk_index):
+        """Записывает пакет, отмечая изменение связанных строк до записи
+        (прежние связи) и после неё (новые)."""
+        ids = [values[pk_index] for values in rows]
+        touch_related(spec.model, ids)
+        written = writer.write(rows)
+        touch_related(spec.model, ids)
+        return written
+
+    def delete_missing(self, spec, seen, batch_size):
+        """Удаляет строки, загруженные прошлым --delta и пропавшие из csv.
+
+        Удаление идёт через ORM, поэтому срабатывают каскады и сигналы.
+        """
+        stored = ImportedRow.objects.filter(
+            file=spec.filename).values_list('row_id', flat=True)
+        missing = [row_id for row_id in stored.iterator()
+                   if row_id not in seen]
+        for chunk in batches(missing, batch_size):
+            with transaction.atomic():
+                touch_related(spec.model, chunk)
+                spec.model.objects.filter(pk__in=chunk).delete()
+                ImportedRow.objects.filter(
+                    file=spec.filename, row_id__in=chunk).delete()
+        return len(missing)
+
+    def report(self, filename, done, written, started):
+        elapsed = time.monotonic() - started
+        speed = written / elapsed if elapsed else 0
+        self.stdout.write(
+            f'{filename}: {done} строк, {speed:.0f} строк/с')
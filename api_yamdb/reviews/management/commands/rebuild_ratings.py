@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from reviews.ratings import rebuild_title_ratings
+from reviews.signals import catalog_changed
+
+
+class Command(BaseCommand):
+    help = 'Пересчёт рейтингов произведений по таблице отзывов.'
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            updated = rebuild_title_ratings()
+        catalog_changed.send(sender=self.__class__)
+        self.stdout.write(f'Пересчитано произведений: {updated}')
@@ -0,0 +1,57 @@
+# Generated by Django 2.2.16 on 2026-10-18 09:34
+
+from django.db import migrations, models
+from django.db.models import Avg, Count, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+
+def fill_ratings(apps, schema_editor):
+    Title = apps.get_model('reviews', 'Title')
+    Review = apps.get_model('reviews', 'Review')
+    reviews = (Review.objects.filter(title=OuterRef('pk'))
+               .order_by().values('title'))
+    Title.objects.update(
+        review_count=Coalesce(Subquery(
+            reviews.annotate(value=Count('pk')).values('value'),
+            output_field=models.IntegerField()), 0),
+        score_sum=Coalesce(Subquery(
+            reviews.annotate(value=Sum('score')).values('value'),
+            output_field=models.IntegerField()), 0),
+        rating=Subquery(
+            reviews.annotate(value=Avg('score')).values('value'),
+            output_field=models.FloatField()),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0002_auto_20211223_2033'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='title',
+            name='rating',
+            field=models.FloatField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='title',
+            name='review_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='title',
+            name='score_sum',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AlterUniqueTogether(
+            name='review',
+            unique_together=set(),
+        ),
+        migrations.AddConstraint(
+            model_name='review',
+            constraint=models.UniqueConstraint(fields=('title', 'author'), name='unique_review'),
+        ),
+        migrations.RunPython(fill_ratings, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,57 @@
+# Generated by Django 2.2.16 on 2026-10-18 09:42
+
+import django.contrib.postgres.search
+from django.db import migrations
+
+SEARCH_VECTOR_SQL = (
+    "setweight(to_tsvector('russian', coalesce({row}name, '')), 'A') || "
+    "setweight(to_tsvector('russian', coalesce({row}description, '')), 'B')"
+)
+
+CREATE_SQL = f'''
+CREATE FUNCTION reviews_title_search_vector_update() RETURNS trigger AS $$
+BEGIN
+    NEW.search_vector := {SEARCH_VECTOR_SQL.format(row='NEW.')};
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER reviews_title_search_vector_trigger
+BEFORE INSERT OR UPDATE OF name, description ON reviews_title
+FOR EACH ROW EXECUTE PROCEDURE reviews_title_search_vector_update();
+
+UPDATE reviews_title SET search_vector = {SEARCH_VECTOR_SQL.format(row='')};
+
+CREATE INDEX reviews_title_search_vector_idx
+ON reviews_title USING gin (search_vector);
+'''
+
+DROP_SQL = '''
+DROP INDEX IF EXISTS reviews_title_search_vector_idx;
+DROP TRIGGER IF EXISTS reviews_title_search_vector_trigger ON reviews_title;
+DROP FUNCTION IF EXISTS reviews_title_search_vector_update();
+'''
+
+
+def postgresql_only(sql):
+    def run(apps, schema_editor):
+        if schema_editor.connection.vendor == 'postgresql':
+            schema_editor.execute(sql)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0005_import_state'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='title',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(postgresql_only(CREATE_SQL),
+                             postgresql_only(DROP_SQL)),
+    ]
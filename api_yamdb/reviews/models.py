@@ -1,4 +1,5 @@
-from django.db import models
+from django.contrib.postgres.search import SearchVectorField
+from django.db import models, transaction
 from django.conf import settings
 
 from .validator import validate_year
@@ -44,11 +45,23 @@ class Title(models.Model):
         related_name='category',
         on_delete=models.SET_NULL,
         null=True)
+    rating = models.FloatField(null=True, editable=False)
+    review_count = models.PositiveIntegerField(default=0, editable=False)
+    score_sum = models.PositiveIntegerField(default=0, editable=False)
+    # Меняется и при изменении отзывов произведения (reviews/signals.py):
+    # по нему строятся ETag и Last-Modified произведения и его отзывов.
+    modified = models.DateTimeField(auto_now=True, db_index=True)
+    # Заполняется триггером PostgreSQL по name и description
+    # (миграция 0006), на других базах остаётся пустым.
+    search_vector = SearchVectorField(null=True, editable=False)
 
     class Meta:
         verbose_name = 'Title'
         verbose_name_plural = 'Titles'
         ordering = ('year',)
+        indexes = (
+            models.Index(fields=('year', 'id'), name='title_year_id_idx'),
+        )
 
     def __str__(self):
         return self.name
@@ -64,6 +77,12 @@ class GenreTitle(models.Model):
         on_delete=models.SET_NULL,
         null=True)
 
+    class Meta:
+        indexes = (
+            models.Index(fields=('genre', 'title'),
+                         name='genretitle_genre_title_idx'),
+        )
+
 
 class Review(models.Model):
     DEFAULT_CHOICES = (
@@ -98,17 +117,44 @@ class Review(models.Model):
         auto_now_add=True,
         db_index=True
     )
+    # Меняется и при изменении комментариев к отзыву.
+    modified = models.DateTimeField(auto_now=True)
 
     class Meta:
-        models.UniqueConstraint(
-            fields=['title', 'author'], name='unique_review')
+        constraints = (
+            models.UniqueConstraint(
+                fields=('title', 'author'), name='unique_review'),
+        )
         verbose_name = 'Review'
         verbose_name_plural = 'Reviews'
         ordering = ('pub_date',)
+        indexes = (
+            models.Index(fields=('title', 'pub_date', 'id'),
+                         name='review_title_pub_date_idx'),
+        )
 
     def __str__(self):
         return self.author.username
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance.remember_rating_state()
+        return instance
+
+    def remember_rating_state(self):
+        """Запоминает произведение и оценку, учтённые в рейтинге."""
+        if {'title_id', 'score'} & self.get_deferred_fields():
+            self._rating_state = None
+        else:
+            self._rating_state = (self.title_id, self.score)
+
+    def save(self, *args, **kwargs):
+        # Рейтинг произведения пересчитывается в post_save,
+        # поэтому сохранение отзыва и рейтинга - одна транзакция.
+        with transaction.atomic(using=kwargs.get('using')):
+            super().save(*args, **kwargs)
+
 
 class Comment(models.Model):
     review = models.ForeignKey(
@@ -126,11 +172,41 @@ class Comment(models.Model):
         auto_now_add=True,
         db_index=True
     )
+    modified = models.DateTimeField(auto_now=True)
 
     class Meta:
         verbose_name = 'Comment'
         verbose_name_plural = 'Comments'
         ordering = ('pub_date',)
+        indexes = (
+            models.Index(fields=('review', 'pub_date', 'id'),
+                         name='comment_review_pub_date_idx'),
+        )
 
     def __str__(self):
         return self.text
+
+
+class ImportedFile(models.Model):
+    """Контрольная сумма csv-файла, загруженного командой import --delta."""
+    name = models.CharField(unique=True, max_length=255)
+    digest = models.CharField(max_length=64)
+
+    def __str__(self):
+        return self.name
+
+
+class ImportedRow(models.Model):
+    """Контрольная сумма строки csv-файла для команды import --delta."""
+    file = models.CharField(max_length=255)
+    row_id = models.BigIntegerField()
+    digest = models.CharField(max_length=32)
+
+    class Meta:
+        constraints = (
+            models.UniqueConstraint(
+                fields=('file', 'row_id'), name='unique_imported_row'),
+        )
+
+    def __str__(self):
+        return f'{self.file}:{self.row_id}'
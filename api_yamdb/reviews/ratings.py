@@ -0,0 +1,56 @@
+from django.db.models import (Avg, Case, Count, ExpressionWrapper, F,
+                              FloatField, IntegerField, OuterRef, Subquery,
+                              Sum, Value, When)
+from django.db.models.functions import Cast, Coalesce
+from django.utils import timezone
+
+from .models import Review, Title
+
+
+def update_title_rating(title_id, count_delta, score_delta):
+    """Инкрементально меняет счётчики и рейтинг одного произведения.
+
+    Все значения считаются в одном UPDATE от текущих значений в строке,
+    поэтому параллельные отзывы на одно произведение не теряются.
+    Отметка modified обновляется и при нулевых изменениях: правка текста
+    отзыва тоже меняет список отзывов произведения.
+    """
+    new_count = F('review_count') + count_delta
+    new_sum = F('score_sum') + score_delta
+    Title.objects.filter(pk=title_id).update(
+        review_count=new_count,
+        score_sum=new_sum,
+        modified=timezone.now(),
+        rating=Case(
+            When(review_count__lte=-count_delta, then=Value(None)),
+            default=ExpressionWrapper(
+                Cast(F('score_sum') + score_delta, FloatField())
+                / (F('review_count') + count_delta),
+                output_field=FloatField()),
+            output_field=FloatField(),
+        ),
+    )
+
+
+def rebuild_title_ratings(titles=None):
+    """Пересчитывает рейтинги с нуля по таблице отзывов.
+
+    Возвращает количество обновлённых произведений.
+    """
+    if titles is None:
+        titles = Title.objects.all()
+    reviews = (Review.objects.filter(title=OuterRef('pk'))
+               .order_by().values('title'))
+    return titles.update(
+        review_count=Coalesce(
+            Subquery(reviews.annotate(value=Count('pk')).values('value'),
+                     output_field=IntegerField()),
+            0),
+        score_sum=Coalesce(
+            Subquery(reviews.annotate(value=Sum('score')).values('value'),
+                     output_field=IntegerField()),
+            0),
+        rating=Subquery(reviews.annotate(value=Avg('score')).values('value'),
+                        output_field=FloatField()),
+        modified=timezone.now(),
+    )
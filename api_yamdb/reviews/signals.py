@@ -0,0 +1,72 @@
+from django.db.models.signals import (m2m_changed, post_delete, post_save,
+                                      pre_delete)
+from django.dispatch import Signal, receiver
+from django.utils import timezone
+
+from .models import Category, Comment, Genre, Review, Title
+from .ratings import rebuild_title_ratings, update_title_rating
+
+# Данные каталога изменены массово, в обход сигналов моделей
+# (например, командой import).
+catalog_changed = Signal()
+
+
+@receiver(post_save, sender=Review)
+def review_saved(sender, instance, created, **kwargs):
+    """Учитывает новый или изменённый отзыв в рейтинге произведения."""
+    previous = getattr(instance, '_rating_state', None)
+    if created:
+        update_title_rating(instance.title_id, 1, instance.score)
+    elif previous is None:
+        # Учтённое ранее состояние отзыва неизвестно (объект собран
+        # вручную или загружен не полностью) - пересчитываем по базе.
+        rebuild_title_ratings(Title.objects.filter(pk=instance.title_id))
+    elif previous[0] == instance.title_id:
+        update_title_rating(instance.title_id, 0, instance.score - previous[1])
+    else:
+        update_title_rating(previous[0], -1, -previous[1])
+        update_title_rating(instance.title_id, 1, instance.score)
+    instance.remember_rating_state()
+
+
+@receiver(post_delete, sender=Review)
+def review_deleted(sender, instance, **kwargs):
+    """Убирает удалённый отзыв из рейтинга, в том числе при каскаде."""
+    update_title_rating(instance.title_id, -1, -instance.score)
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def comment_changed(sender, instance, **kwargs):
+    """Отмечает изменение списка комментариев в отзыве."""
+    Review.objects.filter(pk=instance.review_id).update(
+        modified=timezone.now())
+
+
+@receiver(post_save, sender=Category)
+@receiver(pre_delete, sender=Category)
+def category_changed(sender, instance, created=False, **kwargs):
+    """Категория встроена в ответы произведений."""
+    if not created:
+        Title.objects.filter(category=instance).update(modified=timezone.now())
+
+
+@receiver(post_save, sender=Genre)
+@receiver(pre_delete, sender=Genre)
+def genre_changed(sender, instance, created=False, **kwargs):
+    if not created:
+        Title.objects.filter(genre=instance).update(modified=timezone.now())
+
+
+@receiver(m2m_changed, sender=Title.genre.through)
+def title_genres_changed(sender, instance, action, reverse, pk_set,
+                         **kwargs):
+    if not reverse and action.startswith('post_'):
+        titles = Title.objects.filter(pk=instance.pk)
+    elif reverse and action in ('post_add', 'post_remove'):
+        titles = Title.objects.filter(pk__in=pk_set)
+    elif reverse and action == 'pre_clear':
+        titles = Title.objects.filter(genre=instance)
+    else:
+        return
+    titles.update(modified=timezone.now())
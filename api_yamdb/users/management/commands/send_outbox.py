@@ -0,0 +1,35 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from users.outbox import send_pending
+
+
+class Command(BaseCommand):
+    help = 'Отправка писем из очереди (коды подтверждения и т.п.).'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=100,
+            help='Писем за одно соединение с почтовым сервером.')
+        parser.add_argument(
+            '--max-attempts', type=int, default=10,
+            help='После стольких неудач письмо больше не отправляется.')
+        parser.add_argument(
+            '--loop', action='store_true',
+            help='Работать постоянно, проверяя очередь каждые --interval с.')
+        parser.add_argument(
+            '--interval', type=float, default=2,
+            help='Пауза между проверками пустой очереди, секунд.')
+
+    def handle(self, *args, **options):
+        while True:
+            sent, failed = send_pending(
+                options['batch_size'], options['max_attempts'])
+            if sent or failed:
+                self.stdout.write(
+                    f'Отправлено писем: {sent}, ошибок: {failed}')
+                continue
+            if not options['loop']:
+                return
+            time.sleep(options['interval'])
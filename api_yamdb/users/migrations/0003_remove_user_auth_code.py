@@ -0,0 +1,17 @@
+# Generated by Django 2.2.16 on 2026-10-18 09:53
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0002_outgoing_email'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='user',
+            name='auth_code',
+        ),
+    ]
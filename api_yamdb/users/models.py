@@ -1,5 +1,6 @@
 from django.contrib.auth.models import AbstractUser
 from django.db import models
+from django.utils import timezone
 
 
 class User(AbstractUser):
@@ -17,11 +18,31 @@ class User(AbstractUser):
         blank=False,
         max_length=16
     )
-    auth_code = models.CharField(
-        blank=True,
-        max_length=5
-    )
     bio = models.CharField(
         blank=True,
         max_length=10000
     )
+
+
+class OutgoingEmail(models.Model):
+    """Письмо в очереди на отправку командой send_outbox."""
+    subject = models.CharField(max_length=255)
+    message = models.TextField()
+    from_email = models.CharField(max_length=254)
+    recipient = models.EmailField()
+    created = models.DateTimeField(auto_now_add=True)
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    sent_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+
+    class Meta:
+        ordering = ('id',)
+        indexes = (
+            models.Index(fields=('next_attempt_at',),
+                         name='outgoing_email_pending_idx',
+                         condition=models.Q(sent_at__isnull=True)),
+        )
+
+    def __str__(self):
+        return f'{self.recipient}: {self.subject}'
@@ -0,0 +1,69 @@
+from datetime import timedelta
+
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.utils import timezone
+
+from .models import OutgoingEmail
+
+# Пауза перед повтором растёт вдвое с каждой неудачей, но не больше часа.
+RETRY_BASE_DELAY = timedelta(seconds=30)
+RETRY_MAX_DELAY = timedelta(hours=1)
+
+
+def enqueue_email(subject, message, recipient, from_email):
+    """Ставит письмо в очередь; отправляет его команда send_outbox."""
+    return OutgoingEmail.objects.create(
+        subject=subject, message=message, recipient=recipient,
+        from_email=from_email)
+
+
+def retry_delay(attempts):
+    return min(RETRY_BASE_DELAY * 2 ** (attempts - 1), RETRY_MAX_DELAY)
+
+
+def send_pending(batch_size=100, max_attempts=10):
+    """Отправляет пакет писем из очереди через одно соединение EMAIL_BACKEND.
+
+    Строки пакета заблокированы до конца отправки, параллельные
+    обработчики пропускают их (SKIP LOCKED). Возвращает число
+    отправленных и неотправленных писем.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        batch = list(OutgoingEmail.objects.select_for_update(
+            skip_locked=True,
+        ).filter(
+            sent_at__isnull=True, next_attempt_at__lte=now,
+            attempts__lt=max_attempts,
+        ).order_by('next_attempt_at', 'id')[:batch_size])
+        if not batch:
+            return 0, 0
+        connection = get_connection()
+        try:
+            connection.open()
+        except Exception as error:
+            for email in batch:
+                fail(email, error, now)
+        else:
+            for email in batch:
+                message = EmailMessage(
+                    email.subject, email.message, email.from_email,
+                    [email.recipient], connection=connection)
+                try:
+                    message.send()
+                except Exception as error:
+                    fail(email, error, now)
+                else:
+                    email.sent_at = now
+            connection.close()
+        OutgoingEmail.objects.bulk_update(
+            batch, ('attempts', 'next_attempt_at', 'sent_at', 'last_error'))
+    sent = sum(1 for email in batch if email.sent_at)
+    return sent, len(batch) - sent
+
+
+def fail(email, error, now):
+    email.attempts += 1
+    email.next_attempt_at = now + retry_delay(email.attempts)
+    email.last_error = repr(error)
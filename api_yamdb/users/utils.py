@@ -1,7 +1,45 @@
-import random
+import hashlib
+import secrets
 import string
 
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.crypto import constant_time_compare
+
+AUTH_CODE_ALPHABET = string.ascii_uppercase + string.digits
+
 
 def generate_auth_code(length: int) -> str:
-    return ''.join(random.choices
-                   (string.ascii_uppercase + string.digits, k=length))
+    return ''.join(secrets.choice(AUTH_CODE_ALPHABET) for _ in range(length))
+
+
+def auth_code_key(username: str) -> str:
+    # username может содержать не-ASCII символы, недопустимые в memcached.
+    return 'auth:code:' + hashlib.md5(username.encode()).hexdigest()
+
+
+def issue_auth_code(user) -> str:
+    """Создаёт код подтверждения и хранит его в кэше AUTH_CODE_TIMEOUT секунд.
+
+    Вместе с кодом хранится всё, что нужно для выдачи токена, так что
+    обмен кода на токен не обращается к базе.
+    """
+    code = generate_auth_code(settings.AUTH_CODE_LENGTH)
+    cache.set(auth_code_key(user.username), {
+        'code': code, 'id': user.pk, 'username': user.username,
+        'role': user.role, 'is_superuser': user.is_superuser,
+    }, settings.AUTH_CODE_TIMEOUT)
+    return code
+
+
+def redeem_auth_code(username: str, code: str):
+    """Данные пользователя, если код верен, иначе None. Код одноразовый."""
+    key = auth_code_key(username)
+    entry = cache.get(key)
+    if entry is None or not constant_time_compare(entry['code'], code):
+        return None
+    # Код достаётся тому, чей delete удалил ключ: параллельный запрос
+    # с тем же кодом мог успеть прочитать его до удаления.
+    if not cache.delete(key):
+        return None
+    return entry
@@ -0,0 +1,413 @@
+"""Нагрузочный тест API.
+
+Заполняет базу командой generate_data, поднимает приложение через gunicorn
+с настройками gunicorn.conf.py и прогоняет основные эндпоинты с заданной
+параллельностью. Запуск из корня репозитория:
+
+    python benchmarks/bench_api.py --reviews 20000 --concurrency 1,16 \\
+        --output bench-$(git rev-parse --short HEAD).json
+    python benchmarks/bench_api.py --compare bench-old.json bench-new.json
+
+По умолчанию работает на временной базе SQLite, с --settings-db - на базе
+из переменных окружения DB_*, как в docker-compose (база будет очищена!).
+Настройки - api_yamdb.settings_bench: кэш файловый во временной папке, если
+не задан CACHE_BACKEND (коды подтверждения для сценария token должны быть
+видны и серверу, и тесту), лимиты частоты запросов отключены.
+Для каждого сценария и уровня параллельности в JSON пишутся задержки
+p50/p95/p99, запросы в секунду, ошибки и SQL-запросов на запрос (по /metrics).
+"""
+import argparse
+import http.client
+import itertools
+import json
+import os
+import platform
+import re
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter, namedtuple
+from io import StringIO
+from urllib.parse import quote
+
+from bench_import import ROOT, setup_django
+
+APP_DIR = os.path.join(ROOT, 'api_yamdb')
+
+# Тестовых авторов отзывов: пара (произведение, автор) уникальна,
+# поэтому i-й отзыв пишет автор i % BENCH_AUTHORS в произведение
+# i // BENCH_AUTHORS.
+BENCH_AUTHORS = 100
+PAGE_SIZE = 100
+
+# name - имя сценария, route - маршрут в метриках, status - ожидаемый код,
+# build(context, number) -> (метод, путь, тело, токен).
+Scenario = namedtuple('Scenario', ('name', 'route', 'status', 'build'))
+
+SCENARIOS = (
+    Scenario('titles-list', 'titles-list', 200, lambda c, i: (
+        'GET', f'/api/v1/titles/?page={c.page(i)}', None, None)),
+    Scenario('titles-list-genre', 'titles-list', 200, lambda c, i: (
+        'GET', f'/api/v1/titles/?genre=genre-{i % 10 + 1},genre-1',
+        None, None)),
+    Scenario('titles-list-years', 'titles-list', 200, lambda c, i: (
+        'GET', f'/api/v1/titles/?year_min={1950 + i % 60}&year_max=2020',
+        None, None)),
+    Scenario('titles-search', 'titles-list', 200, lambda c, i: (
+        'GET', '/api/v1/titles/?search=' + quote(c.search_word(i)),
+        None, None)),
+    Scenario('titles-detail', 'titles-detail', 200, lambda c, i: (
+        'GET', f'/api/v1/titles/{c.title(i)}/', None, None)),
+    Scenario('reviews-list', 'reviews-list', 200, lambda c, i: (
+        'GET', f'/api/v1/titles/{c.reviewed_title(i)}/reviews/',
+        None, None)),
+    Scenario('comments-list', 'comments-list', 200, lambda c, i: (
+        'GET', '/api/v1/titles/{}/reviews/{}/comments/'.format(
+            *c.review(i)), None, None)),
+    Scenario('reviews-create', 'reviews-list', 201, lambda c, i: (
+        'POST', f'/api/v1/titles/{c.title(i // BENCH_AUTHORS)}/reviews/',
+        {'text': 'Отзыв из нагрузочного теста', 'score': i % 10 + 1},
+        c.author_token(i))),
+    Scenario('comments-create', 'comments-list', 201, lambda c, i: (
+        'POST', '/api/v1/titles/{}/reviews/{}/comments/'.format(
+            *c.review(i)), {'text': 'Комментарий из нагрузочного теста'},
+        c.author_token(i))),
+    Scenario('signup', 'send_auth_code', 200, lambda c, i: (
+        'POST', '/api/v1/auth/signup/', {
+            'username': f'bench-signup-{c.run}-{i}',
+            'email': f'bench-signup-{c.run}-{i}@yamdb.fake'}, None)),
+    Scenario('token', 'get_access_token', 200, lambda c, i: (
+        'POST', '/api/v1/auth/token/', c.auth_code(i), None)),
+)
+
+
+class Context:
+    """Id и токены, из которых сценарии собирают запросы."""
+
+    def __init__(self):
+        from django.db.models import Count
+
+        from api.authentication import ClaimsAccessToken
+        from reviews.management.commands.generate_data import NOUNS
+        from reviews.models import Review, Title
+        from users.models import User
+
+        self.run = int(time.time())
+        self.titles = list(Title.objects.order_by('id').values_list(
+            'id', flat=True))
+        self.reviewed_titles = list(Title.objects.annotate(
+            count=Count('reviews')).filter(count__gt=0).order_by(
+            '-count').values_list('id', flat=True)[:100])
+        self.reviews = list(Review.objects.order_by('id').values_list(
+            'title_id', 'id')[:1000])
+        User.objects.bulk_create(
+            User(username=f'bench-author-{self.run}-{number}',
+                 email=f'bench-author-{self.run}-{number}@yamdb.fake')
+            for number in range(BENCH_AUTHORS))
+        authors = User.objects.filter(
+            username__startswith=f'bench-author-{self.run}-').order_by('id')
+        self.author_tokens = [
+            str(ClaimsAccessToken.for_user(author)) for author in authors]
+        self.auth_codes = []
+        self.search_words = NOUNS
+
+    def page(self, number):
+        return number % ((len(self.titles) - 1) // PAGE_SIZE + 1) + 1
+
+    def search_word(self, number):
+        return self.search_words[number % len(self.search_words)]
+
+    def title(self, number):
+        return self.titles[number % len(self.titles)]
+
+    def reviewed_title(self, number):
+        return self.reviewed_titles[number % len(self.reviewed_titles)]
+
+    def review(self, number):
+        return self.reviews[number % len(self.reviews)]
+
+    def author_token(self, number):
+        return self.author_tokens[number % BENCH_AUTHORS]
+
+    def auth_code(self, number):
+        return self.auth_codes[number % len(self.auth_codes)]
+
+    def issue_auth_codes(self, count):
+        """Пользователи с выданными кодами для сценария token."""
+        from users.models import User
+        from users.utils import issue_auth_code
+
+        prefix = f'bench-token-{self.run}-{len(self.auth_codes)}-'
+        User.objects.bulk_create(
+            User(username=f'{prefix}{number}',
+                 email=f'{prefix}{number}@yamdb.fake')
+            for number in range(count))
+        self.auth_codes = [
+            {'username': user.username,
+             'confirmation_code': issue_auth_code(user)}
+            for user in User.objects.filter(
+                username__startswith=prefix).order_by('id')]
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def start_server(args, workdir, port):
+    env = dict(
+        os.environ,
+        SERVER_MODE=args.server_mode,
+        GUNICORN_WORKERS=str(args.workers),
+        GUNICORN_THREADS=str(args.threads),
+        GUNICORN_BIND=f'127.0.0.1:{port}',
+        PROMETHEUS_MULTIPROC_DIR=os.path.join(workdir, 'metrics'),
+    )
+    log = open(os.path.join(workdir, 'server.log'), 'w')
+    server = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '--config', 'gunicorn.conf.py'],
+        cwd=APP_DIR, env=env, stdout=log, stderr=subprocess.STDOUT)
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            if request(port, 'GET', '/api/v1/genres/').status == 200:
+                return server
+        except OSError:
+            time.sleep(0.2)
+    server.terminate()
+    raise RuntimeError(f'Сервер не запустился, см. {log.name}')
+
+
+def request(port, method, path, body=None, token=None, connection=None):
+    connection = connection or http.client.HTTPConnection('127.0.0.1', port)
+    headers = {}
+    if body is not None:
+        body = json.dumps(body)
+        headers['Content-Type'] = 'application/json'
+    if token:
+        headers['Authorization'] = f'Bearer {token}'
+    connection.request(method, path, body, headers)
+    response = connection.getresponse()
+    response.read()
+    return response
+
+
+METRIC_LINE = re.compile(
+    r'^yamdb_request_queries_(sum|count)\{(.*)\} (\S+)$', re.MULTILINE)
+
+
+def query_totals(port):
+    """Сумма и число наблюдений SQL-запросов по маршрутам из /metrics."""
+    connection = http.client.HTTPConnection('127.0.0.1', port)
+    connection.request('GET', '/metrics')
+    body = connection.getresponse().read().decode()
+    totals = {}
+    for kind, labels, value in METRIC_LINE.findall(body):
+        route = re.search(r'route="([^"]*)"', labels).group(1)
+        totals[route, kind] = totals.get((route, kind), 0) + float(value)
+    return totals
+
+
+def percentile(values, share):
+    return values[min(len(values) - 1, int(len(values) * share))]
+
+
+class Measurements:
+    """Задержки успешных ответов, ошибки и попадания в кэш ответов."""
+
+    def __init__(self, expected_status):
+        self.expected_status = expected_status
+        self.lock = threading.Lock()
+        self.latencies = []
+        self.counters = Counter()
+
+    def record(self, response, seconds):
+        with self.lock:
+            if response is None or response.status != self.expected_status:
+                self.counters['errors'] += 1
+                return
+            self.latencies.append(seconds)
+            if response.getheader('X-Cache') == 'HIT':
+                self.counters['cache_hits'] += 1
+
+    def summary(self):
+        latencies = sorted(self.latencies)
+        result = {'errors': self.counters['errors'],
+                  'cache_hits': self.counters['cache_hits']}
+        if latencies:
+            result.update({
+                'mean_ms': round(sum(latencies) / len(latencies) * 1000, 2),
+                'p50_ms': round(percentile(latencies, 0.5) * 1000, 2),
+                'p95_ms': round(percentile(latencies, 0.95) * 1000, 2),
+                'p99_ms': round(percentile(latencies, 0.99) * 1000, 2),
+            })
+        return result
+
+
+def drive(port, scenario, context, numbers, stop, measurements):
+    """Один клиент: запросы по номерам из общего счётчика до stop."""
+    connection = http.client.HTTPConnection('127.0.0.1', port)
+    for number in numbers:
+        if number >= stop:
+            return
+        method, path, body, token = scenario.build(context, number)
+        started = time.perf_counter()
+        try:
+            response = request(port, method, path, body, token, connection)
+        except (OSError, http.client.HTTPException):
+            response = None
+            connection = http.client.HTTPConnection('127.0.0.1', port)
+        measurements.record(response, time.perf_counter() - started)
+
+
+def run_scenario(port, scenario, context, concurrency, total, start):
+    """Выполняет total запросов сценария в concurrency потоков.
+
+    Запросы нумеруются с start: номера не повторяются между прогонами,
+    и сценарии записи не создают дубликатов.
+    """
+    numbers = itertools.count(start)
+    measurements = Measurements(scenario.status)
+    before = query_totals(port)
+    started = time.perf_counter()
+    threads = [
+        threading.Thread(target=drive, args=(
+            port, scenario, context, numbers, start + total, measurements))
+        for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    after = query_totals(port)
+    count, queries = (
+        after.get((scenario.route, kind), 0)
+        - before.get((scenario.route, kind), 0) for kind in ('count', 'sum'))
+    return dict(
+        requests=total,
+        rps=round(total / elapsed, 1),
+        queries_per_request=round(queries / count, 2) if count else None,
+        **measurements.summary())
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT,
+            stderr=subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def seed(reviews):
+    from django.core.management import call_command
+
+    scale = max(reviews // 20, 10)
+    call_command('generate_data', users=scale, categories=5, genres=10,
+                 titles=scale, reviews=reviews, comments=reviews, seed=1,
+                 stdout=StringIO())
+
+
+def benchmark(args, workdir):
+    os.environ['DJANGO_SETTINGS_MODULE'] = 'api_yamdb.settings_bench'
+    os.environ['BENCH_CACHE_LOCATION'] = os.path.join(workdir, 'cache')
+    setup_django(args.settings_db, workdir)
+    from django.core.cache import cache
+    from django.core.management import call_command
+    from django.db import connection
+
+    call_command('flush', interactive=False, verbosity=0)
+    seed(args.reviews)
+    context = Context()
+    port = free_port()
+    server = start_server(args, workdir, port)
+    selected = [scenario for scenario in SCENARIOS
+                if not args.scenarios or scenario.name in args.scenarios]
+    results = {}
+    try:
+        for scenario in selected:
+            results[scenario.name] = {}
+            for level, concurrency in enumerate(args.concurrency):
+                # Каждый прогон начинается с пустого кэша ответов.
+                cache.clear()
+                if scenario.name == 'token':
+                    context.issue_auth_codes(args.requests)
+                results[scenario.name][str(concurrency)] = run_scenario(
+                    port, scenario, context, concurrency, args.requests,
+                    level * args.requests)
+                print(scenario.name, concurrency,
+                      results[scenario.name][str(concurrency)],
+                      file=sys.stderr)
+    finally:
+        server.terminate()
+        server.wait()
+    return {
+        'meta': {
+            'commit': git_commit(),
+            'date': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+            'python': platform.python_version(),
+            'cpus': os.cpu_count(),
+            'database': connection.vendor,
+            'server_mode': args.server_mode,
+            'workers': args.workers,
+            'threads': args.threads,
+            'reviews': args.reviews,
+            'requests': args.requests,
+        },
+        'scenarios': results,
+    }
+
+
+def compare(old_path, new_path):
+    """Печатает изменение rps и p95 по сценариям двух прогонов."""
+    with open(old_path, encoding='utf-8') as f:
+        old = json.load(f)['scenarios']
+    with open(new_path, encoding='utf-8') as f:
+        new = json.load(f)['scenarios']
+    print(f'{"сценарий":24} {"c":>4} {"rps":^20} {"p95, мс":^22}')
+    for name, levels in new.items():
+        for concurrency, result in levels.items():
+            before = old.get(name, {}).get(concurrency)
+            if not before or 'p95_ms' not in result:
+                continue
+            print('{:24} {:>4} {:>8} -> {:<8} {:>9} -> {:<9}'.format(
+                name, concurrency, before['rps'], result['rps'],
+                before.get('p95_ms'), result['p95_ms']))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--reviews', type=int, default=5000)
+    parser.add_argument('--requests', type=int, default=300,
+                        help='Запросов на сценарий и уровень параллельности.')
+    parser.add_argument('--concurrency', default='1,8',
+                        type=lambda value: [int(v) for v in value.split(',')])
+    parser.add_argument('--scenarios', nargs='*',
+                        choices=[scenario.name for scenario in SCENARIOS])
+    parser.add_argument('--server-mode', choices=('wsgi', 'asgi'),
+                        default='wsgi')
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--threads', type=int, default=1)
+    parser.add_argument('--settings-db', action='store_true')
+    parser.add_argument('--output', help='Файл для результатов в JSON.')
+    parser.add_argument('--compare', nargs=2, metavar=('OLD', 'NEW'))
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return
+    with tempfile.TemporaryDirectory() as workdir:
+        result = benchmark(args, workdir)
+    output = json.dumps(result, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(output + '\n')
+    print(output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,170 @@
+"""Сравнение скорости импорта csv.
+
+Построчный update_or_create (прежняя версия команды import) против
+пакетного импорта. Запуск из корня репозитория:
+
+    python benchmarks/bench_import.py --reviews 20000
+
+По умолчанию работает на временной базе SQLite, с --settings-db - на базе
+из переменных окружения DB_*, как в docker-compose (база будет очищена!).
+Результат печатается в формате JSON.
+"""
+import argparse
+import csv
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from io import StringIO
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, 'api_yamdb'))
+
+
+def setup_django(settings_db, workdir):
+    if not settings_db:
+        os.environ['DB_ENGINE'] = 'django.db.backends.sqlite3'
+        os.environ['DB_NAME'] = os.path.join(workdir, 'bench.sqlite3')
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'api_yamdb.settings')
+    import django
+    django.setup()
+    from django.core.management import call_command
+    call_command('migrate', verbosity=0)
+
+
+def write_csv(path, header, rows):
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(header)
+        writer.writerows(rows)
+
+
+def generate(path, reviews, seed=1):
+    rng = random.Random(seed)
+    users = max(reviews // 20, 10)
+    titles = max(reviews // 20, 10)
+    write_csv(os.path.join(path, 'category.csv'), ('id', 'name', 'slug'),
+              [(i, f'Категория {i}', f'category-{i}') for i in range(1, 6)])
+    write_csv(os.path.join(path, 'genre.csv'), ('id', 'name', 'slug'),
+              [(i, f'Жанр {i}', f'genre-{i}') for i in range(1, 11)])
+    write_csv(os.path.join(path, 'users.csv'),
+              ('id', 'username', 'email', 'role', 'bio', 'first_name',
+               'last_name'),
+              [(i, f'user{i}', f'user{i}@yamdb.fake', 'user', '', '', '')
+               for i in range(1, users + 1)])
+    write_csv(os.path.join(path, 'titles.csv'),
+              ('id', 'name', 'year', 'category'),
+              [(i, f'Произведение {i}', rng.randint(1950, 2020),
+                rng.randint(1, 5)) for i in range(1, titles + 1)])
+    write_csv(os.path.join(path, 'genre_title.csv'),
+              ('id', 'title_id', 'genre_id'),
+              [(i, i, rng.randint(1, 10)) for i in range(1, titles + 1)])
+    pairs = set()
+    while len(pairs) < reviews:
+        pairs.add((rng.randint(1, titles), rng.randint(1, users)))
+    write_csv(os.path.join(path, 'review.csv'),
+              ('id', 'title_id', 'text', 'author', 'score', 'pub_date'),
+              [(i, title, 'Текст отзыва', author, rng.randint(1, 10),
+                '2021-12-01T10:00:00Z')
+               for i, (title, author) in enumerate(sorted(pairs), 1)])
+    write_csv(os.path.join(path, 'comments.csv'),
+              ('id', 'review_id', 'text', 'author', 'pub_date'),
+              [(i, rng.randint(1, reviews), 'Комментарий',
+                rng.randint(1, users), '2021-12-02T10:00:00Z')
+               for i in range(1, reviews + 1)])
+
+
+def legacy_import(path):
+    """Прежняя команда import: update_or_create на каждую строку.
+
+    Файлы обрабатываются в порядке зависимостей, иначе прежняя версия
+    падает на внешних ключах; genre_title.csv она не загружала.
+    """
+    from reviews.models import Category, Comment, Genre, Review, Title
+    from users.models import User
+
+    for name in ('category.csv', 'genre.csv', 'users.csv', 'titles.csv',
+                 'review.csv', 'comments.csv'):
+        csv_file = os.path.join(path, name)
+        with open(csv_file, newline='', encoding='utf-8') as f:
+            reader = csv.DictReader(f)
+            for row in reader:
+                if os.path.basename(csv_file) == 'category.csv':
+                    Category.objects.update_or_create(
+                        id=int(row['id']), name=row['name'],
+                        slug=row['slug'])
+                if os.path.basename(csv_file) == 'genre.csv':
+                    Genre.objects.update_or_create(
+                        id=int(row['id']), name=row['name'],
+                        slug=row['slug'])
+                if os.path.basename(csv_file) == 'titles.csv':
+                    Title.objects.update_or_create(
+                        id=int(row['id']), name=row['name'],
+                        year=row['year'], category_id=row['category'])
+                if os.path.basename(csv_file) == 'users.csv':
+                    User.objects.update_or_create(
+                        id=int(row['id']), username=row['username'],
+                        email=row['email'], role=row['role'])
+                if os.path.basename(csv_file) == 'review.csv':
+                    Review.objects.update_or_create(
+                        id=int(row['id']), title_id=row['title_id'],
+                        text=row['text'], author_id=row['author'],
+                        score=row['score'], pub_date=row['pub_date'])
+                if os.path.basename(csv_file) == 'comments.csv':
+                    Comment.objects.update_or_create(
+                        id=int(row['id']), review_id=row['review_id'],
+                        text=row['text'], author_id=row['author'],
+                        pub_date=row['pub_date'])
+
+
+def count_rows(path):
+    total = 0
+    for name in os.listdir(path):
+        if name.endswith('.csv'):
+            with open(os.path.join(path, name), encoding='utf-8') as f:
+                total += sum(1 for _ in f) - 1
+    return total
+
+
+def timed(function):
+    from django.core.management import call_command
+    call_command('flush', interactive=False, verbosity=0)
+    started = time.perf_counter()
+    function()
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--reviews', type=int, default=5000)
+    parser.add_argument('--batch-size', type=int, default=5000)
+    parser.add_argument('--settings-db', action='store_true')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        setup_django(args.settings_db, workdir)
+        from django.core.management import call_command
+
+        data = os.path.join(workdir, 'data')
+        os.mkdir(data)
+        generate(data, args.reviews)
+        rows = count_rows(data)
+        legacy = timed(lambda: legacy_import(data))
+        bulk = timed(lambda: call_command(
+            'import', path=data, batch_size=args.batch_size,
+            stdout=StringIO()))
+    from django.db import connection
+    print(json.dumps({
+        'database': connection.vendor,
+        'rows': rows,
+        'legacy_seconds': round(legacy, 3),
+        'bulk_seconds': round(bulk, 3),
+        'bulk_rows_per_second': round(rows / bulk),
+        'speedup': round(legacy / bulk, 1),
+    }, indent=2))
+
+
+if __name__ == '__main__':
+    main()
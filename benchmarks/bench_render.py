@@ -0,0 +1,113 @@
+"""Процессорное время на страницу списков API.
+
+Сериализатор DRF и JSONRenderer (прежний путь) против строк values()
+(api/rows.py) с JSONRenderer и с FastJSONRenderer на orjson. Кэш ответов
+отключён, вьюха вызывается без middleware, время - time.process_time().
+Запуск из корня репозитория:
+
+    python benchmarks/bench_render.py --reviews 20000
+
+По умолчанию работает на временной базе SQLite, с --settings-db - на базе
+из переменных окружения DB_*, как в docker-compose (база будет очищена!).
+Результат печатается в формате JSON.
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+from io import StringIO
+
+from bench_import import setup_django
+
+PAGES = (
+    ('titles-list', '/api/v1/titles/?page=2'),
+    ('reviews-list', '/api/v1/titles/{title}/reviews/'),
+    ('comments-list',
+     '/api/v1/titles/{review_title}/reviews/{review}/comments/'),
+)
+
+
+def page_urls():
+    from django.db.models import Count
+
+    from reviews.models import Review, Title
+
+    title = Title.objects.order_by('-review_count').values_list(
+        'id', flat=True).first()
+    review = Review.objects.annotate(count=Count('comments')).order_by(
+        '-count').values('id', 'title_id').first()
+    urls = {'title': title, 'review': review['id'],
+            'review_title': review['title_id']}
+    return [(name, url.format(**urls)) for name, url in PAGES]
+
+
+def cpu_per_page(url, renderer, values_lists, repeat):
+    from django.test import override_settings
+    from django.urls import resolve
+    from rest_framework.test import APIRequestFactory
+
+    match = resolve(url.split('?')[0])
+    factory = APIRequestFactory()
+    with override_settings(API_VALUES_LISTS=values_lists):
+        started = time.process_time()
+        for _ in range(repeat):
+            response = match.func(factory.get(url), **match.kwargs)
+            response.accepted_renderer = renderer
+            response.render()
+        elapsed = time.process_time() - started
+    return elapsed / repeat * 1000, response.content
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--reviews', type=int, default=20000)
+    parser.add_argument('--repeat', type=int, default=200)
+    parser.add_argument('--settings-db', action='store_true')
+    args = parser.parse_args()
+
+    os.environ['CACHE_BACKEND'] = (
+        'django.core.cache.backends.dummy.DummyCache')
+    with tempfile.TemporaryDirectory() as workdir:
+        setup_django(args.settings_db, workdir)
+        from django.core.management import call_command
+        from django.db import connection
+        from rest_framework.renderers import JSONRenderer
+
+        from api.renderers import FastJSONRenderer, orjson
+
+        call_command('flush', interactive=False, verbosity=0)
+        scale = max(args.reviews // 20, 10)
+        call_command('generate_data', users=scale, categories=5, genres=10,
+                     titles=scale, reviews=args.reviews,
+                     comments=args.reviews, stdout=StringIO())
+        modes = (
+            ('serializer_json_ms', JSONRenderer(), False),
+            ('values_json_ms', JSONRenderer(), True),
+            ('values_fast_json_ms', FastJSONRenderer(), True),
+        )
+        results = {}
+        for name, url in page_urls():
+            result, contents = {'url': url}, set()
+            for mode, renderer, values_lists in modes:
+                # Первый вызов прогревает разбор сериализаторов и запросы.
+                cpu_per_page(url, renderer, values_lists, 1)
+                ms, content = cpu_per_page(
+                    url, renderer, values_lists, args.repeat)
+                result[mode] = round(ms, 2)
+                contents.add(content)
+            result['bytes'] = len(content)
+            result['identical'] = len(contents) == 1
+            result['speedup'] = round(
+                result['serializer_json_ms'] / result['values_fast_json_ms'],
+                1)
+            results[name] = result
+        print(json.dumps({
+            'database': connection.vendor,
+            'orjson': orjson is not None,
+            'pages': results,
+        }, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,60 @@
+import pytest
+
+
+@pytest.fixture
+def category():
+    from reviews.models import Category
+    return Category.objects.create(name='Фильм', slug='movie')
+
+
+@pytest.fixture
+def genres():
+    from reviews.models import Genre
+    return [
+        Genre.objects.create(name='Драма', slug='drama'),
+        Genre.objects.create(name='Комедия', slug='comedy'),
+    ]
+
+
+@pytest.fixture
+def title(category, genres):
+    from reviews.models import Title
+    title = Title.objects.create(
+        name='Начало', year=2010, category=category,
+        description='Фильм о снах')
+    title.genre.set(genres)
+    return title
+
+
+@pytest.fixture
+def review(title, user):
+    from reviews.models import Review
+    return Review.objects.create(
+        title=title, author=user, text='Хороший фильм', score=8)
+
+
+@pytest.fixture
+def make_catalog(title, review, genres, django_user_model):
+    """Фабрика каталога: каждый вызов добавляет size произведений,
+    а также size отзывов на title и комментариев к review."""
+    from itertools import count
+
+    from reviews.models import Comment, Review, Title
+
+    numbers = count()
+
+    def make(size):
+        for _ in range(size):
+            number = next(numbers)
+            author = django_user_model.objects.create_user(
+                username=f'author{number}',
+                email=f'author{number}@yamdb.fake')
+            extra = Title.objects.create(
+                name=f'Произведение {number}', year=2000 + number % 20,
+                category=title.category)
+            extra.genre.set(genres)
+            Review.objects.create(
+                title=title, author=author, text='Отзыв', score=7)
+            Comment.objects.create(
+                review=review, author=author, text='Комментарий')
+    return make
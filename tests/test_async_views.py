@@ -0,0 +1,66 @@
+import asyncio
+import json
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.test import RequestFactory
+
+
+@pytest.fixture
+def asgi_router(settings):
+    from api.asynchronous import AsyncReadRouter
+    from api.views import GenreViewSet, TitleViewSet
+
+    settings.SERVER_MODE = 'asgi'
+    router = AsyncReadRouter()
+    router.register('titles', TitleViewSet, basename='titles')
+    router.register('genres', GenreViewSet, basename='genres')
+    return {url.name: url.callback for url in router.urls}
+
+
+class TestAsyncReadRouter:
+
+    def test_hot_reads_are_async_in_asgi_mode(self, asgi_router):
+        assert asyncio.iscoroutinefunction(asgi_router['titles-list'])
+        assert asyncio.iscoroutinefunction(asgi_router['titles-detail'])
+        assert not asyncio.iscoroutinefunction(asgi_router['genres-list']), (
+            'Проверьте, что асинхронными становятся только ASYNC_READ_ROUTES'
+        )
+
+    def test_wsgi_mode_keeps_sync_views(self, settings):
+        from api.asynchronous import AsyncReadRouter
+        from api.views import TitleViewSet
+
+        settings.SERVER_MODE = 'wsgi'
+        router = AsyncReadRouter()
+        router.register('titles', TitleViewSet, basename='titles')
+        assert not any(asyncio.iscoroutinefunction(url.callback)
+                       for url in router.urls)
+
+
+@pytest.mark.django_db(transaction=True)
+class TestAsyncReadViews:
+
+    def test_list_and_detail(self, asgi_router, title):
+        factory = RequestFactory()
+        response = async_to_sync(asgi_router['titles-list'])(
+            factory.get('/api/v1/titles/'))
+        assert response.status_code == 200
+        results = json.loads(response.content)['results']
+        assert [item['name'] for item in results] == ['Начало'], (
+            'Проверьте, что асинхронный список отдаёт те же данные'
+        )
+        response = async_to_sync(asgi_router['titles-detail'])(
+            factory.get(f'/api/v1/titles/{title.id}/'), pk=title.id)
+        assert response.status_code == 200
+        assert json.loads(response.content)['id'] == title.id
+
+    def test_writes_still_work(self, asgi_router, admin, category):
+        from rest_framework.test import force_authenticate
+
+        request = RequestFactory().post(
+            '/api/v1/titles/', {'name': 'Новое', 'year': 2000,
+                                'category': category.slug})
+        force_authenticate(request, admin)
+        response = async_to_sync(asgi_router['titles-list'])(request)
+        assert response.status_code == 201, response.content
@@ -0,0 +1,66 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+@pytest.mark.django_db
+class TestClaimsAuthentication:
+
+    def test_token_has_claims(self, client, user):
+        from rest_framework_simplejwt.tokens import AccessToken
+
+        from users.utils import issue_auth_code
+
+        response = client.post('/api/v1/auth/token/', {
+            'username': user.username,
+            'confirmation_code': issue_auth_code(user),
+        })
+        assert response.status_code == 200
+        token = AccessToken(response.json()['token'])
+        assert (token['username'], token['role'], token['is_superuser']) == (
+            'TestUser', 'user', False), (
+            'Проверьте, что токен содержит username, role и is_superuser'
+        )
+
+    def test_no_user_query_per_request(self, user_client, title):
+        user_client.get('/api/v1/titles/?year=2010')
+        with CaptureQueriesContext(connection) as context:
+            response = user_client.get('/api/v1/titles/?year=2011')
+        assert response.status_code == 200
+        assert not any('"users_user"' in query['sql']
+                       for query in context.captured_queries), (
+            'Проверьте, что пользователь по токену не загружается из базы'
+        )
+
+    def test_role_change_revokes_token(self, moderator, moderator_client,
+                                       review):
+        url = f'/api/v1/titles/{review.title_id}/reviews/{review.id}/'
+        moderator.role = 'user'
+        moderator.save()
+        response = moderator_client.patch(url, {'text': 'Правка'})
+        assert response.status_code == 401, (
+            'Проверьте, что смена роли отзывает выданные токены'
+        )
+
+    def test_deleted_user_is_rejected(self, user, user_client):
+        user.delete()
+        assert user_client.get('/api/v1/users/me/').status_code == 401
+
+    def test_token_without_claims(self, moderator, review):
+        from rest_framework.test import APIClient
+        from rest_framework_simplejwt.tokens import AccessToken
+
+        client = APIClient()
+        client.credentials(
+            HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(moderator)}')
+        url = f'/api/v1/titles/{review.title_id}/reviews/{review.id}/'
+        assert client.patch(url, {'text': 'Правка'}).status_code == 200, (
+            'Проверьте, что токены без claims работают с текущей ролью'
+        )
+
+    def test_profile_reads_full_user(self, user, user_client):
+        response = user_client.patch('/api/v1/users/me/', {'bio': 'О себе'})
+        assert response.status_code == 200
+        assert response.json()['email'] == 'testuser@yamdb.fake'
+        user.refresh_from_db()
+        assert (user.bio, user.email) == ('О себе', 'testuser@yamdb.fake')
@@ -0,0 +1,175 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+def request(client, method, url, data):
+    with CaptureQueriesContext(connection) as context:
+        response = getattr(client, method)(url, data, format='json')
+    return response, [query['sql'] for query in context.captured_queries]
+
+
+@pytest.mark.django_db
+class TestBulkCatalog:
+
+    def test_admin_only(self, user_client, moderator_client):
+        for client in (user_client, moderator_client):
+            response = client.post('/api/v1/genres/bulk/', [
+                {'name': 'Ужасы', 'slug': 'horror'}], format='json')
+            assert response.status_code == 403, (
+                'Проверьте, что пакетные запросы доступны только '
+                'администратору'
+            )
+
+    def test_create_titles_resolves_slugs_once(self, admin_client, genres,
+                                               category):
+        from reviews.models import Title
+
+        titles = [{'name': f'Произведение {i}', 'year': 2000 + i,
+                   'category': category.slug,
+                   'genre': [genre.slug for genre in genres]}
+                  for i in range(20)]
+        _, few = request(admin_client, 'post', '/api/v1/titles/bulk/',
+                         titles[:2])
+        response, many = request(admin_client, 'post',
+                                 '/api/v1/titles/bulk/', titles)
+        assert response.status_code == 201, response.json()
+        assert [title['name'] for title in response.json()] == [
+            title['name'] for title in titles]
+        assert response.json()[0]['genre'] == ['drama', 'comedy']
+        assert Title.objects.filter(genre__slug='drama').count() == 22
+        slug_queries = [sql for sql in many if '"slug" IN' in sql]
+        assert len(slug_queries) == 2, (
+            'Проверьте, что slug жанров и категорий разрешаются одним '
+            'запросом на пакет'
+        )
+        if connection.features.can_return_rows_from_bulk_insert:
+            assert len(many) == len(few), (
+                'Проверьте, что число запросов не зависит от размера пакета'
+            )
+
+    def test_errors_are_reported_per_item(self, admin_client, genres,
+                                          category):
+        from reviews.models import Title
+
+        response = admin_client.post('/api/v1/titles/bulk/', [
+            {'name': 'Верное', 'year': 2000, 'category': category.slug,
+             'genre': ['drama']},
+            {'name': 'Без жанра', 'year': 2000, 'category': 'missing',
+             'genre': ['drama', 'missing']},
+            {'name': 'Из будущего', 'year': 3000, 'category': category.slug,
+             'genre': []},
+        ], format='json')
+        assert response.status_code == 400
+        errors = response.json()
+        assert errors[0] == {}
+        assert set(errors[1]) == {'category', 'genre'}
+        assert set(errors[2]) == {'year'}
+        assert not Title.objects.filter(name='Верное').exists(), (
+            'Проверьте, что пакет с ошибками не записывается'
+        )
+
+    @pytest.mark.parametrize('method', ('post', 'patch'))
+    def test_items_must_be_objects(self, admin_client, title, method):
+        response = admin_client.generic(
+            method.upper(), '/api/v1/titles/bulk/',
+            '[null, "строка", 1, []]', content_type='application/json')
+        assert response.status_code == 400, (
+            'Проверьте, что элементы пакета не-объекты дают ошибку 400'
+        )
+        assert all('non_field_errors' in errors
+                   for errors in response.json())
+
+    def test_unique_within_batch_and_database(self, admin_client, genres):
+        response = admin_client.post('/api/v1/genres/bulk/', [
+            {'name': 'Ужасы', 'slug': 'horror'},
+            {'name': 'Ужасы', 'slug': 'horror-2'},
+            {'name': 'Драма 2', 'slug': 'drama'},
+        ], format='json')
+        assert response.status_code == 400
+        errors = response.json()
+        assert errors[0] == {}
+        assert set(errors[1]) == {'name'}
+        assert set(errors[2]) == {'slug'}
+
+    @pytest.mark.parametrize('resource', ('genres', 'categories'))
+    def test_bulk_slug_is_reserved(self, admin_client, resource):
+        response = admin_client.post(f'/api/v1/{resource}/', {
+            'name': 'Пакет', 'slug': 'bulk'})
+        assert response.status_code == 400, (
+            'Проверьте, что slug bulk занят путём пакетных запросов'
+        )
+        response = admin_client.post(f'/api/v1/{resource}/bulk/', [
+            {'name': 'Пакет', 'slug': 'bulk'}], format='json')
+        assert response.status_code == 400
+        assert set(response.json()[0]) == {'slug'}
+
+    def test_update_titles(self, admin_client, title, genres, category):
+        from reviews.models import Category, Title
+
+        other = Category.objects.create(name='Книга', slug='book')
+        modified = title.modified
+        response = admin_client.patch('/api/v1/titles/bulk/', [
+            {'id': title.id, 'category': other.slug, 'genre': ['comedy']},
+        ], format='json')
+        assert response.status_code == 200, response.json()
+        assert response.json() == [{
+            'id': title.id, 'genre': ['comedy'], 'category': 'book',
+            'name': title.name, 'description': title.description,
+            'year': title.year}]
+        title = Title.objects.get(pk=title.pk)
+        assert title.modified > modified, (
+            'Проверьте, что пакетное обновление меняет отметку modified'
+        )
+        response = admin_client.patch('/api/v1/titles/bulk/', [
+            {'id': str(title.id), 'year': 2011}], format='json')
+        assert response.status_code == 200, (
+            'Проверьте, что id строкой приводится к целому'
+        )
+        response = admin_client.patch('/api/v1/titles/bulk/', [
+            {'id': title.id, 'year': 2011}, {'id': str(title.id)},
+            {'id': 10 ** 6}, {'year': 2011}, {'id': 'abc'}], format='json')
+        assert response.status_code == 400
+        assert [set(errors) for errors in response.json()] == [
+            set(), {'id'}, {'id'}, {'id'}, {'id'}]
+
+    def test_categories_cannot_be_updated(self, admin_client, category):
+        response = admin_client.patch('/api/v1/categories/bulk/', [
+            {'id': category.id, 'name': 'Кино'}], format='json')
+        assert response.status_code == 405
+
+    def test_destroy(self, admin_client, title, genres):
+        from reviews.models import Genre, Title
+
+        response = admin_client.delete('/api/v1/genres/bulk/', [
+            'drama', 'missing'], format='json')
+        assert response.status_code == 400
+        assert response.json() == [{}, {'slug': ['Объект missing не найден']}]
+        response = admin_client.delete('/api/v1/genres/bulk/', [
+            'drama', 'comedy'], format='json')
+        assert response.status_code == 204
+        assert not Genre.objects.exists()
+        response = admin_client.delete('/api/v1/titles/bulk/', [
+            str(title.id), 'abc'], format='json')
+        assert response.json() == [{}, {'id': ['Объект abc не найден']}]
+        response = admin_client.delete('/api/v1/titles/bulk/', [
+            str(title.id)], format='json')
+        assert response.status_code == 204
+        assert not Title.objects.exists()
+
+    def test_invalidates_cached_lists(self, admin_client, category):
+        assert admin_client.get('/api/v1/titles/').json()['count'] == 0
+        admin_client.post('/api/v1/titles/bulk/', [
+            {'name': 'Новое', 'year': 2020, 'category': category.slug,
+             'genre': []}], format='json')
+        assert admin_client.get('/api/v1/titles/').json()['count'] == 1, (
+            'Проверьте, что пакетная запись сбрасывает кэш списков'
+        )
+
+    def test_batch_size_limit(self, admin_client, settings):
+        settings.API_BULK_MAX_ITEMS = 2
+        response = admin_client.post('/api/v1/genres/bulk/', [
+            {'name': f'Жанр {i}', 'slug': f'genre-{i}'} for i in range(3)],
+            format='json')
+        assert response.status_code == 400
+        assert 'non_field_errors' in response.json()
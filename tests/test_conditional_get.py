@@ -0,0 +1,93 @@
+from io import StringIO
+
+import pytest
+from django.core.cache import cache
+from django.core.management import call_command
+
+
+def etag(client, url):
+    response = client.get(url)
+    assert response.status_code == 200
+    assert response.has_header('Last-Modified'), (
+        f'Проверьте, что GET {url} возвращает заголовок Last-Modified'
+    )
+    return response['ETag']
+
+
+@pytest.mark.django_db
+class TestConditionalGet:
+
+    def test_not_modified_before_serialization(self, client, title,
+                                               django_assert_num_queries):
+        url = f'/api/v1/titles/{title.id}/'
+        response = client.get(url)
+        cache.clear()
+        with django_assert_num_queries(1):
+            not_modified = client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        assert not_modified.status_code == 304, (
+            'Проверьте, что If-None-Match с текущим ETag возвращает 304 '
+            'по одному запросу отметки изменения'
+        )
+        assert client.get(
+            url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified'],
+        ).status_code == 304
+
+    def test_etag_depends_on_query(self, client, title):
+        assert etag(client, '/api/v1/titles/') != etag(
+            client, '/api/v1/titles/?year=2010')
+
+    def test_review_changes_title_and_reviews(self, client, title, review,
+                                              moderator):
+        from reviews.models import Review
+
+        detail = f'/api/v1/titles/{title.id}/'
+        reviews = f'{detail}reviews/'
+        before = etag(client, detail), etag(client, reviews)
+        review.text = 'Исправленный текст'
+        review.save()
+        middle = etag(client, detail), etag(client, reviews)
+        assert middle[0] != before[0] and middle[1] != before[1], (
+            'Проверьте, что правка отзыва меняет ETag произведения и отзывов'
+        )
+        Review.objects.create(
+            title=title, author=moderator, text='Ещё', score=1)
+        assert etag(client, reviews) != middle[1]
+
+    def test_deletions_change_etag(self, client, title, review, user_client):
+        from reviews.models import Comment, Title
+
+        comments = f'/api/v1/titles/{title.id}/reviews/{review.id}/comments/'
+        comment = Comment.objects.create(
+            review=review, author=review.author, text='Первый')
+        before = etag(client, comments)
+        comment.delete()
+        assert etag(client, comments) != before, (
+            'Проверьте, что удаление комментария меняет ETag списка'
+        )
+
+        extra = Title.objects.create(name='Матрица', year=1999)
+        before = etag(client, '/api/v1/titles/')
+        extra.delete()
+        assert etag(client, '/api/v1/titles/') != before
+
+    def test_genre_rename_changes_title(self, client, title, genres):
+        url = f'/api/v1/titles/{title.id}/'
+        before = etag(client, url)
+        genres[0].name = 'Трагедия'
+        genres[0].save()
+        assert etag(client, url) != before, (
+            'Проверьте, что переименование жанра меняет ETag произведения'
+        )
+
+    def test_import_changes_comments(self, client, title, review, tmp_path):
+        url = f'/api/v1/titles/{title.id}/reviews/{review.id}/comments/'
+        before = etag(client, url)
+        (tmp_path / 'comments.csv').write_text(
+            'id,review_id,text,author,pub_date\n'
+            f'50,{review.id},Из выгрузки,{review.author_id},'
+            '2021-12-02T10:00:00Z\n', encoding='utf-8')
+        call_command('import', path=str(tmp_path), delta=True,
+                     stdout=StringIO())
+        assert etag(client, url) != before, (
+            'Проверьте, что импорт комментариев меняет ETag их списка'
+        )
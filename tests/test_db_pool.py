@@ -0,0 +1,90 @@
+import threading
+
+import pytest
+
+
+class FakeConnection:
+    def __init__(self):
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+def make_pool(**kwargs):
+    from api_yamdb.db.pool import ConnectionPool
+
+    options = {'max_size': 1, 'timeout': 1}
+    options.update(kwargs)
+    return ConnectionPool(**options)
+
+
+class TestConnectionPool:
+
+    def test_connections_are_reused(self):
+        pool = make_pool()
+        first = pool.acquire(FakeConnection, lambda connection: True)
+        pool.release(first)
+        assert pool.acquire(FakeConnection, lambda c: True) is first, (
+            'Проверьте, что пул переиспользует возвращённое соединение'
+        )
+        assert pool.stats.created == 1 and pool.in_use == 1
+
+    def test_size_is_bounded(self):
+        from api_yamdb.db.pool import PoolTimeout
+
+        pool = make_pool(timeout=0.05)
+        pool.acquire(FakeConnection, lambda c: True)
+        with pytest.raises(PoolTimeout):
+            pool.acquire(FakeConnection, lambda c: True)
+        assert pool.stats.timeouts == 1
+
+    def test_wait_is_measured(self):
+        pool = make_pool()
+        held = pool.acquire(FakeConnection, lambda c: True)
+        timer = threading.Timer(0.05, pool.release, (held,))
+        timer.start()
+        assert pool.acquire(FakeConnection, lambda c: True) is held
+        timer.join()
+        assert pool.stats.acquired == 2
+        assert pool.stats.wait_seconds_max >= 0.04, (
+            'Проверьте, что пул учитывает время ожидания соединения'
+        )
+        assert sum(pool.stats.wait_buckets) == 2
+
+    @pytest.mark.django_db
+    def test_metrics_are_exported(self, client):
+        pool = make_pool(alias='metrics-test')
+        held = pool.acquire(FakeConnection, lambda c: True)
+        content = client.get('/metrics').content.decode()
+        for line in (
+                'yamdb_db_pool_connections_in_use{alias="metrics-test"} 1.0',
+                'yamdb_db_pool_connections_idle{alias="metrics-test"} 0.0',
+                'yamdb_db_pool_wait_seconds_count{alias="metrics-test"} 1.0',
+                'yamdb_db_pool_events_total{alias="metrics-test",'
+                'event="created"} 1.0'):
+            assert line in content, (
+                'Проверьте, что метрики пула отдаются на /metrics'
+            )
+        pool.release(held)
+        content = client.get('/metrics').content.decode()
+        assert ('yamdb_db_pool_connections_idle{alias="metrics-test"} 1.0'
+                in content)
+
+    def test_broken_connections_are_replaced(self):
+        pool = make_pool(health_check_interval=0)
+        broken = pool.acquire(FakeConnection, lambda c: True)
+        pool.release(broken)
+        fresh = pool.acquire(FakeConnection, lambda c: False)
+        assert fresh is not broken and broken.closed, (
+            'Проверьте, что неживое соединение из пула закрывается'
+        )
+        pool.release(fresh, reusable=False)
+        assert fresh.closed and pool.in_use == 0
+
+
+def test_backend_loads():
+    from django.db.utils import load_backend
+
+    backend = load_backend('api_yamdb.db.backends.postgresql')
+    assert backend.DatabaseWrapper.vendor == 'postgresql'
@@ -24,3 +24,22 @@ class TestDockerfileCompose:
         assert re.search(r'image:\s+postgres:', docker_compose), (
             'Проверьте, что  в файл docker-compose.yaml добавлен образ postgres:latest'
         )
+
+    def test_export_is_served_by_threaded_workers(self):
+        with open(os.path.join(infra_dir_path, 'docker-compose.yaml')) as f:
+            docker_compose = f.read()
+        with open(os.path.join(infra_dir_path, 'nginx', 'default.conf')) as f:
+            nginx = f.read()
+        export = re.search(r'\n  export:\n(.*?)\n  \w', docker_compose,
+                           re.DOTALL)
+        assert export, (
+            'Проверьте, что в docker-compose.yaml есть сервис export'
+        )
+        threads = re.search(r'GUNICORN_THREADS=(\d+)', export.group(1))
+        assert threads and int(threads.group(1)) > 1, (
+            'Проверьте, что выгрузки обслуживают потоковые воркеры gunicorn'
+        )
+        assert re.search(r'location /api/v1/export/ \{[^}]*'
+                         r'proxy_pass http://export:8000;', nginx), (
+            'Проверьте, что nginx направляет выгрузки в сервис export'
+        )
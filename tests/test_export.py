@@ -0,0 +1,122 @@
+import csv
+import io
+import json
+from io import StringIO
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.core.management import call_command
+
+
+def content(response):
+    assert response.status_code == 200, response
+    assert response.streaming, (
+        'Проверьте, что выгрузка отдаётся потоковым ответом'
+    )
+    return b''.join(response.streaming_content).decode()
+
+
+def fields(model):
+    # Отметку modified import ставит заново.
+    return [field.attname for field in model._meta.concrete_fields
+            if field.name != 'modified']
+
+
+@pytest.mark.django_db
+class TestExport:
+
+    @pytest.mark.parametrize('client_name, status', (
+        ('client', 401), ('user_client', 403), ('moderator_client', 403)))
+    def test_admin_only(self, request, title, client_name, status):
+        client = request.getfixturevalue(client_name)
+        response = client.get('/api/v1/export/titles.csv')
+        assert response.status_code == status, (
+            'Проверьте, что выгрузка доступна только администратору'
+        )
+
+    def test_unknown_dataset(self, admin_client):
+        response = admin_client.get('/api/v1/export/users.csv',
+                                    HTTP_ACCEPT='text/csv')
+        assert response.status_code == 404
+        assert response['Content-Type'] == 'application/json'
+
+    def test_titles_csv(self, admin_client, title, review, settings):
+        settings.EXPORT_CHUNK_SIZE = 1
+        response = admin_client.get('/api/v1/export/titles.csv')
+        assert response['Content-Type'] == 'text/csv; charset=utf-8'
+        assert response['Content-Disposition'] == (
+            'attachment; filename="titles.csv"')
+        rows = list(csv.DictReader(io.StringIO(content(response))))
+        genres = ','.join(str(genre.id) for genre in title.genre.order_by(
+            'id'))
+        assert rows == [{
+            'id': str(title.id), 'name': title.name, 'year': str(title.year),
+            'category': str(title.category_id),
+            'description': title.description or '', 'genre': genres,
+            'rating': '8.0'}]
+
+    def test_reviews_ndjson(self, admin_client, review):
+        response = admin_client.get('/api/v1/export/reviews.ndjson')
+        assert response['Content-Type'] == 'application/x-ndjson'
+        lines = content(response).splitlines()
+        assert [json.loads(line) for line in lines] == [{
+            'id': review.id, 'title_id': review.title_id,
+            'text': review.text, 'author': review.author_id, 'score': 8,
+            'pub_date': review.pub_date.isoformat().replace('+00:00', 'Z')}]
+
+    def test_csv_round_trip_through_import(self, admin_client, review,
+                                           tmp_path):
+        from reviews.models import Comment, Review, Title
+
+        Comment.objects.create(review=review, author=review.author,
+                               text='Текст, с "кавычками"\nи строками')
+        datasets = ('categories', 'genres', 'titles', 'genre_title',
+                    'reviews', 'comments')
+        expected = {}
+        for model in (Title, Review, Comment):
+            expected[model] = list(model.objects.order_by('pk').values(
+                *fields(model)))
+        for dataset in datasets:
+            response = admin_client.get(f'/api/v1/export/{dataset}.csv')
+            filename = response['Content-Disposition'].split('"')[1]
+            (tmp_path / filename).write_text(content(response),
+                                             encoding='utf-8')
+        Title.objects.all().delete()
+        call_command('import', path=str(tmp_path), stdout=StringIO())
+        for model, rows in expected.items():
+            assert list(model.objects.order_by('pk').values(
+                *fields(model))) == rows, (
+                'Проверьте, что выгрузку можно загрузить командой import'
+            )
+
+
+@pytest.mark.django_db(transaction=True)
+class TestStreamingASGIHandler:
+
+    def test_streams_database_rows(self, admin, review):
+        from rest_framework_simplejwt.tokens import AccessToken
+
+        from api.asynchronous import StreamingASGIHandler
+
+        token = str(AccessToken.for_user(admin))
+        scope = {
+            'type': 'http', 'method': 'GET', 'path': '/api/v1/export/'
+            'reviews.ndjson', 'query_string': b'', 'headers': [
+                (b'authorization', f'Bearer {token}'.encode())],
+        }
+        messages = []
+
+        async def receive():
+            return {'type': 'http.request', 'body': b''}
+
+        async def send(message):
+            messages.append(message)
+
+        handler = StreamingASGIHandler()
+        async_to_sync(handler.__call__)(scope, receive, send)
+        assert messages[0]['status'] == 200, messages
+        body = b''.join(message.get('body', b'')
+                        for message in messages[1:])
+        assert json.loads(body)['id'] == review.id, (
+            'Проверьте, что под ASGI выгрузка читает базу вне цикла событий'
+        )
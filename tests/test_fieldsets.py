@@ -0,0 +1,89 @@
+import pytest
+from django.core.cache import cache
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+
+
+def get(client, url):
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(url)
+    assert response.status_code == 200, response.content
+    return response, ' '.join(
+        query['sql'] for query in context.captured_queries)
+
+
+@pytest.mark.django_db
+class TestSparseFieldsets:
+
+    def test_titles_fields_defer_columns_and_relations(self, client, title):
+        response, sql = get(client, '/api/v1/titles/?fields=id,name,rating')
+        assert response.json()['results'] == [
+            {'id': title.id, 'name': title.name, 'rating': None}]
+        assert 'description' not in sql, (
+            'Проверьте, что поля не из ?fields= не читаются из базы'
+        )
+        assert 'reviews_genre' not in sql and 'reviews_category' not in sql, (
+            'Проверьте, что связи не из ?fields= не запрашиваются'
+        )
+
+    def test_relations_are_compact_unless_expanded(self, client, title):
+        response, _ = get(
+            client, '/api/v1/titles/?fields=id,category&expand=genre')
+        assert response.json()['results'] == [{
+            'id': title.id,
+            'genre': [{'name': 'Драма', 'slug': 'drama'},
+                      {'name': 'Комедия', 'slug': 'comedy'}],
+            'category': 'movie',
+        }]
+
+    def test_retrieve_uses_fieldset(self, client, title):
+        response, sql = get(
+            client, f'/api/v1/titles/{title.id}/?fields=name,genre')
+        assert response.json() == {'genre': ['drama', 'comedy'],
+                                   'name': title.name}
+        assert 'description' not in sql
+
+    def test_expand_review_author(self, client, title, review):
+        response, sql = get(
+            client, f'/api/v1/titles/{title.id}/reviews/'
+                    '?fields=id,score&expand=author')
+        assert response.json()['results'] == [{
+            'id': review.id,
+            'author': {'username': review.author.username,
+                       'first_name': '', 'last_name': ''},
+            'score': 8,
+        }]
+        assert '"text"' not in sql
+
+    @pytest.mark.parametrize('url', (
+        '/api/v1/titles/?fields=name,genre,year',
+        '/api/v1/titles/?expand=category,genre',
+        '/api/v1/titles/{title}/reviews/{review}/comments/?expand=author',
+    ))
+    def test_serializer_path_matches_values_path(self, client, title,
+                                                 review, url):
+        from reviews.models import Comment
+
+        url = url.format(title=title.id, review=review.id)
+        Comment.objects.create(review=review, author=review.author,
+                               text='Комментарий')
+        with override_settings(API_VALUES_LISTS=False):
+            expected, _ = get(client, url)
+        cache.clear()
+        actual, _ = get(client, url)
+        assert actual.content == expected.content
+
+    @pytest.mark.parametrize('query', ('?fields=', '?fields=%20,', '?expand='))
+    def test_empty_params_are_ignored(self, client, title, query):
+        expected, _ = get(client, '/api/v1/titles/')
+        cache.clear()
+        actual, _ = get(client, f'/api/v1/titles/{query}')
+        assert actual.json() == expected.json(), (
+            'Проверьте, что пустой ?fields= отдаёт все поля'
+        )
+
+    def test_unknown_fields_are_rejected(self, client, title):
+        response = client.get('/api/v1/titles/?fields=id,secret&expand=year')
+        assert response.status_code == 400
+        assert set(response.json()) == {'fields', 'expand'}
@@ -0,0 +1,85 @@
+from collections import Counter
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+
+OPTIONS = {'users': 20, 'categories': 3, 'genres': 5, 'titles': 30,
+           'reviews': 200, 'comments': 150, 'seed': 7}
+
+
+def generate(**options):
+    call_command('generate_data', stdout=StringIO(),
+                 **dict(OPTIONS, **options))
+
+
+def snapshot():
+    from reviews.models import Comment, Review, Title
+
+    return (
+        list(Title.objects.order_by('id').values_list(
+            'id', 'name', 'year', 'category_id', 'rating', 'review_count')),
+        list(Review.objects.order_by('id').values_list(
+            'id', 'title_id', 'author_id', 'score', 'text', 'pub_date')),
+        list(Comment.objects.order_by('id').values_list(
+            'id', 'review_id', 'author_id', 'text', 'pub_date')),
+    )
+
+
+@pytest.mark.django_db
+class TestGenerateDataCommand:
+
+    def test_generates_requested_counts(self):
+        from reviews.models import Category, Comment, Genre, Review, Title
+        from users.models import User
+
+        generate()
+
+        assert (User.objects.count(), Category.objects.count(),
+                Genre.objects.count(), Title.objects.count(),
+                Review.objects.count(), Comment.objects.count()) == (
+            20, 3, 5, 30, 200, 150)
+        assert all(title.genre.exists() for title in Title.objects.all()), (
+            'Проверьте, что у каждого произведения есть жанр'
+        )
+
+    def test_same_seed_gives_same_data(self):
+        generate()
+        first = snapshot()
+        call_command('flush', interactive=False, verbosity=0)
+        generate()
+
+        assert snapshot() == first, (
+            'Проверьте, что с тем же --seed генерируются те же данные'
+        )
+
+    def test_reviews_are_valid_and_skewed(self):
+        from reviews.models import Review, Title
+
+        generate(users=100)
+
+        pairs = list(Review.objects.values_list('title_id', 'author_id'))
+        assert len(pairs) == len(set(pairs)), (
+            'Проверьте, что пользователь пишет не больше одного отзыва '
+            'на произведение'
+        )
+        assert set(Review.objects.values_list(
+            'score', flat=True)) <= set(range(1, 11))
+        per_title = Counter(title_id for title_id, _ in pairs)
+        assert per_title.most_common(1)[0][1] >= 5 * 200 // 30, (
+            'Проверьте, что отзывы распределены по закону Ципфа'
+        )
+        title = Title.objects.get(pk=per_title.most_common(1)[0][0])
+        assert title.review_count == per_title[title.pk], (
+            'Проверьте, что после генерации пересчитываются рейтинги'
+        )
+
+    def test_appends_after_existing_rows(self):
+        from reviews.models import Review
+        from users.models import User
+
+        generate()
+        generate(seed=8)
+
+        assert User.objects.count() == 40
+        assert Review.objects.count() == 400
@@ -0,0 +1,114 @@
+import json
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+
+CSV_FILES = {
+    'category.csv': 'id,name,slug\n1,Фильм,movie\n',
+    'genre.csv': 'id,name,slug\n1,Драма,drama\n2,Комедия,comedy\n',
+    'users.csv': (
+        'id,username,email,role,bio,first_name,last_name\n'
+        '100,bingobongo,bingobongo@yamdb.ru,user,,,\n'
+        '101,capt_obvious,capt_obvious@yamdb.ru,admin,,Капитан,\n'
+    ),
+    'titles.csv': (
+        'id,name,year,category\n'
+        '1,Побег из Шоушенка,1994,1\n'
+        '2,Крестный отец,1972,1\n'
+    ),
+    'genre_title.csv': 'id,title_id,genre_id\n1,1,1\n2,2,1\n3,2,2\n',
+    'review.csv': (
+        'id,title_id,text,author,score,pub_date\n'
+        '1,1,"Отзыв, с запятой",100,10,2019-09-24T21:08:21.567Z\n'
+        '2,1,Неплохо,101,7,2019-09-25T21:08:21.567Z\n'
+    ),
+    'comments.csv': (
+        'id,review_id,text,author,pub_date\n'
+        '1,1,Согласен,101,2019-09-26T21:08:21.567Z\n'
+    ),
+}
+
+
+@pytest.fixture
+def data_dir(tmp_path):
+    for name, content in CSV_FILES.items():
+        (tmp_path / name).write_text(content, encoding='utf-8')
+    return tmp_path
+
+
+@pytest.mark.django_db
+class TestImportCommand:
+
+    def test_import_loads_all_tables(self, data_dir):
+        from reviews.models import Comment, Review, Title
+        from users.models import User
+
+        call_command('import', path=str(data_dir), stdout=StringIO())
+        call_command('import', path=str(data_dir), stdout=StringIO())
+
+        assert User.objects.count() == 2
+        assert Comment.objects.count() == 1
+        title = Title.objects.get(pk=1)
+        assert list(title.genre.values_list('slug', flat=True)) == ['drama']
+        assert (title.review_count, title.rating) == (2, 8.5), (
+            'Проверьте, что после импорта пересчитываются рейтинги'
+        )
+        review = Review.objects.get(pk=1)
+        assert review.text == 'Отзыв, с запятой'
+        assert review.pub_date.isoformat().startswith('2019-09-24T21:08'), (
+            'Проверьте, что импорт сохраняет pub_date из csv'
+        )
+        assert not (data_dir / '.import_checkpoint.json').exists()
+
+    def test_import_resumes_from_checkpoint(self, data_dir):
+        from reviews.models import Review
+
+        call_command('import', path=str(data_dir), stdout=StringIO())
+        Review.objects.filter(pk=1).delete()
+        checkpoint = {}
+        for name in ('review.csv', 'comments.csv'):
+            stat = (data_dir / name).stat()
+            checkpoint[name] = {
+                'signature': [stat.st_size, stat.st_mtime], 'rows': 1}
+        (data_dir / '.import_checkpoint.json').write_text(
+            json.dumps(checkpoint))
+
+        output = StringIO()
+        call_command('import', path=str(data_dir), stdout=output)
+        assert list(Review.objects.values_list('pk', flat=True)) == [2], (
+            'Проверьте, что импорт продолжает файл с сохранённой позиции'
+        )
+        lines = output.getvalue().splitlines()
+        reported = [line.split(',')[0] for line in lines
+                    if line.startswith(('review.csv', 'comments.csv'))]
+        assert reported == ['review.csv: 2 строк', 'comments.csv: 1 строк'], (
+            'Проверьте, что о каждом файле, и загруженном до конца, '
+            'сообщается одной строкой прогресса'
+        )
+
+    def test_delta_writes_only_changed_rows(self, data_dir):
+        from reviews.models import Review, Title
+
+        call_command('import', path=str(data_dir), delta=True,
+                     stdout=StringIO())
+        (data_dir / 'review.csv').write_text(
+            'id,title_id,text,author,score,pub_date\n'
+            '1,1,"Отзыв, с запятой",100,4,2019-09-24T21:08:21.567Z\n',
+            encoding='utf-8')
+        Review.objects.filter(pk=1).update(text='Правка через API')
+
+        output = StringIO()
+        call_command('import', path=str(data_dir), delta=True, stdout=output)
+        output = output.getvalue()
+        assert 'titles.csv: без изменений' in output, (
+            'Проверьте, что неизменённые файлы пропускаются целиком'
+        )
+        assert 'review.csv: изменено 1, удалено 1' in output
+        review = Review.objects.get()
+        assert (review.pk, review.score, review.text) == (
+            1, 4, 'Отзыв, с запятой')
+        title = Title.objects.get(pk=1)
+        assert (title.review_count, title.rating) == (1, 4.0), (
+            'Проверьте, что delta-импорт пересчитывает рейтинг'
+        )
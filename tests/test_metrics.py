@@ -0,0 +1,65 @@
+import json
+import logging
+
+import pytest
+from prometheus_client import REGISTRY
+
+
+def sample(name, route, method='GET'):
+    return REGISTRY.get_sample_value(
+        name, {'route': route, 'method': method}) or 0
+
+
+@pytest.mark.django_db
+class TestMetrics:
+
+    def test_requests_are_recorded_by_route(self, client, title):
+        before = sample('yamdb_request_duration_seconds_count', 'titles-list')
+        queries_before = sample('yamdb_request_queries_sum', 'titles-list')
+        assert client.get('/api/v1/titles/').status_code == 200
+        assert sample('yamdb_request_duration_seconds_count',
+                      'titles-list') == before + 1, (
+            'Проверьте, что время запроса учитывается по имени маршрута DRF'
+        )
+        assert sample('yamdb_request_queries_sum',
+                      'titles-list') > queries_before, (
+            'Проверьте, что считаются SQL-запросы запроса'
+        )
+        assert sample('yamdb_response_size_bytes_sum', 'titles-list') > 0
+
+    def test_metrics_endpoint(self, client, title):
+        client.get(f'/api/v1/titles/{title.id}/')
+        response = client.get('/metrics')
+        assert response.status_code == 200
+        assert response['Content-Type'].startswith('text/plain')
+        body = response.content.decode()
+        assert ('yamdb_request_queries_bucket{le="+Inf",method="GET",'
+                'route="titles-detail"}') in body
+
+    def test_over_budget_is_logged(self, client, title, settings, caplog):
+        settings.REQUEST_BUDGETS = {'titles-list': {'queries': 0}}
+        with caplog.at_level(logging.WARNING, logger='api_yamdb.metrics'):
+            client.get('/api/v1/titles/')
+            client.get('/api/v1/genres/')
+        assert len(caplog.records) == 1, (
+            'Проверьте, что предупреждение пишется только для запросов '
+            'сверх бюджета'
+        )
+        record = json.loads(caplog.records[0].getMessage().split(' ', 3)[3])
+        assert record['route'] == 'titles-list'
+        assert record['exceeded'] == ['queries']
+        assert record['queries'] > record['query_budget'] == 0
+
+
+@pytest.mark.parametrize('value, expected', (
+    (None, 20), ('5', 5), ('off', None), ('', None)))
+def test_budget_from_environment(monkeypatch, value, expected):
+    from api_yamdb.settings import env_budget
+
+    if value is None:
+        monkeypatch.delenv('REQUEST_QUERY_BUDGET', raising=False)
+    else:
+        monkeypatch.setenv('REQUEST_QUERY_BUDGET', value)
+    assert env_budget('REQUEST_QUERY_BUDGET', 20, int) == expected, (
+        'Проверьте, что off в переменной окружения отключает бюджет'
+    )
@@ -0,0 +1,76 @@
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+
+
+def send_outbox():
+    call_command('send_outbox', stdout=StringIO())
+
+
+@pytest.mark.django_db
+class TestOutbox:
+
+    def test_signup_enqueues_code(self, client, mailoutbox):
+        from users.models import OutgoingEmail
+
+        response = client.post('/api/v1/auth/signup/', {
+            'username': 'newbie', 'email': 'newbie@yamdb.fake'})
+        assert response.status_code == 200
+        assert mailoutbox == [], (
+            'Проверьте, что регистрация не отправляет письмо в запросе'
+        )
+        assert OutgoingEmail.objects.filter(
+            recipient='newbie@yamdb.fake', sent_at__isnull=True).exists()
+
+        send_outbox()
+        assert [message.to for message in mailoutbox] == [
+            ['newbie@yamdb.fake']]
+        assert not OutgoingEmail.objects.filter(sent_at__isnull=True).exists()
+
+    def test_one_connection_per_batch(self, mailoutbox, monkeypatch):
+        from django.core import mail
+
+        from users.outbox import enqueue_email
+
+        for number in range(3):
+            enqueue_email('Код', 'Текст', f'u{number}@yamdb.fake', 'x@y.z')
+        connections = []
+        original = mail.get_connection
+
+        def get_connection(*args, **kwargs):
+            connections.append(original(*args, **kwargs))
+            return connections[-1]
+
+        monkeypatch.setattr('users.outbox.get_connection', get_connection)
+        send_outbox()
+        assert (len(mailoutbox), len(connections)) == (3, 1), (
+            'Проверьте, что пакет писем отправляется через одно соединение'
+        )
+
+    def test_failed_email_is_retried_later(self, mailoutbox, monkeypatch):
+        from django.core.mail import EmailMessage
+        from django.utils import timezone
+
+        from users.models import OutgoingEmail
+        from users.outbox import enqueue_email
+
+        email = enqueue_email('Код', 'Текст', 'u@yamdb.fake', 'x@y.z')
+
+        def broken_send(self, fail_silently=False):
+            raise ConnectionError('SMTP недоступен')
+
+        monkeypatch.setattr(EmailMessage, 'send', broken_send)
+        send_outbox()
+        email.refresh_from_db()
+        assert email.attempts == 1 and email.sent_at is None
+        assert email.next_attempt_at > timezone.now(), (
+            'Проверьте, что неотправленное письмо откладывается'
+        )
+
+        monkeypatch.undo()
+        send_outbox()
+        assert mailoutbox == []
+        OutgoingEmail.objects.update(next_attempt_at=timezone.now())
+        send_outbox()
+        assert len(mailoutbox) == 1
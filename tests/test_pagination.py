@@ -0,0 +1,110 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+@pytest.mark.django_db
+class TestCursorPagination:
+
+    def walk(self, client, url):
+        ids, pages = [], 0
+        while url:
+            response = client.get(url)
+            assert response.status_code == 200
+            data = response.json()
+            assert 'count' not in data, (
+                'Проверьте, что в режиме курсора не считается COUNT(*)'
+            )
+            ids.extend(item['id'] for item in data['results'])
+            url = data['next']
+            pages += 1
+        return ids, pages
+
+    def test_reviews_cursor_walks_all_pages(self, client, monkeypatch,
+                                            make_catalog, title):
+        from api.pagination import CursorOrPageNumberPagination
+
+        monkeypatch.setattr(CursorOrPageNumberPagination, 'page_size', 2)
+        make_catalog(4)
+        ids, pages = self.walk(
+            client, f'/api/v1/titles/{title.id}/reviews/?cursor=')
+        expected = list(
+            title.reviews.order_by('pub_date', 'id').values_list(
+                'id', flat=True))
+        assert ids == expected, (
+            'Проверьте, что курсор отдаёт все отзывы по порядку pub_date, id'
+        )
+        assert pages == 3
+
+    def test_cursor_walks_runs_of_equal_keys(self, client, monkeypatch):
+        from api.pagination import CursorOrPageNumberPagination
+        from reviews.models import Title
+
+        monkeypatch.setattr(CursorOrPageNumberPagination, 'page_size', 100)
+        Title.objects.bulk_create(
+            Title(name=f'Произведение {i}', year=2000) for i in range(1250))
+        Title.objects.create(name='Раньше', year=1999)
+        expected = list(Title.objects.order_by('year', 'id').values_list(
+            'id', flat=True))
+        ids, pages = self.walk(client, '/api/v1/titles/?cursor=')
+        assert ids == expected, (
+            'Проверьте, что курсор проходит больше 1000 произведений '
+            'одного года без повторов и пропусков'
+        )
+        assert pages == 13
+        with CaptureQueriesContext(connection) as context:
+            data = client.get(client.get(
+                '/api/v1/titles/?cursor=').json()['next']).json()
+        assert not any('OFFSET' in query['sql'].upper()
+                       for query in context.captured_queries), (
+            'Проверьте, что страницы курсора выбираются без OFFSET'
+        )
+        previous = client.get(data['previous']).json()
+        assert [item['id'] for item in previous['results']] == expected[:100]
+        assert previous['previous'] is None
+
+    def test_invalid_cursor(self, client):
+        assert client.get('/api/v1/titles/?cursor=xyz').status_code == 404
+
+    def test_titles_cursor_has_no_count_query(self, client, make_catalog):
+        make_catalog(3)
+        with CaptureQueriesContext(connection) as context:
+            response = client.get('/api/v1/titles/?cursor=')
+        assert response.status_code == 200
+        assert not any('COUNT(' in query['sql'].upper()
+                       for query in context.captured_queries)
+
+    def test_page_number_mode_is_default(self, client, title):
+        response = client.get('/api/v1/titles/')
+        assert response.json()['count'] == 1, (
+            'Проверьте, что без ?cursor= пагинация остаётся постраничной'
+        )
+
+
+@pytest.mark.django_db
+class TestApproximateCount:
+
+    def test_small_collections_are_counted_exactly(self, client, title):
+        data = client.get('/api/v1/titles/').json()
+        assert (data['count'], data['count_exact']) == (1, True), (
+            'Проверьте, что небольшие списки считаются точным COUNT(*)'
+        )
+
+    def test_large_collections_use_estimate(self, client, monkeypatch,
+                                            settings, make_catalog):
+        from api import pagination
+
+        settings.PAGINATION_EXACT_COUNT_THRESHOLD = 1000
+        monkeypatch.setattr(
+            pagination, 'estimate_count', lambda queryset: 50000)
+        monkeypatch.setattr(
+            pagination.ApproximateCountPagination, 'page_size', 2)
+        make_catalog(2)
+        with CaptureQueriesContext(connection) as context:
+            data = client.get('/api/v1/titles/?page=2').json()
+        assert (data['count'], data['count_exact']) == (50000, False), (
+            'Проверьте, что большие списки берут count из оценки'
+        )
+        assert data['next'] is None and len(data['results']) == 1
+        assert not any('COUNT(' in query['sql'].upper()
+                       for query in context.captured_queries)
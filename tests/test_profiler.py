@@ -0,0 +1,45 @@
+import os
+
+import pytest
+
+
+@pytest.fixture
+def profiler_dir(settings, tmp_path):
+    settings.PROFILER_DIR = str(tmp_path)
+    return tmp_path
+
+
+@pytest.mark.django_db
+class TestProfiler:
+
+    def test_admin_request_is_profiled(self, admin_client, title,
+                                       profiler_dir):
+        admin_client.get('/api/v1/titles/')
+        response = admin_client.get('/api/v1/titles/', HTTP_X_PROFILE='1')
+        assert response.status_code == 200
+        assert 'X-Cache' not in response, (
+            'Проверьте, что профилируемый запрос не читает кэш ответов'
+        )
+        name = response['X-Profile-Report']
+        assert 'titles-list' in name
+        assert sorted(os.listdir(profiler_dir)) == [
+            f'{name}.prof', f'{name}.sql.txt', f'{name}.txt']
+        report = (profiler_dir / f'{name}.txt').read_text(encoding='utf-8')
+        assert 'views.py' in report and 'cumulative' in report, (
+            'Проверьте, что отчёт содержит дерево вызовов вьюхи'
+        )
+        sql = (profiler_dir / f'{name}.sql.txt').read_text(encoding='utf-8')
+        assert 'reviews_title' in sql
+        assert 'SCAN' in sql or 'SEARCH' in sql, (
+            'Проверьте, что к SELECT-запросам добавлен вывод EXPLAIN'
+        )
+
+    def test_only_admins_are_profiled(self, client, user_client, title,
+                                      profiler_dir):
+        for api_client in (client, user_client):
+            response = api_client.get('/api/v1/titles/', HTTP_X_PROFILE='1')
+            assert response.status_code == 200
+            assert 'X-Profile-Report' not in response
+        assert os.listdir(profiler_dir) == [], (
+            'Проверьте, что профилируются только запросы администраторов'
+        )
@@ -0,0 +1,75 @@
+import pytest
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+# Максимальное число SQL-запросов на один запрос к эндпоинту,
+# включая отметки изменения для ETag (у произведений, отзывов
+# и комментариев). Состояние пользователя для JWT берётся из кэша.
+# Бюджет не должен зависеть от размера страницы.
+QUERY_BUDGETS = {
+    'titles-list': 4,
+    'titles-detail': 3,
+    'reviews-list': 4,
+    'comments-list': 4,
+    'categories-list': 2,
+    'genres-list': 2,
+    'users-list': 2,
+}
+
+
+def endpoint_urls(title, review):
+    return {
+        'titles-list': '/api/v1/titles/',
+        'titles-detail': f'/api/v1/titles/{title.id}/',
+        'reviews-list': f'/api/v1/titles/{title.id}/reviews/',
+        'comments-list': (
+            f'/api/v1/titles/{title.id}/reviews/{review.id}/comments/'),
+        'categories-list': '/api/v1/categories/',
+        'genres-list': '/api/v1/genres/',
+        'users-list': '/api/v1/users/',
+    }
+
+
+def count_queries(client, url, user):
+    # Бюджет считается для ответа, собранного без кэша;
+    # закэшированным остаётся только состояние пользователя.
+    from api.authentication import get_auth_state
+
+    cache.clear()
+    get_auth_state(user.id)
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(url)
+    assert response.status_code == 200, (
+        f'Проверьте, что GET {url} возвращает статус 200'
+    )
+    return len(context.captured_queries)
+
+
+@pytest.mark.django_db
+class TestQueryBudget:
+
+    @pytest.mark.parametrize('endpoint', sorted(QUERY_BUDGETS))
+    def test_endpoint_within_budget(self, admin, admin_client, make_catalog,
+                                    title, review, endpoint):
+        make_catalog(2)
+        url = endpoint_urls(title, review)[endpoint]
+        small = count_queries(admin_client, url, admin)
+        assert small <= QUERY_BUDGETS[endpoint], (
+            f'Эндпоинт {endpoint} выполняет {small} SQL-запросов, '
+            f'бюджет - {QUERY_BUDGETS[endpoint]}'
+        )
+
+    @pytest.mark.parametrize('endpoint', sorted(QUERY_BUDGETS))
+    def test_queries_do_not_grow_with_page(self, admin, admin_client,
+                                           make_catalog, title, review,
+                                           endpoint):
+        make_catalog(2)
+        url = endpoint_urls(title, review)[endpoint]
+        small = count_queries(admin_client, url, admin)
+        make_catalog(10)
+        large = count_queries(admin_client, url, admin)
+        assert large == small, (
+            f'Число SQL-запросов эндпоинта {endpoint} растёт вместе '
+            f'с размером страницы: {small} -> {large}'
+        )
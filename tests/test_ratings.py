@@ -0,0 +1,54 @@
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+
+
+@pytest.mark.django_db
+class TestTitleRating:
+
+    def test_rating_follows_reviews(self, title, review, moderator):
+        from reviews.models import Review
+
+        title.refresh_from_db()
+        assert (title.review_count, title.score_sum, title.rating) == (
+            1, 8, 8.0), 'Проверьте, что новый отзыв учитывается в рейтинге'
+
+        second = Review.objects.create(
+            title=title, author=moderator, text='Так себе', score=3)
+        title.refresh_from_db()
+        assert title.rating == 5.5
+
+        second.score = 5
+        second.save()
+        title.refresh_from_db()
+        assert (title.review_count, title.score_sum) == (2, 13), (
+            'Проверьте, что изменение оценки пересчитывает рейтинг'
+        )
+
+        second.delete()
+        review.delete()
+        title.refresh_from_db()
+        assert (title.review_count, title.score_sum, title.rating) == (
+            0, 0, None), 'Проверьте, что удаление отзыва обнуляет рейтинг'
+
+    def test_rating_on_author_cascade(self, title, review, user):
+        user.delete()
+        title.refresh_from_db()
+        assert title.review_count == 0, (
+            'Проверьте, что каскадное удаление отзывов меняет рейтинг'
+        )
+
+    def test_rebuild_ratings_command(self, title, review):
+        from reviews.models import Title
+
+        Title.objects.update(review_count=0, score_sum=0, rating=None)
+        call_command('rebuild_ratings', stdout=StringIO())
+        title.refresh_from_db()
+        assert (title.review_count, title.score_sum, title.rating) == (
+            1, 8, 8.0), 'Проверьте, что команда восстанавливает рейтинг'
+
+    def test_title_list_reads_stored_rating(self, client, title, review):
+        response = client.get('/api/v1/titles/')
+        assert response.status_code == 200
+        assert response.json()['results'][0]['rating'] == 8
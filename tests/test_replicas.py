@@ -0,0 +1,88 @@
+import pytest
+from django.db import connections
+from django.test.utils import CaptureQueriesContext
+
+replica_db = pytest.mark.django_db(
+    transaction=True, databases=['default', 'replica'])
+
+
+@pytest.fixture
+def replicas(settings):
+    settings.DATABASE_REPLICAS = ['replica']
+
+
+def replica_queries(client, method, url, data=None):
+    with CaptureQueriesContext(connections['replica']) as queries:
+        response = getattr(client, method)(url, data)
+    assert response.status_code < 400, response.content
+    return len(queries)
+
+
+@replica_db
+class TestReplicaRouting:
+
+    def test_safe_requests_read_from_replica(self, replicas, client, title):
+        from django.core.cache import cache
+
+        # Отметки о недавней записи фикстуры истекли.
+        cache.clear()
+        assert replica_queries(client, 'get', '/api/v1/titles/') > 0, (
+            'Проверьте, что GET-запросы читают с реплики'
+        )
+
+    def test_without_replicas_everything_goes_to_default(self, client,
+                                                         title):
+        assert replica_queries(client, 'get', '/api/v1/titles/') == 0
+
+    def test_writer_is_pinned_to_primary(self, replicas, user_client, title):
+        assert replica_queries(user_client, 'get', '/api/v1/users/me/') > 0
+        url = f'/api/v1/titles/{title.id}/reviews/'
+        assert replica_queries(
+            user_client, 'post', url, {'text': 'Отзыв', 'score': 7}) == 0, (
+            'Проверьте, что запросы с записью целиком идут в основную базу'
+        )
+        assert replica_queries(user_client, 'get', '/api/v1/users/me/') == 0, (
+            'Проверьте, что после записи клиент читает из основной базы'
+        )
+
+    def test_anonymous_clients_behind_proxy_are_pinned_apart(
+            self, replicas, title):
+        from django.core.cache import cache
+        from django.test import Client
+
+        cache.clear()
+        writer = Client(HTTP_X_FORWARDED_FOR='203.0.113.1')
+        reader = Client(HTTP_X_FORWARDED_FOR='203.0.113.2')
+        assert replica_queries(writer, 'post', '/api/v1/auth/signup/', {
+            'username': 'newbie', 'email': 'newbie@yamdb.fake'}) == 0
+        assert replica_queries(writer, 'get', '/api/v1/genres/') == 0
+        assert replica_queries(reader, 'get', '/api/v1/titles/') > 0, (
+            'Проверьте, что запись анонимного клиента за прокси не '
+            'закрепляет за основной базой остальных анонимных клиентов'
+        )
+
+    def test_fresh_writes_are_cached_from_primary(self, replicas, client,
+                                                  user_client, title):
+        url = f'/api/v1/titles/{title.id}/reviews/'
+        user_client.post(url, {'text': 'Отзыв', 'score': 7})
+        assert replica_queries(client, 'get', url) == 0, (
+            'Проверьте, что ответы о недавно изменённых данных попадают '
+            'в кэш из основной базы, а не с отстающей реплики'
+        )
+
+
+class TestReplicaRouter:
+
+    def test_writes_and_migrations_use_default(self, replicas):
+        from api_yamdb.db.routers import ReplicaRouter, routing
+        from reviews.models import Title
+
+        router = ReplicaRouter()
+        with routing(use_replica=True):
+            assert router.db_for_read(Title) == 'replica'
+            assert router.db_for_write(Title) == 'default'
+            assert router.db_for_read(Title) == 'default', (
+                'Проверьте, что после записи чтения идут в основную базу'
+            )
+        assert router.db_for_read(Title) == 'default'
+        assert not router.allow_migrate('replica', 'reviews')
@@ -0,0 +1,99 @@
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+
+
+def get(client, url):
+    response = client.get(url)
+    assert response.status_code == 200
+    return response
+
+
+@pytest.mark.django_db
+class TestResponseCache:
+
+    def test_repeated_reads_are_cached(self, client, title,
+                                       django_assert_num_queries):
+        assert get(client, '/api/v1/titles/')['X-Cache'] == 'MISS'
+        with django_assert_num_queries(0):
+            response = get(client, '/api/v1/titles/')
+        assert response['X-Cache'] == 'HIT', (
+            'Проверьте, что повторный анонимный запрос отдаётся из кэша'
+        )
+        assert response.json()['results'][0]['name'] == 'Начало'
+
+    def test_query_string_is_part_of_key(self, client, title):
+        get(client, '/api/v1/titles/?year=2010&name=Нач')
+        response = get(client, '/api/v1/titles/?name=Нач&year=2010')
+        assert response['X-Cache'] == 'HIT', (
+            'Проверьте, что порядок параметров не влияет на ключ кэша'
+        )
+        assert get(client, '/api/v1/titles/?year=1999')['X-Cache'] == 'MISS'
+
+    def test_role_is_part_of_key(self, client, user_client, title):
+        get(client, '/api/v1/titles/')
+        assert get(user_client, '/api/v1/titles/')['X-Cache'] == 'MISS'
+
+    def test_model_changes_invalidate(self, client, title, genres, moderator):
+        from reviews.models import Review
+
+        url = f'/api/v1/titles/{title.id}/'
+        get(client, url)
+        title.name = 'Начало (2010)'
+        title.save()
+        assert get(client, url).json()['name'] == 'Начало (2010)'
+
+        Review.objects.create(
+            title=title, author=moderator, text='Отлично', score=10)
+        assert get(client, url).json()['rating'] == 10, (
+            'Проверьте, что новый отзыв сбрасывает кэш произведения'
+        )
+
+        genres[0].name = 'Трагедия'
+        genres[0].save()
+        assert get(client, url).json()['genre'][0]['name'] == 'Трагедия'
+
+        title.genre.set([genres[1]])
+        assert len(get(client, url).json()['genre']) == 1
+
+    def test_reads_during_write_transaction_are_dropped(
+            self, client, title, django_capture_on_commit_callbacks):
+        from django.db import transaction
+
+        url = f'/api/v1/titles/{title.id}/'
+        with django_capture_on_commit_callbacks(execute=True):
+            with transaction.atomic():
+                title.name = 'Начало (2010)'
+                title.save()
+                # Ответ, закэшированный до коммита, как это сделал бы
+                # параллельный запрос.
+                assert get(client, url)['X-Cache'] == 'MISS'
+                assert get(client, url)['X-Cache'] == 'HIT'
+        assert get(client, url)['X-Cache'] == 'MISS', (
+            'Проверьте, что кэш сбрасывается ещё раз после коммита'
+        )
+
+    def test_writes_through_api_invalidate(self, client, user_client,
+                                           title, review):
+        url = f'/api/v1/titles/{title.id}/reviews/{review.id}/comments/'
+        assert get(client, url).json()['count'] == 0
+        response = user_client.post(url, {'text': 'Согласен'})
+        assert response.status_code == 201
+        assert get(client, url).json()['count'] == 1, (
+            'Проверьте, что новый комментарий сбрасывает кэш комментариев'
+        )
+
+        other = f'/api/v1/titles/{title.id}/reviews/'
+        get(client, other)
+        user_client.delete(f'{other}{review.id}/')
+        assert get(client, other).json()['count'] == 0
+
+    def test_import_invalidates(self, client, title, tmp_path):
+        get(client, '/api/v1/categories/')
+        (tmp_path / 'category.csv').write_text(
+            'id,name,slug\n99,Книга,book\n', encoding='utf-8')
+        call_command('import', path=str(tmp_path), stdout=StringIO())
+        assert get(client, '/api/v1/categories/').json()['count'] == 2, (
+            'Проверьте, что команда import сбрасывает кэш ответов'
+        )
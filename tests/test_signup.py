@@ -0,0 +1,72 @@
+import re
+
+import pytest
+
+SIGNUP_URL = '/api/v1/auth/signup/'
+TOKEN_URL = '/api/v1/auth/token/'
+
+
+def sent_code():
+    from users.models import OutgoingEmail
+
+    message = OutgoingEmail.objects.latest('id').message
+    return re.search(r'подтверждения (\w+),', message).group(1)
+
+
+@pytest.mark.django_db
+class TestSignup:
+
+    def test_signup_and_token(self, client, django_assert_max_num_queries):
+        data = {'username': 'newbie', 'email': 'newbie@yamdb.fake'}
+        # Поиск, вставка пользователя в SAVEPOINT и письмо в очередь.
+        with django_assert_max_num_queries(5):
+            assert client.post(SIGNUP_URL, data).status_code == 200, (
+                'Проверьте, что регистрация не делает лишних запросов'
+            )
+        with django_assert_max_num_queries(2):
+            assert client.post(SIGNUP_URL, data).status_code == 200
+
+        code = sent_code()
+        with django_assert_max_num_queries(0):
+            response = client.post(
+                TOKEN_URL, {'username': 'newbie', 'confirmation_code': code})
+        assert response.status_code == 200, (
+            'Проверьте, что код из кэша обменивается на токен без запросов '
+            'к базе'
+        )
+        assert response.json()['token']
+        again = client.post(
+            TOKEN_URL, {'username': 'newbie', 'confirmation_code': code})
+        assert again.status_code == 400, (
+            'Проверьте, что код подтверждения одноразовый'
+        )
+
+    def test_conflicts(self, client, user):
+        response = client.post(SIGNUP_URL, {
+            'username': user.username, 'email': 'other@yamdb.fake'})
+        assert response.status_code == 400
+        assert 'username' in response.json()['message']
+        response = client.post(SIGNUP_URL, {
+            'username': 'other', 'email': user.email})
+        assert response.status_code == 400
+        assert 'email' in response.json()['message']
+
+    def test_wrong_code(self, client, user):
+        response = client.post(
+            TOKEN_URL, {'username': user.username, 'confirmation_code': 'X'})
+        assert response.status_code == 400
+        response = client.post(
+            TOKEN_URL, {'username': 'nobody', 'confirmation_code': 'X'})
+        assert response.status_code == 404
+
+    def test_code_is_redeemed_once_under_race(self, user, monkeypatch):
+        from users import utils
+
+        code = utils.issue_auth_code(user)
+        entry = utils.cache.get(utils.auth_code_key(user.username))
+        assert utils.redeem_auth_code(user.username, code) is not None
+        # Параллельный запрос прочитал код до того, как его удалили.
+        monkeypatch.setattr(utils.cache, 'get', lambda key: entry)
+        assert utils.redeem_auth_code(user.username, code) is None, (
+            'Проверьте, что один код выдаёт только один токен'
+        )
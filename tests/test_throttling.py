@@ -0,0 +1,52 @@
+import pytest
+
+TOKEN_URL = '/api/v1/auth/token/'
+
+
+@pytest.fixture
+def rates(monkeypatch):
+    from rest_framework.throttling import SimpleRateThrottle
+
+    rates = {'auth_ip': '100/min', 'auth_username': '100/min',
+             'content_write': '100/min'}
+    monkeypatch.setattr(SimpleRateThrottle, 'THROTTLE_RATES', rates)
+    return rates
+
+
+@pytest.mark.django_db
+class TestThrottling:
+
+    def test_token_attempts_per_username(self, client, user, rates):
+        rates['auth_username'] = '2/min'
+        data = {'username': user.username, 'confirmation_code': 'WRONG'}
+        for _ in range(2):
+            assert client.post(TOKEN_URL, data).status_code == 400
+        response = client.post(
+            TOKEN_URL, data, REMOTE_ADDR='10.0.0.2')
+        assert response.status_code == 429, (
+            'Проверьте, что перебор кода для одного username ограничен '
+            'независимо от IP'
+        )
+        assert int(response['Retry-After']) > 0
+
+    def test_auth_per_ip(self, client, rates):
+        rates['auth_ip'] = '2/min'
+        for number in range(2):
+            client.post('/api/v1/auth/signup/', {
+                'username': f'spam{number}',
+                'email': f'spam{number}@yamdb.fake'})
+        response = client.post('/api/v1/auth/signup/', {
+            'username': 'spam3', 'email': 'spam3@yamdb.fake'})
+        assert response.status_code == 429
+        assert response.has_header('Retry-After')
+
+    def test_content_writes(self, user_client, review, rates):
+        rates['content_write'] = '1/min'
+        url = f'/api/v1/titles/{review.title_id}/reviews/{review.id}/comments/'
+        assert user_client.post(url, {'text': 'Раз'}).status_code == 201
+        assert user_client.post(url, {'text': 'Два'}).status_code == 429, (
+            'Проверьте, что создание комментариев ограничено'
+        )
+        assert user_client.get(url).status_code == 200, (
+            'Проверьте, что чтение не ограничивается'
+        )
@@ -0,0 +1,91 @@
+import pytest
+
+
+@pytest.fixture
+def catalog(category):
+    from reviews.models import Title
+
+    return [
+        Title.objects.create(
+            name='Сны', year=1990, category=category,
+            description='документальный фильм о сновидениях'),
+        Title.objects.create(
+            name='Начало', year=2010, category=category,
+            description='Фильм про Сны внутри снов'),
+        Title.objects.create(
+            name='Матрица', year=1999, category=category,
+            description='Фантастика'),
+    ]
+
+
+def result_ids(client, query):
+    response = client.get('/api/v1/titles/', query)
+    assert response.status_code == 200
+    return [item['id'] for item in response.json()['results']]
+
+
+@pytest.mark.django_db
+class TestTitleSearch:
+
+    def test_search_matches_name_and_description(self, client, catalog):
+        first, second, third = catalog
+        ids = result_ids(client, {'search': 'Сны'})
+        assert ids == [first.id, second.id], (
+            'Проверьте, что ?search= ищет по названию и описанию, '
+            'а совпадения в названии идут первыми'
+        )
+
+    def test_search_requires_all_words(self, client, catalog):
+        assert result_ids(client, {'search': 'фильм документальный'}) == [
+            catalog[0].id]
+
+    def test_search_keeps_relevance_with_cursor(self, client, catalog):
+        from reviews.models import Title
+
+        first, second, third = catalog
+        older = Title.objects.create(name='Сны 2', year=1980)
+        response = client.get('/api/v1/titles/', {
+            'search': 'Сны', 'cursor': ''})
+        data = response.json()
+        assert [item['id'] for item in data['results']] == [
+            first.id, older.id, second.id], (
+            'Проверьте, что с ?search= курсор не меняет порядок '
+            'по релевантности'
+        )
+        assert data['count'] == 3
+
+
+@pytest.mark.django_db
+class TestTitleFilters:
+
+    @pytest.fixture
+    def tagged(self, catalog, genres):
+        drama, comedy = genres
+        catalog[0].genre.set([drama])
+        catalog[1].genre.set([drama, comedy])
+        catalog[2].genre.set([comedy])
+        return catalog
+
+    def test_genre_filter_is_exact_and_multi_value(self, client, tagged):
+        first, second, third = tagged
+        assert result_ids(client, {'genre': 'drama'}) == [
+            first.id, second.id]
+        assert result_ids(client, {'genre': 'drama,comedy'}) == [
+            first.id, third.id, second.id], (
+            'Проверьте, что ?genre=a,b отдаёт каждое произведение один раз'
+        )
+        assert result_ids(client, {'genre': 'dram'}) == [], (
+            'Проверьте, что фильтр по жанру сравнивает slug целиком'
+        )
+
+    def test_category_filter(self, client, tagged):
+        assert len(result_ids(client, {'category': 'movie,book'})) == 3
+        assert result_ids(client, {'category': 'mov'}) == []
+
+    def test_year_range(self, client, tagged):
+        first, second, third = tagged
+        assert result_ids(client, {'year_min': 1995, 'year_max': 2005}) == [
+            third.id]
+        assert result_ids(client, {'year': 2010}) == [second.id]
+        response = client.get('/api/v1/titles/', {'year': 'abc'})
+        assert response.status_code == 400
@@ -0,0 +1,84 @@
+import pytest
+from django.core.cache import cache
+from django.test import override_settings
+
+
+@pytest.mark.django_db
+class TestValuesLists:
+
+    def get_both(self, client, url):
+        cache.clear()
+        with override_settings(API_VALUES_LISTS=False):
+            expected = client.get(url)
+        cache.clear()
+        actual = client.get(url)
+        assert actual.status_code == expected.status_code == 200
+        return expected.content, actual.content
+
+    @pytest.mark.parametrize('query', (
+        '', '?page=2', '?cursor=', '?genre=drama', '?search=Произведение',
+        '?year_min=2005&category=movie'))
+    def test_titles_match_serializer(self, client, make_catalog, query):
+        from reviews.models import Genre, Title
+
+        make_catalog(120)
+        untitled = Title.objects.create(name='Без категории', year=1999)
+        untitled.genre.add(Genre.objects.create(name='Ужасы',
+                                                slug='horror'))
+        Title.objects.create(name='Без жанра ', year=1998,
+                             description=None)
+        expected, actual = self.get_both(client, f'/api/v1/titles/{query}')
+        assert actual == expected, (
+            'Проверьте, что список произведений из values() побайтно '
+            'совпадает с ответом сериализатора'
+        )
+
+    def test_reviews_and_comments_match_serializer(self, client,
+                                                   make_catalog, title,
+                                                   review):
+        make_catalog(5)
+        for url in (f'/api/v1/titles/{title.id}/reviews/',
+                    f'/api/v1/titles/{title.id}/reviews/?cursor=',
+                    f'/api/v1/titles/{title.id}/reviews/{review.id}/'
+                    'comments/'):
+            expected, actual = self.get_both(client, url)
+            assert actual == expected, (
+                'Проверьте, что списки отзывов и комментариев из values() '
+                'побайтно совпадают с ответом сериализатора'
+            )
+
+    def test_count_skips_response_joins(self, client, make_catalog,
+                                        monkeypatch):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        from api import pagination
+
+        estimated = []
+        monkeypatch.setattr(pagination, 'estimate_count',
+                            lambda queryset: estimated.append(
+                                str(queryset.order_by().values('pk').query)))
+        make_catalog(5)
+        cache.clear()
+        with CaptureQueriesContext(connection) as context:
+            client.get('/api/v1/titles/?page=2')
+        counts = [query['sql'] for query in context.captured_queries
+                  if 'COUNT(' in query['sql'].upper()]
+        assert len(counts) == 1 and 'JOIN' not in counts[0], (
+            'Проверьте, что COUNT(*) списка считается без JOIN столбцов '
+            'ответа'
+        )
+        assert 'JOIN' not in estimated[0], (
+            'Проверьте, что оценка числа строк строится без JOIN столбцов '
+            'ответа'
+        )
+
+    def test_renderer_matches_json_renderer(self):
+        from rest_framework.renderers import JSONRenderer
+
+        from api.renderers import FastJSONRenderer
+
+        data = {'text': 'Кавычки " и \\ \n\t\x01 \u2028\u2029', 'list': [
+            1, None, True, 'строка'], 'nested': {'pk': 10 ** 18}}
+        assert FastJSONRenderer().render(data) == JSONRenderer().render(
+            data)